@@ -20,7 +20,8 @@ __all__ = [
 def extract_claims_from_pdf(
     pdf_path: str,
     output_dir: str,
-    output_format: str = "markdown"
+    output_format: str = "markdown",
+    lazy: bool = False
 ) -> Optional[str]:
     """
     从PDF文件中提取权利要求书内容的便捷函数。
@@ -29,6 +30,7 @@ def extract_claims_from_pdf(
         pdf_path: PDF文件路径
         output_dir: 输出目录路径
         output_format: 输出格式，支持 'markdown' 或 'text'
+        lazy: 是否按需解析，只完整提取权利要求书所在页面
 
     Returns:
         成功时返回输出文件路径，失败时返回 None
@@ -40,11 +42,15 @@ def extract_claims_from_pdf(
     parser = PDFParser()
     extractor = ClaimsExtractor()
     
-    # 解析PDF文件
-    pages = parser.parse_pdf(pdf_path)
-    
-    # 提取权利要求书内容
-    claims_content = extractor.extract_claims(pages)
+    if lazy:
+        # 先快速定位章节，再只解析权利要求书页面
+        claims_content = extractor.extract_claims_lazy(parser, pdf_path)
+    else:
+        # 解析PDF文件
+        pages = parser.parse_pdf(pdf_path)
+        
+        # 提取权利要求书内容
+        claims_content = extractor.extract_claims(pages)
     
     if claims_content:
         # 保存结果
@@ -3,13 +3,16 @@ TDT专利规则提取工具 - LLM智能体模块
 """
 
 from .prompts import (
-    PATENT_ANALYSIS_PROMPT, SYSTEM_PROMPT, format_claims_for_llm,
-    format_existing_rules, format_sequence_summary
+    PATENT_ANALYSIS_PROMPT, SYSTEM_PROMPT, compact_sequence_for_llm,
+    format_chunk_data_for_llm, format_claims_for_llm, format_existing_rules,
+    format_sequence_summary
 )
 
 __all__ = [
     'PATENT_ANALYSIS_PROMPT',
     'SYSTEM_PROMPT',
+    'compact_sequence_for_llm',
+    'format_chunk_data_for_llm',
     'format_claims_for_llm',
     'format_existing_rules',
     'format_sequence_summary',
@@ -4,6 +4,16 @@ LLM提示模板
 为Qwen模型设计的专利规则分析提示模板。
 """
 
+import json
+import re
+from typing import Any, Dict, Iterable, List
+
+# 发送给LLM的序列超过该长度的两倍时，只保留首尾各这么多个残基
+LLM_SEQUENCE_PREVIEW = 30
+
+# 突变位点中的位置：Y178A 形式的标准突变，或中文权利要求中常见的裸位置（178、20/21/68）
+_MUTATION_POSITION_PATTERN = re.compile(r'^[A-Z]?(\d+)[A-Z*]?$')
+
 SYSTEM_PROMPT = """你是专利序列保护分析专家。你的任务是识别专利权利要求对序列的保护范围，并使用结构化的逻辑表达式描述保护规则。
 
 核心任务：
@@ -167,3 +177,93 @@ def format_existing_rules(existing_rules_data) -> str:
         summary_parts.append(part)
     
     return "\n".join(summary_parts)
+
+
+def compact_sequence_for_llm(sequence: Dict[str, Any],
+                             mutation_positions: Iterable[str] = (),
+                             preview: int = LLM_SEQUENCE_PREVIEW) -> Dict[str, Any]:
+    """
+    将序列记录压缩为规则分析需要的字段
+
+    只保留序列ID、类型、长度和描述；长序列缩写为首尾片段加校验和，
+    并附上权利要求涉及位置的野生型残基（Y178A 形式的突变和 178、20/21/68
+    等裸位置），使LLM仍能写出 Y178A 形式的规则；
+    组成、验证结果和时间戳等字段不发送给LLM。
+
+    Args:
+        sequence: SequenceRecord.model_dump() 格式的序列字典
+        mutation_positions: 权利要求中提取的突变位点
+        preview: 缩写时首尾各保留的残基数
+
+    Returns:
+        Dict[str, Any]: 压缩后的序列字典
+    """
+    sequence_data = sequence.get("sequence_data") or {}
+    residues = sequence_data.get("cleaned_sequence") or sequence_data.get("raw_sequence") or ""
+
+    compact: Dict[str, Any] = {
+        "sequence_id": sequence.get("sequence_id", ""),
+        "molecular_type": sequence_data.get("molecular_type"),
+        "length": sequence_data.get("length", len(residues)),
+    }
+    if sequence.get("description"):
+        compact["description"] = sequence["description"]
+
+    if len(residues) <= 2 * preview:
+        compact["sequence"] = residues
+        return compact
+
+    compact["sequence"] = f"{residues[:preview]}...{residues[-preview:]}"
+    compact["checksum"] = sequence_data.get("checksum")
+
+    wild_type_residues = {}
+    for mutation in mutation_positions:
+        for part in mutation.split('/'):
+            match = _MUTATION_POSITION_PATTERN.match(part.strip())
+            if match and 1 <= int(match.group(1)) <= len(residues):
+                position = int(match.group(1))
+                wild_type_residues[str(position)] = residues[position - 1]
+    if wild_type_residues:
+        compact["residues_at_mutation_sites"] = dict(
+            sorted(wild_type_residues.items(), key=lambda item: int(item[0]))
+        )
+    return compact
+
+
+def format_chunk_data_for_llm(chunk_data: Dict[str, Any]) -> str:
+    """
+    将分析块数据序列化为紧凑JSON供LLM分析
+
+    权利要求只保留编号、类型、引用关系和原文，空字段省略；
+    相关序列经 compact_sequence_for_llm 压缩；输出不含缩进和多余空白。
+
+    Args:
+        chunk_data: ChunkedAnalyzer 准备的块数据（claims、relevant_sequences）
+
+    Returns:
+        str: 紧凑JSON文本
+    """
+    claims: List[Dict[str, Any]] = []
+    mutation_positions: List[str] = []
+    for claim in chunk_data.get("claims", []):
+        compact_claim = {
+            "claim_number": claim.get("claim_number"),
+            "claim_type": claim.get("claim_type"),
+        }
+        if claim.get("references"):
+            compact_claim["references"] = claim["references"]
+        if claim.get("seq_id_references"):
+            compact_claim["seq_id_references"] = claim["seq_id_references"]
+        compact_claim["claim_text"] = claim.get("claim_text", "")
+        claims.append(compact_claim)
+        mutation_positions.extend(claim.get("mutation_positions", []))
+
+    sequences = [
+        compact_sequence_for_llm(sequence, mutation_positions)
+        for sequence in chunk_data.get("relevant_sequences", {}).values()
+    ]
+
+    payload: Dict[str, Any] = {"claims": claims}
+    if sequences:
+        payload["relevant_sequences"] = sequences
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
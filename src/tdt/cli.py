@@ -5,8 +5,10 @@
 """
 import logging
 import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import click
 from dotenv import load_dotenv
@@ -17,7 +19,10 @@ load_dotenv()
 from tdt import extract_claims_from_pdf
 from tdt.core.parser import PDFParser
 from tdt.core.extractor import ClaimsExtractor
-from tdt.utils.file_utils import get_pdf_files_in_directory, validate_pdf_file
+from tdt.core.manifest import ProcessingManifest
+from tdt.utils.file_utils import (
+    get_output_filename, get_pdf_files_in_directory, validate_pdf_file
+)
 
 
 # 配置日志
@@ -69,11 +74,17 @@ def cli(verbose: bool) -> None:
     is_flag=True,
     help='强制覆盖已存在的输出文件'
 )
+@click.option(
+    '--lazy',
+    is_flag=True,
+    help='按需解析：快速扫描页眉定位权利要求书，只完整解析相关页面'
+)
 def extract(
     pdf_path: Path, 
     output_dir: Path, 
     format: str,
-    force: bool
+    force: bool,
+    lazy: bool
 ) -> None:
     """
     从单个PDF文件中提取权利要求书内容。
@@ -87,7 +98,6 @@ def extract(
         pdf_path = validate_pdf_file(pdf_path)
         
         # 检查输出文件是否已存在
-        from tdt.utils.file_utils import get_output_filename
         output_filename = get_output_filename(pdf_path, format)
         output_file = output_dir / output_filename
         
@@ -108,7 +118,8 @@ def extract(
             result_path = extract_claims_from_pdf(
                 str(pdf_path),
                 str(output_dir),
-                format
+                format,
+                lazy=lazy
             )
             
             bar.update(80)  # 完成提取
@@ -127,6 +138,50 @@ def extract(
         sys.exit(1)
 
 
+def _extract_single_pdf(task: Tuple[str, str, str, bool]) -> Tuple[str, Optional[str]]:
+    """
+    批量处理的单文件任务，可在独立进程中执行。
+    
+    异常在任务内部捕获，单个文件失败不会影响其他文件。
+    
+    Args:
+        task: (PDF文件路径, 输出目录, 输出格式, 是否按需解析)
+        
+    Returns:
+        (状态, 详情) 元组，状态为 'success'、'not_found' 或 'failed'，
+        详情为输出文件路径或错误信息
+    """
+    pdf_path, output_dir, output_format, lazy = task
+    
+    try:
+        result_path = extract_claims_from_pdf(pdf_path, output_dir, output_format, lazy=lazy)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"处理文件 {pdf_path} 失败: {e}")
+        return "failed", str(e)
+    
+    if result_path:
+        return "success", result_path
+    return "not_found", None
+
+
+def _resubmit_unfinished(executor: ProcessPoolExecutor, futures: List[Future],
+                         tasks: List[Tuple[str, str, str, bool]], start: int) -> None:
+    """
+    进程池失效后，将 start 之后尚未成功完成的任务提交到新的进程池
+    
+    Args:
+        executor: 新的进程池
+        futures: 与 tasks 一一对应的任务结果，原地替换
+        tasks: 全部任务
+        start: 从该下标开始检查
+    """
+    for index in range(start, len(tasks)):
+        future = futures[index]
+        if future.done() and not future.cancelled() and future.exception() is None:
+            continue
+        futures[index] = executor.submit(_extract_single_pdf, tasks[index])
+
+
 @cli.command()
 @click.argument('input_dir', type=click.Path(exists=True, file_okay=False, path_type=Path))
 @click.option(
@@ -144,23 +199,39 @@ def extract(
 @click.option(
     '--force', 
     is_flag=True,
-    help='强制覆盖已存在的输出文件'
+    help='忽略处理清单，重新处理全部文件'
 )
 @click.option(
     '--max-files', '-n',
     type=int,
     help='最大处理文件数量，用于测试'
 )
+@click.option(
+    '--lazy',
+    is_flag=True,
+    help='按需解析：快速扫描页眉定位权利要求书，只完整解析相关页面'
+)
+@click.option(
+    '--workers', '-j',
+    type=click.IntRange(min=1),
+    default=1,
+    help='并行处理的进程数，默认为 1（串行）'
+)
 def batch(
     input_dir: Path,
     output_dir: Path,
     format: str,
     force: bool,
-    max_files: Optional[int]
+    max_files: Optional[int],
+    lazy: bool,
+    workers: int
 ) -> None:
     """
     批量处理目录中的所有PDF文件。
     
+    输出目录中的处理清单记录了每个PDF的内容哈希、工具版本和输出文件，
+    重新运行时跳过内容、版本和参数均未变化且输出仍存在的文件。
+    
     INPUT_DIR: 包含PDF文件的输入目录
     """
     logger = logging.getLogger(__name__)
@@ -186,38 +257,65 @@ def batch(
         failed_count = 0
         skipped_count = 0
         
-        # 批量处理
-        with click.progressbar(pdf_files, label='批量处理进度') as bar:
-            for pdf_file in bar:
-                try:
-                    # 检查输出文件是否已存在
-                    from tdt.utils.file_utils import get_output_filename
-                    output_filename = get_output_filename(pdf_file, format)
-                    output_file = output_dir / output_filename
-                    
-                    if output_file.exists() and not force:
+        # 先在主进程中按处理清单筛出需要跳过的文件，其余文件交给工作进程
+        manifest = ProcessingManifest.for_output_dir(output_dir)
+        manifest_params = {"format": format, "lazy": lazy}
+        skipped_files = set()
+        tasks = []
+        for pdf_file in pdf_files:
+            if not force and manifest.is_current("extract", pdf_file, params=manifest_params):
+                skipped_files.add(pdf_file)
+            else:
+                tasks.append((str(pdf_file), str(output_dir), format, lazy))
+        
+        executor = None
+        futures: List[Future] = []
+        if workers > 1 and len(tasks) > 1:
+            click.echo(f"并行进程数: {workers}")
+            executor = ProcessPoolExecutor(max_workers=workers)
+            futures = [executor.submit(_extract_single_pdf, task) for task in tasks]
+        
+        # 批量处理，按提交顺序取结果，保证进度输出与文件顺序一致
+        task_index = 0
+        try:
+            with click.progressbar(pdf_files, label='批量处理进度') as bar:
+                for pdf_file in bar:
+                    if pdf_file in skipped_files:
                         skipped_count += 1
-                        click.echo(f"\n⏭️  跳过已存在的文件: {pdf_file.name}")
+                        click.echo(f"\n⏭️  跳过未变化的文件: {pdf_file.name}")
                         continue
                     
-                    # 处理文件
-                    result_path = extract_claims_from_pdf(
-                        str(pdf_file),
-                        str(output_dir),
-                        format
-                    )
+                    if executor is None:
+                        status, detail = _extract_single_pdf(tasks[task_index])
+                    else:
+                        try:
+                            status, detail = futures[task_index].result()
+                        except BrokenProcessPool as e:
+                            # 工作进程异常退出（如内存不足）会使整个进程池失效：
+                            # 当前文件记为失败，其余未完成的文件提交到新的进程池继续处理
+                            status, detail = "failed", f"工作进程异常退出: {e}"
+                            executor.shutdown(cancel_futures=True)
+                            executor = ProcessPoolExecutor(max_workers=workers)
+                            _resubmit_unfinished(executor, futures, tasks, task_index + 1)
+                    task_index += 1
                     
-                    if result_path:
+                    if status == "success":
                         success_count += 1
+                        manifest.record("extract", pdf_file, [detail], params=manifest_params)
                         click.echo(f"\n✅ 成功处理: {pdf_file.name}")
-                    else:
+                    elif status == "not_found":
                         failed_count += 1
+                        # 未找到权利要求书也是确定的结果，文件不变时无需重试
+                        manifest.record("extract", pdf_file, [], params=manifest_params,
+                                        info={"claims_found": False})
                         click.echo(f"\n⚠️  未找到权利要求书: {pdf_file.name}")
-                        
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"处理文件 {pdf_file} 失败: {e}")
-                    click.echo(f"\n❌ 处理失败: {pdf_file.name} - {e}")
+                    else:
+                        failed_count += 1
+                        click.echo(f"\n❌ 处理失败: {pdf_file.name} - {detail}")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            manifest.save()
         
         # 显示最终统计
         click.echo(f"\n📊 处理完成:")
@@ -0,0 +1,184 @@
+"""
+多专利流水线命令行工具
+
+一次运行完成目录中所有专利的PDF提取、序列处理和规则生成。
+"""
+
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import click
+from dotenv import load_dotenv
+
+# 加载 .env 文件中的环境变量
+load_dotenv()
+
+from .core.claims_splitter import DEFAULT_CHUNK_TOKEN_BUDGET
+from .core.pipeline import DEFAULT_QUEUE_SIZE, PatentJob, PatentPipeline
+
+
+@click.group()
+@click.option('--verbose', '-v', is_flag=True, help='启用详细日志输出')
+def cli(verbose: bool):
+    """TDT专利流水线工具"""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+@cli.command()
+@click.argument('pdf_dir', type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option('--sequences', '-s', 'sequence_dir',
+              type=click.Path(exists=True, file_okay=False, path_type=Path),
+              help='序列表目录，按文件名与PDF匹配（默认与PDF目录相同）')
+@click.option('--rules-file', '-r', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='现有规则JSON文件')
+@click.option('--output-dir', '-o', type=click.Path(path_type=Path),
+              default=Path('output'), show_default=True,
+              help='输出根目录（markdowns/、sequences/、strategy/）')
+@click.option('--api-key', type=str, help='Qwen API密钥（可从环境变量QWEN_API_KEY读取）')
+@click.option('--model', default='qwen3-max-preview', help='使用的Qwen模型')
+@click.option('--workers', '-j', type=click.IntRange(min=1), default=1, show_default=True,
+              help='PDF提取和序列处理的进程数')
+@click.option('--llm-workers', type=click.IntRange(min=1), default=2, show_default=True,
+              help='同时进行规则生成的专利数')
+@click.option('--concurrency', type=click.IntRange(min=1), default=4, show_default=True,
+              help='单个专利分段处理时同时分析的块数上限')
+@click.option('--queue-size', type=click.IntRange(min=1), default=DEFAULT_QUEUE_SIZE,
+              show_default=True, help='阶段之间队列的容量')
+@click.option('--lazy', is_flag=True, help='按需解析PDF，只完整提取权利要求书所在页面')
+@click.option('--export-markdown', is_flag=True, help='同时导出Markdown格式规则文档')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path),
+              default=Path('.cache/llm'), show_default=True, help='LLM响应缓存目录')
+@click.option('--no-cache', is_flag=True, help='不读写LLM响应缓存，强制重新调用API')
+@click.option('--rpm', type=click.FloatRange(min=0, min_open=True),
+              help='每分钟请求数上限（按API配额设置，默认不限）')
+@click.option('--tpm', type=click.FloatRange(min=0, min_open=True),
+              help='每分钟令牌数上限（按API配额设置，默认不限）')
+@click.option('--chunk-tokens', type=click.IntRange(min=1000),
+              default=DEFAULT_CHUNK_TOKEN_BUDGET, show_default=True,
+              help='分段处理时每个请求的输入令牌预算')
+@click.option('--prompt-cache', is_flag=True,
+              help='为各块共用的提示前缀显式启用服务端上下文缓存（前缀需不少于1024个令牌）')
+@click.option('--report', type=click.Path(dir_okay=False, path_type=Path),
+              help='将运行报告（含各阶段吞吐统计）写入JSON文件')
+@click.option('--force', is_flag=True, help='忽略处理清单，重新处理全部专利')
+def pipeline(pdf_dir: Path, sequence_dir: Optional[Path], rules_file: Optional[Path],
+             output_dir: Path, api_key: Optional[str], model: str, workers: int,
+             llm_workers: int, concurrency: int, queue_size: int, lazy: bool,
+             export_markdown: bool, cache_dir: Path, no_cache: bool,
+             rpm: Optional[float], tpm: Optional[float], chunk_tokens: int, prompt_cache: bool,
+             report: Optional[Path], force: bool):
+    """
+    批量运行专利流水线：PDF提取 → 权利要求书解析 → 序列处理 → 规则生成
+
+    输出目录中的处理清单记录各阶段的输入哈希、版本和参数，
+    重新运行时只处理新增或有变化的专利。
+
+    PDF_DIR: 包含专利PDF的目录
+    """
+    try:
+        from .core.data_loader import DataLoader
+        from .core.llm_cache import LLMResponseCache
+        from .core.manifest import ProcessingManifest
+        from .core.rate_limiter import RateLimiter
+        from .core.rule_generator import IntelligentRuleGenerator
+
+        if not api_key:
+            api_key = os.getenv('QWEN_API_KEY') or os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            click.echo("⚠️  未提供API密钥，使用演示模式")
+
+        jobs = PatentPipeline.discover_jobs(pdf_dir, sequence_dir)
+        if not jobs:
+            click.echo(f"在目录 {pdf_dir} 中没有找到PDF文件")
+            return
+
+        unmatched = [job for job in jobs if job.sequence_path is None]
+        click.echo(f"🧬 发现 {len(jobs)} 个专利，{len(jobs) - len(unmatched)} 个匹配到序列文件")
+        for job in unmatched:
+            click.echo(f"   ⚠️  未找到序列文件: {job.pdf_path.name}")
+
+        existing_rules = DataLoader().load_existing_rules(rules_file) if rules_file else None
+        cache = None if no_cache else LLMResponseCache(cache_dir)
+        rate_limiter = RateLimiter(rpm, tpm) if rpm or tpm else None
+        generator = IntelligentRuleGenerator.create_with_qwen(
+            api_key=api_key, model=model, max_concurrency=concurrency,
+            cache=cache, rate_limiter=rate_limiter, chunk_token_budget=chunk_tokens,
+            prompt_cache=prompt_cache
+        )
+
+        patent_pipeline = PatentPipeline(
+            generator, output_dir,
+            existing_rules=existing_rules,
+            cpu_workers=workers,
+            llm_workers=llm_workers,
+            queue_size=queue_size,
+            lazy=lazy,
+            export_markdown=export_markdown,
+            manifest=ProcessingManifest.for_output_dir(output_dir),
+            force=force
+        )
+
+        def on_complete(job: PatentJob) -> None:
+            if job.skipped:
+                click.echo(f"⏭️  {job.patent_id}: 输入未变化，已跳过")
+            elif job.succeeded:
+                click.echo(f"✅ {job.patent_id}: {len(job.result.protection_rules)} 条规则")
+            else:
+                click.echo(f"❌ {job.patent_id} [{job.failed_stage}]: {job.error}")
+
+        try:
+            result = patent_pipeline.run(jobs, on_complete=on_complete)
+        finally:
+            generator.llm_agent.close()
+
+        click.echo("")
+        click.echo("📊 流水线完成:")
+        skipped_count = sum(1 for job in result.jobs if job.skipped)
+        click.echo(f"  成功: {len(result.succeeded) - skipped_count}")
+        click.echo(f"  跳过: {skipped_count}")
+        click.echo(f"  失败: {len(result.failed)}")
+        click.echo(f"  总耗时: {result.elapsed_seconds:.1f} 秒")
+        click.echo("")
+        click.echo("⏱️  各阶段统计:")
+        for stage in result.stages:
+            click.echo(
+                f"  {stage.name:<10} 处理 {stage.processed:>4}  失败 {stage.failed:>3}  "
+                f"{stage.throughput(result.elapsed_seconds):7.2f} 个/分钟  "
+                f"忙碌 {stage.busy_seconds:7.1f}s  利用率 {stage.utilization(result.elapsed_seconds):.0%}"
+            )
+        if cache is not None:
+            cache_stats = cache.stats()
+            click.echo(f"  LLM缓存: 命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}")
+        usage = generator.llm_agent.usage_stats
+        if usage["requests"]:
+            click.echo(f"  输入令牌: {usage['prompt_tokens']}（上下文缓存命中 {usage['cached_tokens']}）")
+
+        if report:
+            report.parent.mkdir(parents=True, exist_ok=True)
+            with open(report, 'w', encoding='utf-8') as f:
+                json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+            click.echo(f"📁 运行报告: {report}")
+
+        if result.failed:
+            sys.exit(1)
+
+    except Exception as e:
+        click.echo(f"❌ 流水线运行失败: {e}", err=True)
+        sys.exit(1)
+
+
+def main() -> None:
+    """主函数入口点"""
+    cli()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,7 @@ from dotenv import load_dotenv
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
+from tdt.core.claims_splitter import DEFAULT_CHUNK_TOKEN_BUDGET
 from tdt.core.excel_converter import ExcelToJsonConverter
 
 logger = logging.getLogger(__name__)
@@ -166,10 +167,33 @@ def analyze_rules(json_file: Path):
 @click.option('--api-key', type=str, help='Qwen API密钥（可从环境变量QWEN_API_KEY读取）')
 @click.option('--model', default='qwen3-max-preview', help='使用的Qwen模型')
 @click.option('--export-markdown', is_flag=True, help='同时导出Markdown格式')
+@click.option('--concurrency', type=click.IntRange(min=1), default=4, show_default=True,
+              help='分段处理时同时分析的块数上限')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path),
+              default=Path('.cache/llm'), show_default=True, help='LLM响应缓存目录')
+@click.option('--cache-ttl', type=float, default=30.0, show_default=True,
+              help='缓存有效期（天）')
+@click.option('--no-cache', is_flag=True, help='不读写LLM响应缓存，强制重新调用API')
+@click.option('--rpm', type=click.FloatRange(min=0, min_open=True),
+              help='每分钟请求数上限（按API配额设置，默认不限）')
+@click.option('--tpm', type=click.FloatRange(min=0, min_open=True),
+              help='每分钟令牌数上限（按API配额设置，默认不限）')
+@click.option('--chunk-tokens', type=click.IntRange(min=1000),
+              default=DEFAULT_CHUNK_TOKEN_BUDGET, show_default=True,
+              help='分段处理时每个请求的输入令牌预算')
+@click.option('--prompt-cache', is_flag=True,
+              help='为各块共用的提示前缀显式启用服务端上下文缓存（前缀需不少于1024个令牌）')
+@click.option('--force', is_flag=True, help='输入未变化时也重新生成规则')
 def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
-                  output_dir: Path, api_key: str, model: str, export_markdown: bool):
+                  output_dir: Path, api_key: str, model: str, export_markdown: bool,
+                  concurrency: int, cache_dir: Path, cache_ttl: float, no_cache: bool,
+                  rpm: Optional[float], tpm: Optional[float], chunk_tokens: int,
+                  prompt_cache: bool, force: bool):
     """使用LLM生成专利保护规则
     
+    三个输入文件、模型和工具版本均未变化且输出仍存在时跳过生成
+    （记录在输出目录的处理清单中）。
+    
     CLAIMS_FILE: 权利要求书Markdown文件
     SEQUENCE_FILE: 标准化序列JSON文件  
     RULES_FILE: 现有规则JSON文件
@@ -178,12 +202,32 @@ def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
     import json
     
     try:
+        from .core.llm_cache import LLMResponseCache
+        from .core.manifest import ProcessingManifest
+        from .core.rate_limiter import RateLimiter
         from .core.rule_generator import IntelligentRuleGenerator
         
+        manifest = ProcessingManifest.for_output_dir(output_dir)
+        manifest_inputs = [sequence_file, rules_file]
+        manifest_params = {
+            "model": model, "export_markdown": export_markdown, "chunk_tokens": chunk_tokens
+        }
+        if not force and manifest.is_current(
+                "rules", claims_file, manifest_inputs, params=manifest_params):
+            click.echo("⏭️  输入文件和参数自上次生成后未变化，跳过规则生成（使用 --force 重新生成）")
+            for output_file in manifest.outputs("rules", claims_file):
+                click.echo(f"  {output_file}")
+            return
+        
         # 从环境变量读取API密钥（如果未通过参数提供）
         if not api_key:
             api_key = os.getenv('QWEN_API_KEY') or os.getenv('OPENAI_API_KEY')
         
+        cache = None if no_cache else LLMResponseCache(
+            cache_dir, ttl_seconds=cache_ttl * 24 * 3600
+        )
+        rate_limiter = RateLimiter(rpm, tpm) if rpm or tpm else None
+        
         click.echo(f"🧬 开始生成专利保护规则")
         click.echo(f"权利要求书: {claims_file}")
         click.echo(f"序列文件: {sequence_file}")
@@ -192,7 +236,11 @@ def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
         
         # 创建规则生成器
         if api_key:
-            generator = IntelligentRuleGenerator.create_with_qwen(api_key=api_key, model=model)
+            generator = IntelligentRuleGenerator.create_with_qwen(
+                api_key=api_key, model=model, max_concurrency=concurrency, cache=cache,
+                rate_limiter=rate_limiter, chunk_token_budget=chunk_tokens,
+                prompt_cache=prompt_cache
+            )
             # 测试连接
             click.echo("🔗 测试LLM连接...")
             if not generator.llm_agent.test_connection():
@@ -201,7 +249,10 @@ def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
             click.echo("✅ LLM连接成功")
         else:
             click.echo("⚠️  未提供API密钥，使用演示模式")
-            generator = IntelligentRuleGenerator.create_with_qwen(model=model)
+            generator = IntelligentRuleGenerator.create_with_qwen(
+                model=model, max_concurrency=concurrency, cache=cache,
+                chunk_token_budget=chunk_tokens, prompt_cache=prompt_cache
+            )
         
         # 生成规则
         click.echo("🔍 分析专利数据...")
@@ -237,6 +288,21 @@ def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
             click.echo("📝 导出简化Markdown格式文档...")
             generator.export_to_markdown(result, str(md_output), simplified_data)
         
+        generator.llm_agent.close()
+        
+        # 演示模式的结果不记录，配置API密钥后可直接重新生成；
+        # 部分分析块失败时清除条目，下次运行补齐缺失的权利要求
+        failed_chunks = (result.analysis_summary or {}).get("failed_chunks", 0)
+        if failed_chunks:
+            click.echo(f"⚠️ {failed_chunks}个分析块失败，结果未记录到增量清单，下次运行将重新生成")
+            manifest.discard("rules", claims_file)
+            manifest.save()
+        elif not generator.llm_agent.demo_mode:
+            output_files = [json_output] + ([md_output] if export_markdown else [])
+            manifest.record("rules", claims_file, output_files, manifest_inputs,
+                            params=manifest_params)
+            manifest.save()
+        
         # 显示结果摘要
         click.echo("")
         click.echo("✅ 规则生成完成！")
@@ -246,11 +312,23 @@ def generate_rules(claims_file: Path, sequence_file: Path, rules_file: Path,
         click.echo(f"  复杂度级别: {result.complexity_analysis.complexity_level}")
         click.echo(f"  分析置信度: {result.analysis_confidence:.2%}")
         click.echo(f"  回避策略数: {len(result.avoidance_strategies)}")
+        payload_tokens = (result.analysis_summary or {}).get("payload_tokens")
+        if payload_tokens:
+            click.echo(
+                f"  分析数据令牌: {payload_tokens['verbose_tokens']} → "
+                f"{payload_tokens['compact_tokens']}（紧凑格式）"
+            )
         click.echo("")
         click.echo(f"📁 输出文件:")
         click.echo(f"  JSON规则: {json_output}")
         if export_markdown:
             click.echo(f"  Markdown文档: {md_output}")
+        if cache is not None:
+            cache_stats = cache.stats()
+            click.echo(f"  LLM缓存: 命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}")
+        usage = generator.llm_agent.usage_stats
+        if usage["requests"]:
+            click.echo(f"  输入令牌: {usage['prompt_tokens']}（上下文缓存命中 {usage['cached_tokens']}）")
         
     except Exception as e:
         click.echo(f"❌ 规则生成失败: {e}", err=True)
@@ -291,6 +369,197 @@ def test_llm(api_key: str, model: str):
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('candidates_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('rules_files', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--sequences', '-s', 'sequence_files', multiple=True, required=True,
+              type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='野生型序列文件（tdt-seq输出的JSON或FASTA），可重复指定')
+@click.option('--default-wild-type', type=str,
+              help='规则引用的野生型无法解析时使用的序列ID')
+@click.option('--identity-mode', type=click.Choice(['alignment', 'positional']),
+              default='alignment', show_default=True,
+              help='同一性计算方式：全局比对（支持插入/缺失）或按位置比较')
+@click.option('--workers', '-j', type=click.IntRange(min=1), default=1, show_default=True,
+              help='序列比对使用的进程数')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, path_type=Path),
+              help='筛查报告JSON输出路径')
+def screen(candidates_file: Path, rules_files: tuple, sequence_files: tuple,
+           default_wild_type: Optional[str], identity_mode: str, workers: int,
+           output: Optional[Path]):
+    """使用保护规则批量筛查候选序列
+    
+    CANDIDATES_FILE: 候选变体FASTA文件
+    RULES_FILES: 一个或多个规则JSON文件
+    """
+    import json
+    from datetime import datetime
+    
+    try:
+        from .core.alignment import AlignmentIdentityService
+        from .core.rule_matcher import RuleMatcher, load_wild_type_sequences
+        
+        aligner = None
+        if identity_mode == 'alignment':
+            aligner = AlignmentIdentityService(max_workers=workers)
+        
+        wild_types = load_wild_type_sequences(sequence_files)
+        matcher = RuleMatcher(wild_types, default_wild_type=default_wild_type,
+                              aligner=aligner)
+        for rules_file in rules_files:
+            matcher.load_rules(rules_file)
+        
+        click.echo(f"🧬 开始筛查候选序列: {candidates_file}")
+        click.echo(f"  规则文件: {len(rules_files)} 个")
+        click.echo(f"  可用规则: {len(matcher.active_rules)} / {len(matcher.rules)}")
+        
+        results = []
+        hit_count = 0
+        try:
+            for result in matcher.screen_fasta(candidates_file):
+                results.append(result.to_dict())
+                if result.hits:
+                    hit_count += 1
+                    click.echo(f"⚠️  {result.candidate_id}: 命中 {len(result.hits)} 条规则 "
+                               f"({', '.join(result.patents)})")
+        finally:
+            if aligner is not None:
+                aligner.close()
+        
+        click.echo(f"\n📊 筛查完成:")
+        click.echo(f"  候选序列: {len(results)}")
+        click.echo(f"  命中规则的序列: {hit_count}")
+        click.echo(f"  未命中的序列: {len(results) - hit_count}")
+        if aligner is not None:
+            click.echo(f"  序列比对: {aligner.stats['aligned']} 次 "
+                       f"(阈值剪枝 {aligner.stats['pruned']}，"
+                       f"无需比对 {aligner.stats['exact_without_alignment']})")
+        
+        unsupported = matcher.unsupported_rules
+        if unsupported:
+            click.echo(f"\n⏭️  未参与筛查的规则: {len(unsupported)}")
+            for rule in unsupported[:10]:
+                click.echo(f"  {rule.rule_id}: {rule.error}")
+            if len(unsupported) > 10:
+                click.echo(f"  ... 还有 {len(unsupported) - 10} 条")
+        
+        if output:
+            report = {
+                "candidates_file": str(candidates_file),
+                "rules_files": [str(path) for path in rules_files],
+                "screening_timestamp": datetime.now().isoformat(),
+                "identity_mode": identity_mode,
+                "total_candidates": len(results),
+                "candidates_with_hits": hit_count,
+                "rules": [rule.to_dict() for rule in matcher.rules],
+                "results": results
+            }
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            click.echo(f"\n📁 筛查报告: {output}")
+        
+    except Exception as e:
+        click.echo(f"❌ 筛查失败: {e}", err=True)
+        sys.exit(1)
+
+
+@cli.group()
+def store():
+    """本地规则库：导入规则文件并跨专利查询"""
+    pass
+
+
+@store.command('ingest')
+@click.argument('paths', nargs=-1, required=True,
+                type=click.Path(exists=True, path_type=Path))
+@click.option('--db', type=click.Path(dir_okay=False, path_type=Path),
+              default=Path('output/rules.db'), show_default=True, help='规则库文件')
+@click.option('--force', is_flag=True, help='文件内容未变化时也重新导入')
+def store_ingest(paths: tuple, db: Path, force: bool):
+    """导入规则JSON文件（generate-rules 或 convert-excel 的输出）
+    
+    PATHS: 规则文件或目录（递归导入其中的 *_rules.json）
+    """
+    try:
+        from .core.rule_store import RuleStore
+        
+        with RuleStore(db) as rule_store:
+            results = rule_store.ingest(paths, force=force)
+            stats = rule_store.stats()
+        
+        imported = [r for r in results if not r.skipped]
+        click.echo(f"✅ 导入完成: {len(imported)} 个文件，{sum(r.rule_count for r in imported)} 条规则")
+        skipped = len(results) - len(imported)
+        if skipped:
+            click.echo(f"⏭️  内容未变化，跳过 {skipped} 个文件")
+        click.echo(f"📊 规则库: {stats['rules']} 条规则，{stats['patents']} 个专利，"
+                   f"{stats['wild_types']} 个野生型")
+        click.echo(f"📁 {db}")
+        
+    except Exception as e:
+        click.echo(f"❌ 导入失败: {e}", err=True)
+        sys.exit(1)
+
+
+@store.command('query')
+@click.option('--db', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              default=Path('output/rules.db'), show_default=True, help='规则库文件')
+@click.option('--patent', '-p', help='专利号')
+@click.option('--wild-type', '-w', help='野生型（如 SEQ_ID_NO_1 或 ZaTdT）')
+@click.option('--rule-type', '-t', help='规则类型')
+@click.option('--position', type=click.IntRange(min=1), help='涉及的突变位置')
+@click.option('--limit', type=click.IntRange(min=1), help='最多显示的规则数')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, path_type=Path),
+              help='将查询结果写入JSON文件')
+def store_query(db: Path, patent: Optional[str], wild_type: Optional[str],
+                rule_type: Optional[str], position: Optional[int], limit: Optional[int],
+                output: Optional[Path]):
+    """按专利号、野生型、规则类型和突变位置查询规则
+    
+    不指定条件时显示规则库统计信息。
+    """
+    import json
+    import time
+    
+    try:
+        from .core.rule_store import RuleStore
+        
+        with RuleStore(db) as rule_store:
+            if not any([patent, wild_type, rule_type, position]):
+                stats = rule_store.stats()
+                click.echo(f"📊 规则库: {db}")
+                click.echo(f"  规则文件: {stats['sources']}")
+                click.echo(f"  规则数: {stats['rules']}")
+                click.echo(f"  专利数: {stats['patents']}")
+                click.echo(f"  野生型数: {stats['wild_types']}")
+                click.echo(f"\n🏷️ 规则类型分布:")
+                for name, count in stats['rule_types'].items():
+                    click.echo(f"  {name}: {count}")
+                return
+            
+            start = time.perf_counter()
+            rules = rule_store.query(patent, wild_type, rule_type, position, limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        patents = sorted({rule.patent_number for rule in rules if rule.patent_number})
+        click.echo(f"🔍 找到 {len(rules)} 条规则，涉及 {len(patents)} 个专利（{elapsed_ms:.1f} ms）")
+        for rule in rules:
+            click.echo(f"  [{rule.patent_number}] {rule.wild_type} {rule.rule_type}: "
+                       f"{rule.mutation_logic or rule.mutation or '-'}")
+        
+        if output:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump([rule.to_dict() for rule in rules], f, ensure_ascii=False, indent=2)
+            click.echo(f"\n📁 查询结果: {output}")
+        
+    except Exception as e:
+        click.echo(f"❌ 查询失败: {e}", err=True)
+        sys.exit(1)
+
+
 @cli.command()
 def info():
     """显示工具信息和使用说明"""
@@ -303,12 +572,16 @@ def info():
     click.echo("• 分析专利规则的模式和统计信息")
     click.echo("• 使用LLM从权利要求书中提取序列保护规则")
     click.echo("• 生成技术回避策略和复杂度分析")
+    click.echo("• 使用保护规则批量筛查候选变体序列")
+    click.echo("• 汇总规则到本地规则库并跨专利查询")
     click.echo("")
     click.echo("使用流程:")
     click.echo("1. 使用 'convert-excel' 转换Excel规则文件")
     click.echo("2. 使用 'test-llm' 测试LLM连接")
     click.echo("3. 使用 'generate-rules' 生成智能规则分析")
     click.echo("4. 使用 'analyze-rules' 分析现有规则模式")
+    click.echo("5. 使用 'screen' 筛查候选变体是否落入保护范围")
+    click.echo("6. 使用 'store ingest' / 'store query' 建立规则库并查询")
     click.echo("")
     click.echo("环境配置:")
     click.echo("• 设置环境变量 QWEN_API_KEY 或通过 --api-key 参数提供")
@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
+from .core.fasta_index import IndexedFastaReader, ensure_fasta_index, read_fasta_index
+from .core.manifest import ProcessingManifest
 from .core.sequence_processor import UnifiedSequenceProcessor
 from .models.format_models import SequenceFormat
 
@@ -52,24 +54,35 @@ def cli(ctx, verbose):
 @click.option('--output', '-o', type=click.Path(path_type=Path), 
               help='输出文件路径（默认在同目录生成.json文件）')
 @click.option('--format', '-f', 'output_format', default='json',
-              type=click.Choice(['json']), help='输出格式')
+              type=click.Choice(['json', 'jsonl']), help='输出格式（jsonl需配合--stream）')
 @click.option('--no-auto-detect', is_flag=True, 
               help='禁用自动格式检测')
-@click.option('--expected-format', type=click.Choice(['fasta', 'csv']),
+@click.option('--expected-format', type=click.Choice(['fasta', 'csv', 'st26']),
               help='指定预期输入格式')
 @click.option('--include-analysis/--no-analysis', default=True,
               help='是否包含序列分析信息')
 @click.option('--include-stats/--no-stats', default=True,
               help='是否包含统计信息')
+@click.option('--stream', is_flag=True,
+              help='流式处理：逐条解析并写出序列，适用于大文件')
+@click.option('--validate-models', is_flag=True,
+              help='解析时对每条记录执行完整的模型验证（较慢，用于排查数据问题）')
+@click.option('--index-fasta', is_flag=True,
+              help='同时在FASTA文件旁生成 .fai 索引，供 fetch 随机读取')
 @click.pass_context
 def process(ctx, input_file, output, output_format, no_auto_detect, 
-           expected_format, include_analysis, include_stats):
+           expected_format, include_analysis, include_stats, stream, validate_models,
+           index_fasta):
     """
     处理单个序列文件
     
     INPUT_FILE: 输入序列文件路径
     """
-    processor = UnifiedSequenceProcessor()
+    processor = UnifiedSequenceProcessor(validate_models=validate_models,
+                                         build_fasta_index=index_fasta)
+    
+    if output_format == 'jsonl' and not stream:
+        raise click.UsageError("jsonl 输出格式需要配合 --stream 使用")
     
     # 确定输出文件路径
     if not output:
@@ -88,7 +101,8 @@ def process(ctx, input_file, output, output_format, no_auto_detect,
             output_path=output,
             output_format=output_format,
             auto_detect_format=not no_auto_detect,
-            expected_format=expected_seq_format
+            expected_format=expected_seq_format,
+            stream=stream
         )
         
         # 显示处理结果摘要
@@ -194,26 +208,45 @@ def info(ctx, input_file):
 @click.argument('output_dir', type=click.Path(path_type=Path))
 @click.option('--pattern', default='*', help='文件匹配模式（默认: *）')
 @click.option('--format', '-f', 'output_format', default='json',
-              type=click.Choice(['json']), help='输出格式')
+              type=click.Choice(['json', 'jsonl']), help='输出格式（jsonl需配合--stream）')
 @click.option('--recursive', '-r', is_flag=True, help='递归处理子目录')
 @click.option('--no-auto-detect', is_flag=True, help='禁用自动格式检测')
-@click.option('--max-workers', type=int, help='最大并发数')
+@click.option('--max-workers', type=click.IntRange(min=1), help='最大并发数（默认串行处理）')
+@click.option('--executor', type=click.Choice(['thread', 'process']), default='thread',
+              show_default=True, help='并发方式：线程池或进程池')
+@click.option('--stream', is_flag=True,
+              help='流式处理：逐条解析并写出序列，适用于大文件')
+@click.option('--validate-models', is_flag=True,
+              help='解析时对每条记录执行完整的模型验证（较慢，用于排查数据问题）')
+@click.option('--force', is_flag=True, help='忽略处理清单，重新处理全部文件')
+@click.option('--index-fasta', is_flag=True,
+              help='同时在FASTA文件旁生成 .fai 索引，供 fetch 随机读取')
 @click.pass_context
 def batch(ctx, input_dir, output_dir, pattern, output_format, recursive, 
-          no_auto_detect, max_workers):
+          no_auto_detect, max_workers, executor, stream, validate_models, force,
+          index_fasta):
     """
     批量处理目录中的序列文件
     
+    输出目录中的处理清单记录了每个文件的内容哈希、处理器版本和输出，
+    重新运行时跳过未变化的文件。
+    
     INPUT_DIR: 输入目录路径
     OUTPUT_DIR: 输出目录路径
     """
-    processor = UnifiedSequenceProcessor()
+    if output_format == 'jsonl' and not stream:
+        raise click.UsageError("jsonl 输出格式需要配合 --stream 使用")
+    
+    processor = UnifiedSequenceProcessor(validate_models=validate_models,
+                                         build_fasta_index=index_fasta)
     
     try:
         click.echo(f"批量处理目录: {input_dir}")
         click.echo(f"输出目录: {output_dir}")
         click.echo(f"文件模式: {pattern}")
         click.echo(f"递归处理: {'是' if recursive else '否'}")
+        if max_workers and max_workers > 1:
+            click.echo(f"并发处理: {executor} x {max_workers}")
         
         with click.progressbar(length=100, label='处理进度') as bar:
             # 启动批量处理
@@ -224,7 +257,11 @@ def batch(ctx, input_dir, output_dir, pattern, output_format, recursive,
                 output_format=output_format,
                 auto_detect_format=not no_auto_detect,
                 recursive=recursive,
-                max_workers=max_workers
+                max_workers=max_workers,
+                executor=executor,
+                stream=stream,
+                manifest=ProcessingManifest.for_output_dir(output_dir),
+                force=force
             )
             bar.update(100)  # 由于我们无法实时更新进度，直接完成
         
@@ -327,6 +364,63 @@ def convert(ctx, input_file, output, pretty):
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('fasta_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.pass_context
+def index(ctx, fasta_file):
+    """
+    为FASTA文件生成 .fai 索引（与 samtools faidx 兼容）
+    
+    FASTA_FILE: FASTA文件路径
+    """
+    try:
+        fai_path = ensure_fasta_index(fasta_file)
+        entries = read_fasta_index(fai_path)
+        
+        click.echo(f"✅ 索引已生成: {fai_path}")
+        click.echo(f"   📊 序列数量: {len(entries)}")
+        click.echo(f"   📏 残基总数: {sum(entry.length for entry in entries)}")
+    
+    except Exception as e:
+        click.echo(f"❌ 索引生成失败: {e}", err=True)
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('fasta_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('seq_ids', nargs=-1, required=True)
+@click.option('--start', type=click.IntRange(min=0), default=0,
+              help='起始位置（从0开始，包含）')
+@click.option('--end', type=click.IntRange(min=0),
+              help='结束位置（不包含，默认到序列末尾）')
+@click.pass_context
+def fetch(ctx, fasta_file, seq_ids, start, end):
+    """
+    按序列ID从FASTA文件中随机读取序列，输出FASTA格式
+    
+    序列ID可以是头部行中的原始ID，也可以是 SEQ ID NO 的各种写法。
+    
+    FASTA_FILE: FASTA文件路径
+    SEQ_IDS: 一个或多个序列ID
+    """
+    try:
+        with IndexedFastaReader(fasta_file) as reader:
+            for seq_id in seq_ids:
+                name = reader.resolve(seq_id)
+                if name is None:
+                    click.echo(f"⚠️  未找到序列: {seq_id}", err=True)
+                    continue
+                
+                sequence = reader.fetch(name, start, end)
+                region = f":{start}-{start + len(sequence)}" if start or end is not None else ""
+                click.echo(f">{name}{region}")
+                click.echo(sequence)
+    
+    except Exception as e:
+        click.echo(f"❌ 读取失败: {e}", err=True)
+        sys.exit(1)
+
+
 @cli.command()
 def formats():
     """显示支持的序列格式信息"""
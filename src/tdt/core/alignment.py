@@ -0,0 +1,305 @@
+"""
+序列比对同一性计算
+
+基于 biopython 的 PairwiseAligner 计算含插入/缺失变体与野生型的序列同一性，
+并把候选序列映射到野生型编号上，用于评估规则中的 identity_logic 阈值和
+mutation_logic 位置条件。
+
+比对采用 BLOSUM62 替换矩阵和仿射空位罚分（开启 -10、延伸 -0.5），
+与 EMBOSS needle 的默认参数一致。同一性定义为：比对中相同残基的列数 /
+两条序列中较长者的长度。残基组成给出相同列数的上界，可在比对前剪枝。
+"""
+
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from Bio.Align import PairwiseAligner, substitution_matrices
+
+from .sequence_matrix import PAD_CODE, SequenceMatrix, encode_sequence
+
+logger = logging.getLogger(__name__)
+
+# 每个进程任务包含的序列数，平衡进程间通信开销与负载均衡
+ALIGNMENT_CHUNK_SIZE = 256
+
+# 比对打分参数
+SUBSTITUTION_MATRIX = "BLOSUM62"
+OPEN_GAP_SCORE = -10.0
+EXTEND_GAP_SCORE = -0.5
+
+# 映射到野生型编号后，被缺失的野生型位置所用的字符
+DELETION_CHAR = '-'
+
+# 替换矩阵中未收录的残基（如 U、O）按 X 参与打分
+_UNKNOWN_RESIDUE = 'X'
+
+_worker_aligner: Optional[PairwiseAligner] = None
+
+
+def create_identity_aligner() -> PairwiseAligner:
+    """
+    创建用于计算同一性的全局比对器
+
+    Returns:
+        PairwiseAligner: BLOSUM62 + 仿射空位罚分的全局比对器
+    """
+    return PairwiseAligner(
+        mode='global',
+        substitution_matrix=substitution_matrices.load(SUBSTITUTION_MATRIX),
+        open_gap_score=OPEN_GAP_SCORE,
+        extend_gap_score=EXTEND_GAP_SCORE
+    )
+
+
+def _for_scoring(aligner: PairwiseAligner, sequence: str) -> str:
+    """将替换矩阵中未收录的残基替换为 X，位置不变"""
+    alphabet = aligner.substitution_matrix.alphabet
+    if all(residue in alphabet for residue in sequence):
+        return sequence
+    return ''.join(residue if residue in alphabet else _UNKNOWN_RESIDUE for residue in sequence)
+
+
+def composition_bound(candidate: str, reference: str) -> int:
+    """
+    任意比对中相同残基列数的上界（两条序列各残基计数的较小值之和）
+
+    Args:
+        candidate: 候选序列
+        reference: 参考序列
+
+    Returns:
+        int: 相同残基列数上界
+    """
+    reference_counts = Counter(reference)
+    return sum(min(count, reference_counts[residue])
+               for residue, count in Counter(candidate).items())
+
+
+def ungapped_is_exact(candidate: str, reference: str) -> bool:
+    """
+    不引入空位的逐位对齐是否已达到相同残基列数的上界
+
+    此时直接采用逐位对齐，无需比对。只适用于等长序列：
+    长度不同时逐位对齐会把缺失的末端当作不存在，而不是缺失。
+
+    Args:
+        candidate: 候选序列
+        reference: 参考序列
+
+    Returns:
+        bool: 是否可以跳过比对
+    """
+    if len(candidate) != len(reference):
+        return False
+    positional = sum(1 for a, b in zip(candidate, reference) if a == b)
+    return positional == composition_bound(candidate, reference)
+
+
+def align_to_reference(aligner: PairwiseAligner, candidate: str,
+                       reference: str) -> Tuple[int, str]:
+    """
+    比对候选序列与参考序列
+
+    Args:
+        aligner: 比对器
+        candidate: 候选序列
+        reference: 参考序列
+
+    Returns:
+        Tuple[int, str]: (相同残基列数, 候选序列映射到参考序列编号后的序列)。
+        映射序列与参考序列等长，被缺失的位置为 DELETION_CHAR，插入的残基被丢弃
+    """
+    projected = [DELETION_CHAR] * len(reference)
+    if not candidate or not reference:
+        return 0, ''.join(projected)
+
+    alignment = aligner.align(_for_scoring(aligner, reference),
+                              _for_scoring(aligner, candidate))[0]
+    matches = 0
+    for (ref_start, ref_end), (cand_start, cand_end) in zip(*alignment.aligned):
+        segment = candidate[cand_start:cand_end]
+        projected[ref_start:ref_end] = segment
+        matches += sum(1 for a, b in zip(segment, reference[ref_start:ref_end]) if a == b)
+    return matches, ''.join(projected)
+
+
+def _align_chunk(task: Tuple[str, List[str]]) -> List[Tuple[int, str]]:
+    """
+    比对一批序列与参考序列，可在工作进程中执行
+
+    Args:
+        task: (参考序列, 候选序列列表)
+
+    Returns:
+        List[Tuple[int, str]]: 每条候选序列的 (相同残基列数, 映射序列)
+    """
+    global _worker_aligner
+    if _worker_aligner is None:
+        _worker_aligner = create_identity_aligner()
+
+    reference, candidates = task
+    return [align_to_reference(_worker_aligner, candidate, reference)
+            for candidate in candidates]
+
+
+class AlignmentIdentityService:
+    """批量比对同一性计算服务"""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 chunk_size: int = ALIGNMENT_CHUNK_SIZE):
+        """
+        初始化比对服务
+
+        Args:
+            max_workers: 比对进程数，None 或 1 表示在当前进程中计算
+            chunk_size: 每个进程任务包含的序列数
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.aligner = create_identity_aligner()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"aligned": 0, "pruned": 0, "exact_without_alignment": 0}
+
+    def __enter__(self) -> 'AlignmentIdentityService':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def align(self, candidate: str, reference: str) -> Tuple[float, str]:
+        """
+        比对单条序列与参考序列
+
+        Args:
+            candidate: 候选序列
+            reference: 参考序列
+
+        Returns:
+            Tuple[float, str]: (同一性百分比, 映射到参考序列编号后的候选序列)
+        """
+        length = max(len(candidate), len(reference))
+        if length == 0:
+            return 0.0, ''
+
+        if ungapped_is_exact(candidate, reference):
+            self.stats["exact_without_alignment"] += 1
+            matches = sum(1 for a, b in zip(candidate, reference) if a == b)
+            return matches * 100.0 / length, candidate
+
+        self.stats["aligned"] += 1
+        matches, projected = align_to_reference(self.aligner, candidate, reference)
+        return matches * 100.0 / length, projected
+
+    def identity(self, candidate: str, reference: str) -> float:
+        """
+        计算单条序列与参考序列的比对同一性
+
+        Args:
+            candidate: 候选序列
+            reference: 参考序列
+
+        Returns:
+            float: 同一性百分比（0-100）
+        """
+        return self.align(candidate, reference)[0]
+
+    def align_many(self, candidates: Sequence[str], reference: str) -> List[Tuple[int, str]]:
+        """
+        批量比对，序列较多且配置了多进程时分发到进程池
+
+        Args:
+            candidates: 候选序列
+            reference: 参考序列
+
+        Returns:
+            List[Tuple[int, str]]: (相同残基列数, 映射序列)，顺序与输入一致
+        """
+        self.stats["aligned"] += len(candidates)
+
+        if not self.max_workers or self.max_workers <= 1 or len(candidates) <= self.chunk_size:
+            return _align_chunk((reference, list(candidates)))
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        tasks = [
+            (reference, list(candidates[start:start + self.chunk_size]))
+            for start in range(0, len(candidates), self.chunk_size)
+        ]
+        aligned: List[Tuple[int, str]] = []
+        for chunk in self._executor.map(_align_chunk, tasks):
+            aligned.extend(chunk)
+        return aligned
+
+    def matrix_alignments(self, matrix: SequenceMatrix, reference: str,
+                          rows: Optional[np.ndarray] = None,
+                          threshold: Optional[float] = None,
+                          strict: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算序列矩阵中指定行与参考序列的比对同一性及编号映射
+
+        给定阈值时，先用残基组成上界排除不可能达到阈值的序列；
+        等长且逐位相同残基数等于上界的序列直接采用逐位对齐，无需比对。
+
+        Args:
+            matrix: 候选序列矩阵
+            reference: 参考序列
+            rows: 需要计算的行号，None 表示全部
+            threshold: 同一性阈值（百分比），None 表示不剪枝
+            strict: 阈值是否为严格大于
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+            float64 同一性数组，长度与矩阵行数相同，未计算或被剪枝的行为 NaN；
+            形状为 (矩阵行数, 参考序列长度) 的 uint8 映射矩阵，未计算的行为 PAD_CODE
+        """
+        identities = np.full(len(matrix), np.nan)
+        projected = np.full((len(matrix), len(reference)), PAD_CODE, dtype=np.uint8)
+        if rows is None:
+            rows = np.arange(len(matrix))
+        if len(rows) == 0:
+            return identities, projected
+
+        subset = matrix.take(rows)
+        denominator = np.maximum(subset.lengths, len(reference))
+        bound = subset.composition_bound(reference)
+        positional = subset.match_counts(reference)
+        candidates = np.arange(len(rows))
+
+        if threshold is not None:
+            bound_identity = bound * 100.0 / np.maximum(denominator, 1)
+            reachable = bound_identity > threshold if strict else bound_identity >= threshold
+            self.stats["pruned"] += int(np.count_nonzero(~reachable))
+            rows, candidates = rows[reachable], candidates[reachable]
+            denominator, bound, positional = (
+                denominator[reachable], bound[reachable], positional[reachable]
+            )
+
+        exact = (positional == bound) & (subset.lengths[candidates] == len(reference))
+        self.stats["exact_without_alignment"] += int(np.count_nonzero(exact))
+        if exact.any() and len(reference):
+            projected[rows[exact]] = subset.codes[candidates[exact], :len(reference)]
+
+        matches = positional.copy()
+        to_align = np.flatnonzero(~exact)
+        if len(to_align):
+            aligned = self.align_many(
+                [subset.sequence(candidates[index]) for index in to_align], reference
+            )
+            for index, (count, sequence) in zip(to_align, aligned):
+                matches[index] = count
+                if sequence:
+                    projected[rows[index]] = encode_sequence(sequence)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            identities[rows] = np.where(denominator > 0, matches * 100.0 / denominator, 0.0)
+        return identities, projected
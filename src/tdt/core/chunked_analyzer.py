@@ -3,6 +3,7 @@
 
 该模块实现了对权利要求书段落的详细分析，是智能分段处理架构的分析组件。
 """
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
@@ -10,9 +11,40 @@ import json
 
 from .claims_splitter import ClaimSegment
 from .llm_agent import LLMRuleAgent
+from ..agents.prompts import SYSTEM_PROMPT, format_chunk_data_for_llm
+from ..utils.text_utils import estimate_tokens, normalize_seq_id
 
 logger = logging.getLogger(__name__)
 
+# 每个权利要求的预计输出令牌数（提示要求每个权利要求生成1-3条规则）
+OUTPUT_TOKENS_PER_CLAIM = 400
+
+
+def build_sequence_index(sequence_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    建立序列编号到序列记录的精确匹配索引
+    
+    每条序列同时以原始ID和标准化的 SEQ_ID_NO_<n> 形式登记，
+    原始ID优先；同一标准化编号对应多条序列时保留第一条。
+    
+    Args:
+        sequence_data: 序列数据（SequenceProcessingResult.model_dump() 格式）
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 序列编号到序列记录的映射
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+    for seq in sequence_data.get("sequences", []):
+        seq_id = seq.get("sequence_id", "")
+        if seq_id:
+            index[seq_id] = seq
+    
+    for seq in sequence_data.get("sequences", []):
+        normalized = normalize_seq_id(seq.get("sequence_id", ""))
+        if normalized:
+            index.setdefault(normalized, seq)
+    return index
+
 
 @dataclass
 class ChunkAnalysisResult:
@@ -28,13 +60,21 @@ class ChunkAnalysisResult:
 class ChunkedAnalyzer:
     """分段专利分析器"""
     
-    def __init__(self, llm_agent: LLMRuleAgent):
+    def __init__(self, llm_agent: LLMRuleAgent, max_concurrency: int = 1):
+        """
+        Args:
+            llm_agent: LLM规则生成智能体
+            max_concurrency: 同时进行分析的块数上限，1表示顺序分析
+        """
         self.llm_agent = llm_agent
+        self.max_concurrency = max(1, max_concurrency)
         self.logger = logger
     
     def analyze_chunks(self, claim_chunks: List[List[ClaimSegment]], 
                       sequence_data: Dict[str, Any],
-                      existing_rules: List[Dict[str, Any]]) -> List[ChunkAnalysisResult]:
+                      existing_rules: List[Dict[str, Any]],
+                      max_concurrency: Optional[int] = None,
+                      patent_number: Optional[str] = None) -> List[ChunkAnalysisResult]:
         """
         分析权利要求书块
         
@@ -42,58 +82,104 @@ class ChunkedAnalyzer:
             claim_chunks: 权利要求书分块列表
             sequence_data: 序列数据
             existing_rules: 现有规则数据
+            max_concurrency: 本次分析的并发上限，默认使用初始化时的配置
+            patent_number: 专利号，写入所有块共用的提示前缀
             
         Returns:
-            List[ChunkAnalysisResult]: 分析结果列表
+            List[ChunkAnalysisResult]: 分析结果列表，与输入块顺序一致
         """
-        self.logger.info(f"开始分析{len(claim_chunks)}个权利要求书块")
-        
-        results = []
+        return self.llm_agent.run_sync(self.analyze_chunks_async(
+            claim_chunks, sequence_data, existing_rules, max_concurrency, patent_number
+        ))
+    
+    async def analyze_chunks_async(self, claim_chunks: List[List[ClaimSegment]], 
+                                  sequence_data: Dict[str, Any],
+                                  existing_rules: List[Dict[str, Any]],
+                                  max_concurrency: Optional[int] = None,
+                                  patent_number: Optional[str] = None) -> List[ChunkAnalysisResult]:
+        """
+        analyze_chunks 的异步版本
         
-        for chunk_id, chunk in enumerate(claim_chunks):
-            self.logger.info(f"分析块 {chunk_id + 1}/{len(claim_chunks)}: 包含权利要求 {[c.claim_number for c in chunk]}")
+        Args:
+            claim_chunks: 权利要求书分块列表
+            sequence_data: 序列数据
+            existing_rules: 现有规则数据
+            max_concurrency: 本次分析的并发上限，默认使用初始化时的配置
+            patent_number: 专利号，写入所有块共用的提示前缀
             
-            try:
-                result = self._analyze_single_chunk(
-                    chunk_id, chunk, sequence_data, existing_rules
-                )
-                results.append(result)
-                
-                # 记录分析进度
-                self.logger.info(f"块 {chunk_id + 1} 分析完成: 提取{len(result.extracted_rules)}条规则")
-                
-            except Exception as e:
-                self.logger.error(f"分析块 {chunk_id + 1} 失败: {e}")
-                # 创建错误结果
-                error_result = ChunkAnalysisResult(
-                    chunk_id=chunk_id,
-                    claim_numbers=[c.claim_number for c in chunk],
-                    extracted_rules=[],
-                    analysis_confidence=0.0,
-                    processing_time=0.0,
-                    error_message=str(e)
+        Returns:
+            List[ChunkAnalysisResult]: 分析结果列表，与输入块顺序一致
+        """
+        concurrency = max(1, max_concurrency or self.max_concurrency)
+        concurrency = min(concurrency, len(claim_chunks)) if claim_chunks else 1
+        
+        self.logger.info(f"开始分析{len(claim_chunks)}个权利要求书块（并发数: {concurrency}）")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        # 公共前缀和序列索引只构建一次，由所有块共享
+        prefix = self.build_prompt_prefix(existing_rules, patent_number)
+        sequence_index = build_sequence_index(sequence_data)
+        
+        async def analyze(chunk_id: int, chunk: List[ClaimSegment]) -> ChunkAnalysisResult:
+            async with semaphore:
+                return await self._analyze_chunk_safely(
+                    chunk_id, chunk, len(claim_chunks), sequence_index, prefix
                 )
-                results.append(error_result)
+        
+        # gather 按提交顺序返回结果，保证输出顺序与输入一致
+        results = await asyncio.gather(*(
+            analyze(chunk_id, chunk) for chunk_id, chunk in enumerate(claim_chunks)
+        ))
         
         self.logger.info(f"完成所有块分析，总计{sum(len(r.extracted_rules) for r in results)}条规则")
-        return results
+        return list(results)
+    
+    async def _analyze_chunk_safely(self, chunk_id: int,
+                                  chunk: List[ClaimSegment],
+                                  total_chunks: int,
+                                  sequence_index: Dict[str, Dict[str, Any]],
+                                  prefix: str) -> ChunkAnalysisResult:
+        """分析单个块，并将异常隔离为该块的错误结果"""
+        self.logger.info(f"分析块 {chunk_id + 1}/{total_chunks}: 包含权利要求 {[c.claim_number for c in chunk]}")
+        
+        try:
+            result = await self._analyze_single_chunk(
+                chunk_id, chunk, sequence_index, prefix
+            )
+            
+            # 记录分析进度
+            self.logger.info(f"块 {chunk_id + 1} 分析完成: 提取{len(result.extracted_rules)}条规则")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"分析块 {chunk_id + 1} 失败: {e}")
+            # 创建错误结果
+            return ChunkAnalysisResult(
+                chunk_id=chunk_id,
+                claim_numbers=[c.claim_number for c in chunk],
+                extracted_rules=[],
+                analysis_confidence=0.0,
+                processing_time=0.0,
+                error_message=str(e)
+            )
     
-    def _analyze_single_chunk(self, chunk_id: int, 
-                            chunk: List[ClaimSegment],
-                            sequence_data: Dict[str, Any],
-                            existing_rules: List[Dict[str, Any]]) -> ChunkAnalysisResult:
+    async def _analyze_single_chunk(self, chunk_id: int, 
+                                  chunk: List[ClaimSegment],
+                                  sequence_index: Dict[str, Dict[str, Any]],
+                                  prefix: str) -> ChunkAnalysisResult:
         """分析单个权利要求书块"""
         import time
         start_time = time.time()
         
         # 1. 准备分析数据
-        chunk_data = self._prepare_chunk_data(chunk, sequence_data)
+        chunk_data = self._prepare_chunk_data(chunk, sequence_index)
         
-        # 2. 构建针对块的专门提示
-        chunk_prompt = self._build_chunk_prompt(chunk, existing_rules)
+        # 2. 构建针对块的专门提示（接在公共前缀之后）
+        chunk_prompt = self._build_chunk_prompt(chunk, chunk_data)
         
         # 3. 调用LLM进行分析
-        analysis_result = self._call_llm_for_chunk(chunk_prompt, chunk_data)
+        analysis_result = await self._call_llm_for_chunk(prefix, chunk_prompt)
         
         # 4. 解析和验证结果
         extracted_rules = self._parse_chunk_result(analysis_result, chunk)
@@ -112,20 +198,21 @@ class ChunkedAnalyzer:
         )
     
     def _prepare_chunk_data(self, chunk: List[ClaimSegment], 
-                          sequence_data: Dict[str, Any]) -> Dict[str, Any]:
-        """准备块分析数据"""
+                          sequence_index: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """准备块分析数据，相关序列通过 build_sequence_index 建立的索引精确查找"""
         # 提取当前块中引用的序列
         all_seq_ids = set()
         for claim in chunk:
             all_seq_ids.update(claim.seq_id_references)
         
-        # 筛选相关序列数据
+        # 按引用的序列编号查找相关序列数据
         relevant_sequences = {}
-        if "sequences" in sequence_data:
-            for seq in sequence_data["sequences"]:
-                seq_id = seq.get("sequence_id", "")
-                if seq_id in all_seq_ids or any(sid in seq_id for sid in all_seq_ids):
-                    relevant_sequences[seq_id] = seq
+        for reference in sorted(all_seq_ids):
+            for key in (reference, normalize_seq_id(reference)):
+                seq = sequence_index.get(key) if key else None
+                if seq is not None:
+                    relevant_sequences[seq.get("sequence_id", key)] = seq
+                    break
         
         # 安全转换为JSON可序列化的字典
         claims_dict = []
@@ -153,24 +240,26 @@ class ChunkedAnalyzer:
             }
         }
     
-    def _build_chunk_prompt(self, chunk: List[ClaimSegment], 
-                          existing_rules: List[Dict[str, Any]]) -> str:
-        """构建针对块的专门提示"""
+    def build_prompt_prefix(self, existing_rules: List[Dict[str, Any]],
+                            patent_number: Optional[str] = None) -> str:
+        """
+        构建同一专利所有块共用的提示前缀
         
-        # 分析块的特征
-        complexity_scores = [c.complexity_score for c in chunk]
-        avg_complexity = sum(complexity_scores) / len(complexity_scores)
+        前缀只包含分析要求、输出格式、现有规则样本和专利级信息，
+        对同一专利的所有块逐字节相同，可命中服务端的上下文缓存。
         
+        Args:
+            existing_rules: 现有规则数据
+            patent_number: 专利号
+            
+        Returns:
+            str: 提示前缀
+        """
         # 提取现有规则的样本
         rule_examples = existing_rules[:3] if existing_rules else []
+        patent_context = f"- 专利号: {patent_number}\n" if patent_number else ""
         
-        prompt = f"""你是专利序列保护分析专家。现在需要分析一个包含{len(chunk)}个权利要求的专利块。
-
-## 当前分析块特征
-- 权利要求编号: {[c.claim_number for c in chunk]}
-- 平均复杂度: {avg_complexity:.2f}
-- 独立权利要求: {len([c for c in chunk if c.claim_type == "independent"])}个
-- 从属权利要求: {len([c for c in chunk if c.claim_type == "dependent"])}个
+        return f"""你是专利序列保护分析专家。下面给出分析要求和输出格式，最后是当前需要分析的权利要求块。
 
 ## 分析要求
 请对每个权利要求进行详细分析，识别：
@@ -182,7 +271,8 @@ class ChunkedAnalyzer:
 
 2. **逻辑表达式生成**
    - 使用数学逻辑操作符 (&, |, !, ())
-   - 标准突变格式 (Y178A/F186R)
+   - 标准突变格式 (Y178A/F186R)；长序列只给出首尾片段，权利要求涉及位置的
+     野生型残基见 residues_at_mutation_sites（位置 → 残基）
    - 序列同一性逻辑 (seq_identity >= X%)
 
 3. **规则输出格式**
@@ -208,45 +298,87 @@ class ChunkedAnalyzer:
 - 避免生成空洞的"analysis_completed"类型规则
 - 专注于序列保护范围，不要生成回避策略
 
-请开始分析："""
+## 专利信息
+{patent_context}- 说明: 同一专利的权利要求分多个块分析，每次只需输出当前块的规则
 
-        return prompt
+"""
     
-    def _call_llm_for_chunk(self, prompt: str, chunk_data: Dict[str, Any]) -> str:
-        """调用LLM分析块"""
-        try:
-            # 构建完整的提示文本
-            full_prompt = f"{prompt}\n\n## 分析数据\n{json.dumps(chunk_data, ensure_ascii=False, indent=2)}"
-            
-            # 调用LLM
-            response = self.llm_agent._call_llm(full_prompt)
-            
-            return response
-            
-        except Exception as e:
-            self.logger.error(f"LLM调用失败: {e}")
-            # 返回备用响应
-            return self._generate_fallback_response(chunk_data)
+    def _build_chunk_prompt(self, chunk: List[ClaimSegment],
+                            chunk_data: Dict[str, Any]) -> str:
+        """构建块提示中随块变化的部分（块特征和分析数据），接在公共前缀之后"""
+        
+        # 分析块的特征
+        complexity_scores = [c.complexity_score for c in chunk]
+        avg_complexity = sum(complexity_scores) / len(complexity_scores)
+        
+        return f"""## 当前分析块特征
+- 权利要求数: {len(chunk)}
+- 权利要求编号: {[c.claim_number for c in chunk]}
+- 平均复杂度: {avg_complexity:.2f}
+- 独立权利要求: {len([c for c in chunk if c.claim_type == "independent"])}个
+- 从属权利要求: {len([c for c in chunk if c.claim_type == "dependent"])}个
+
+## 分析数据
+{format_chunk_data_for_llm(chunk_data)}
+
+请开始分析："""
     
-    def _generate_fallback_response(self, chunk_data: Dict[str, Any]) -> str:
-        """生成备用响应"""
-        claims = chunk_data.get("claims", [])
-        rules = []
+    async def _call_llm_for_chunk(self, prefix: str, prompt: str) -> str:
+        """调用LLM分析块，调用失败时抛出异常，由调用方记录为该块的错误"""
+        return await self.llm_agent._call_llm_async(prompt, prefix=prefix)
+    
+    def estimate_chunk_tokens(self, chunk: List[ClaimSegment],
+                              sequence_data: Dict[str, Any],
+                              existing_rules: List[Dict[str, Any]],
+                              prefix: Optional[str] = None,
+                              sequence_index: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """
+        估算分析一个块的请求输入令牌数
         
-        for claim in claims:
-            # 基于权利要求数据生成基础规则
-            rule = {
-                "wild_type": f"SEQ_ID_NO_{claim.get('claim_number', 1)}",
-                "rule": "conditional_protection",
-                "mutation": "待进一步分析",
-                "mutation_logic": "基于权利要求复杂度生成",
-                "identity_logic": "seq_identity >= 80%",
-                "statement": f"权利要求{claim.get('claim_number')}的保护规则（备用生成）",
-                "comment": "系统备用规则，需要人工审核"
-            }
-            rules.append(rule)
+        按实际发送的内容（系统提示、公共前缀、块特征、权利要求和相关序列）估算，
+        相关序列在块内去重，因此引用相同序列的权利要求放在一起更省令牌。
         
-        return json.dumps({"rules": rules}, ensure_ascii=False, indent=2)
+        Args:
+            chunk: 权利要求块
+            sequence_data: 序列数据
+            existing_rules: 现有规则
+            prefix: 已构建的公共前缀，为None时按现有规则构建
+            sequence_index: 已构建的序列索引，为None时按序列数据构建；
+                反复估算同一专利的块时应传入，避免重复建索引
+            
+        Returns:
+            int: 估算的输入令牌数
+        """
+        if prefix is None:
+            prefix = self.build_prompt_prefix(existing_rules)
+        if sequence_index is None:
+            sequence_index = build_sequence_index(sequence_data)
+        chunk_prompt = self._build_chunk_prompt(chunk, self._prepare_chunk_data(chunk, sequence_index))
+        return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prefix) + estimate_tokens(chunk_prompt)
+    
+    def payload_token_report(self, claim_chunks: List[List[ClaimSegment]],
+                             sequence_data: Dict[str, Any]) -> Dict[str, int]:
+        """
+        对比分析数据按完整JSON和紧凑格式发送时的令牌数
+        
+        Args:
+            claim_chunks: 权利要求书分块列表
+            sequence_data: 序列数据
+            
+        Returns:
+            Dict[str, int]: verbose_tokens（完整缩进JSON）和 compact_tokens（实际发送）
+        """
+        verbose_tokens = compact_tokens = 0
+        sequence_index = build_sequence_index(sequence_data)
+        for chunk in claim_chunks:
+            chunk_data = self._prepare_chunk_data(chunk, sequence_index)
+            verbose_tokens += estimate_tokens(json.dumps(chunk_data, ensure_ascii=False, indent=2))
+            compact_tokens += estimate_tokens(format_chunk_data_for_llm(chunk_data))
+        return {"verbose_tokens": verbose_tokens, "compact_tokens": compact_tokens}
+    
+    def max_claims_per_chunk(self) -> int:
+        """按单次请求的输出令牌上限计算每块最多的权利要求数"""
+        return max(1, self.llm_agent.sampling_params["max_tokens"] // OUTPUT_TOKENS_PER_CLAIM)
     
     def _parse_chunk_result(self, llm_response: str, 
                           chunk: List[ClaimSegment]) -> List[Dict[str, Any]]:
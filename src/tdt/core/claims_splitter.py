@@ -6,11 +6,14 @@
 """
 import re
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# 分段处理时每个请求的默认输入令牌预算
+DEFAULT_CHUNK_TOKEN_BUDGET = 16000
+
 
 @dataclass
 class ClaimSegment:
@@ -284,3 +287,100 @@ class ClaimsSplitter:
         
         self.logger.info(f"创建了{len(chunks)}个分析块")
         return chunks
+    
+    def group_dependent_claims(self, segments: List[ClaimSegment]) -> List[List[ClaimSegment]]:
+        """
+        按引用关系将权利要求分为族：从属权利要求与其引用的权利要求归入同一族
+        
+        只考虑引用编号更小且存在于segments中的权利要求，忽略自引用和无效引用。
+        
+        Args:
+            segments: 权利要求段落
+            
+        Returns:
+            List[List[ClaimSegment]]: 权利要求族，族内与族间均按编号排序
+        """
+        by_number = {segment.claim_number: segment for segment in segments}
+        parent = {number: number for number in by_number}
+        
+        def find(number: int) -> int:
+            while parent[number] != number:
+                parent[number] = parent[parent[number]]
+                number = parent[number]
+            return number
+        
+        for segment in segments:
+            for reference in segment.references:
+                if reference < segment.claim_number and reference in by_number:
+                    root_a, root_b = find(segment.claim_number), find(reference)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+        
+        families: Dict[int, List[ClaimSegment]] = {}
+        for number in sorted(by_number):
+            families.setdefault(find(number), []).append(by_number[number])
+        return list(families.values())
+    
+    def create_token_budget_chunks(self, segments: List[ClaimSegment],
+                                   token_budget: int,
+                                   estimate_tokens: Callable[[List[ClaimSegment]], int],
+                                   max_claims: Optional[int] = None) -> List[List[ClaimSegment]]:
+        """
+        按令牌预算创建用于LLM分析的块，尽量减少请求数
+        
+        从属权利要求与其引用的权利要求优先放在同一块中；单个权利要求族超出预算时
+        按编号顺序拆分为连续的几段。各族按估算令牌数从大到小依次放入第一个
+        放得下的块（首次适应递减），块内按权利要求编号排序。
+        
+        Args:
+            segments: 权利要求段落
+            token_budget: 每个请求的输入令牌预算
+            estimate_tokens: 估算一个块完整请求（含提示和分析数据）令牌数的函数
+            max_claims: 每块最多的权利要求数（受输出令牌上限约束），None 表示不限
+            
+        Returns:
+            List[List[ClaimSegment]]: 分析块列表，按首个权利要求编号排序
+        """
+        def fits(claims: List[ClaimSegment]) -> bool:
+            if max_claims is not None and len(claims) > max_claims:
+                return False
+            return estimate_tokens(claims) <= token_budget
+        
+        units: List[List[ClaimSegment]] = []
+        for family in self.group_dependent_claims(segments):
+            if fits(family):
+                units.append(family)
+                continue
+            
+            # 族超出预算，按编号顺序拆分，父权利要求总在其从属权利要求之前
+            current: List[ClaimSegment] = []
+            for segment in family:
+                if current and not fits(current + [segment]):
+                    units.append(current)
+                    current = []
+                current.append(segment)
+                if len(current) == 1 and not fits(current):
+                    self.logger.warning(
+                        f"权利要求{segment.claim_number}单独超出令牌预算{token_budget}，单独成块"
+                    )
+            if current:
+                units.append(current)
+        
+        chunks: List[List[ClaimSegment]] = []
+        for unit in sorted(units, key=estimate_tokens, reverse=True):
+            for chunk in chunks:
+                if fits(chunk + unit):
+                    chunk.extend(unit)
+                    break
+            else:
+                chunks.append(list(unit))
+        
+        for chunk in chunks:
+            chunk.sort(key=lambda segment: segment.claim_number)
+        chunks.sort(key=lambda chunk: chunk[0].claim_number)
+        
+        self.logger.info(
+            f"按令牌预算{token_budget}创建了{len(chunks)}个分析块"
+            f"（{len(segments)}个权利要求，{len(units)}个权利要求族/段）"
+        )
+        return chunks
@@ -14,6 +14,7 @@ from ..models.claims_models import (
     ClaimItem, ClaimsDocument, MutationPattern, SeqIdReference,
     SequenceClaimsMapping
 )
+from ..models.processing_models import ProcessingResult
 from ..models.sequence_record import SequenceProcessingResult
 
 logger = logging.getLogger(__name__)
@@ -60,32 +61,44 @@ class DataLoader:
             with open(md_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # 提取专利号
-            patent_number = self._extract_patent_number(content)
-            
-            # 解析权利要求条目
-            claims = self._parse_claims(content)
-            
-            # 为每个权利要求提取SEQ ID引用和突变模式
-            for claim in claims:
-                claim.seq_id_references = self.extract_seq_id_references(claim.content)
-                claim.mutation_patterns = self.identify_mutation_patterns(claim.content)
-                claim.technical_features = self._extract_technical_features(claim.content)
-            
-            document = ClaimsDocument(
-                patent_number=patent_number,
-                source_file=md_path,
-                total_claims=len(claims),
-                claims=claims
-            )
-            
-            logger.info(f"成功加载权利要求书: {patent_number}, 包含{len(claims)}个权利要求")
-            return document
+            return self.parse_claims_markdown(content, md_path)
             
         except Exception as e:
             logger.error(f"加载权利要求书失败: {e}")
             raise
     
+    def parse_claims_markdown(self, content: str, source_file: Path) -> ClaimsDocument:
+        """解析权利要求书Markdown内容
+        
+        Args:
+            content: Markdown文本
+            source_file: 内容对应的文件路径，仅用于记录来源
+            
+        Returns:
+            解析后的权利要求书文档
+        """
+        # 提取专利号
+        patent_number = self._extract_patent_number(content)
+        
+        # 解析权利要求条目
+        claims = self._parse_claims(content)
+        
+        # 为每个权利要求提取SEQ ID引用和突变模式
+        for claim in claims:
+            claim.seq_id_references = self.extract_seq_id_references(claim.content)
+            claim.mutation_patterns = self.identify_mutation_patterns(claim.content)
+            claim.technical_features = self._extract_technical_features(claim.content)
+        
+        document = ClaimsDocument(
+            patent_number=patent_number,
+            source_file=source_file,
+            total_claims=len(claims),
+            claims=claims
+        )
+        
+        logger.info(f"成功加载权利要求书: {patent_number}, 包含{len(claims)}个权利要求")
+        return document
+    
     def load_sequence_json(self, json_path: Path) -> SequenceProcessingResult:
         """加载标准化序列JSON文件
         
@@ -114,6 +127,23 @@ class DataLoader:
             logger.error(f"加载序列JSON失败: {e}")
             raise
     
+    def convert_processing_result(self, result: ProcessingResult) -> SequenceProcessingResult:
+        """将序列处理器的结果转换为规则生成使用的序列数据，无需经过JSON文件
+        
+        Args:
+            result: UnifiedSequenceProcessor.process_file 的处理结果（非流式）
+            
+        Returns:
+            序列处理结果对象
+            
+        Raises:
+            ValueError: 处理结果中未保留序列
+        """
+        if result.sequences_omitted:
+            raise ValueError("流式处理结果不包含序列，无法用于规则生成")
+        
+        return SequenceProcessingResult(**result.model_dump(mode='json'))
+    
     def load_existing_rules(self, json_path: Path) -> Dict:
         """加载现有规则JSON数据
         
@@ -6,8 +6,9 @@
 import logging
 import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
+from .parser import PDFParser
 from ..utils.file_utils import ensure_output_dir, get_output_filename
 from ..utils.text_utils import clean_text, normalize_text
 
@@ -53,6 +54,54 @@ class ClaimsExtractor:
             logger.warning("未找到权利要求书章节")
             return None
         
+        return self._build_claims_content(claims_pages)
+    
+    def extract_claims_lazy(self, parser: PDFParser, pdf_path: str) -> Optional[str]:
+        """
+        按需解析PDF并提取权利要求书内容。
+        
+        先用 parser.scan_headers 快速扫描页眉和页面开头定位权利要求书章节，
+        章节结束后立即停止扫描，再只对章节内的页面做完整文本提取。
+        适用于页数较多的专利PDF。
+        
+        Args:
+            parser: PDF解析器
+            pdf_path: PDF文件路径
+            
+        Returns:
+            权利要求书内容文本，如果未找到则返回 None
+        """
+        # 扫描过的页面保留下来，用于从页眉中识别专利号
+        scanned_pages: List[Dict] = []
+        
+        def _record(pages: Iterable[Dict]):
+            for page_data in pages:
+                scanned_pages.append(page_data)
+                yield page_data
+        
+        preview_pages = self._find_claims_pages(_record(parser.scan_headers(pdf_path)))
+        self._all_pages_data = scanned_pages
+        
+        if not preview_pages:
+            logger.warning("未找到权利要求书章节")
+            return None
+        
+        page_numbers = [page['page_number'] for page in preview_pages]
+        logger.debug(f"快速扫描 {len(scanned_pages)} 页，定位权利要求书页面: {page_numbers}")
+        
+        claims_pages = list(parser.iter_pages(pdf_path, page_numbers, include_bbox=False))
+        return self._build_claims_content(claims_pages)
+    
+    def _build_claims_content(self, claims_pages: List[Dict]) -> str:
+        """
+        合并并格式化权利要求书页面内容。
+        
+        Args:
+            claims_pages: 权利要求书页面数据列表
+            
+        Returns:
+            格式化后的权利要求书内容
+        """
         # 记录源页面信息供后续使用
         self._source_pages = [page['page_number'] for page in claims_pages]
         
@@ -65,12 +114,14 @@ class ClaimsExtractor:
         logger.info(f"成功提取权利要求书内容，共 {len(claims_pages)} 页")
         return formatted_content
     
-    def _find_claims_pages(self, pages_data: List[Dict]) -> List[Dict]:
+    def _find_claims_pages(self, pages_data: Iterable[Dict]) -> List[Dict]:
         """
         查找包含权利要求书的页面。
         
+        遇到章节结束即停止迭代，因此可以传入按需生成页面的迭代器。
+        
         Args:
-            pages_data: PDF页面数据列表
+            pages_data: PDF页面数据列表或迭代器
             
         Returns:
             权利要求书页面数据列表
@@ -334,10 +385,7 @@ class ClaimsExtractor:
         output_path = Path(output_dir) / output_filename
         
         # 准备最终内容
-        if output_format == "markdown":
-            final_content = self._prepare_markdown_content(claims_content, original_pdf_path)
-        else:
-            final_content = self._prepare_text_content(claims_content, original_pdf_path)
+        final_content = self.format_claims(claims_content, original_pdf_path, output_format)
         
         # 写入文件
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -346,6 +394,32 @@ class ClaimsExtractor:
         logger.info(f"权利要求书内容已保存到: {output_path}")
         return str(output_path)
     
+    def format_claims(
+        self,
+        claims_content: str,
+        original_pdf_path: str,
+        output_format: str = "markdown"
+    ) -> str:
+        """
+        生成权利要求书文件的完整内容（含文档信息头），不写入文件。
+        
+        Args:
+            claims_content: 权利要求书内容
+            original_pdf_path: 原PDF文件路径
+            output_format: 输出格式 ('markdown' 或 'text')
+            
+        Returns:
+            格式化后的文件内容
+            
+        Raises:
+            ValueError: 不支持的输出格式
+        """
+        if output_format == "markdown":
+            return self._prepare_markdown_content(claims_content, original_pdf_path)
+        if output_format == "text":
+            return self._prepare_text_content(claims_content, original_pdf_path)
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    
     def _prepare_markdown_content(self, content: str, pdf_path: str) -> str:
         """
         准备Markdown格式的内容，在文件头包含详细源信息。
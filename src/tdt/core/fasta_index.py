@@ -0,0 +1,374 @@
+"""
+FASTA偏移索引
+
+生成与 samtools faidx 兼容的 .fai 索引，并通过内存映射按序列ID或残基区间
+随机读取序列，无需解析整个文件。
+"""
+
+import logging
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .parsers.base import ParsingError
+from ..utils.text_utils import normalize_seq_id
+
+logger = logging.getLogger(__name__)
+
+FAI_SUFFIX = ".fai"
+
+
+@dataclass
+class FastaIndexEntry:
+    """.fai 索引中的一条记录"""
+    name: str
+    length: int       # 残基数
+    offset: int       # 第一个残基的字节偏移
+    line_bases: int   # 每行残基数
+    line_width: int   # 每行字节数（含换行符）
+    
+    def to_line(self) -> str:
+        """转换为 .fai 文件中的一行"""
+        return f"{self.name}\t{self.length}\t{self.offset}\t{self.line_bases}\t{self.line_width}"
+    
+    def byte_offset(self, position: int) -> int:
+        """
+        计算残基位置对应的文件字节偏移
+        
+        Args:
+            position: 残基位置（从0开始）
+        
+        Returns:
+            int: 字节偏移
+        """
+        line, column = divmod(position, self.line_bases)
+        return self.offset + line * self.line_width + column
+
+
+def fasta_index_path(fasta_path: Union[str, Path]) -> Path:
+    """返回FASTA文件对应的索引路径（samtools 约定：原文件名加 .fai）"""
+    fasta_path = Path(fasta_path)
+    return fasta_path.with_name(fasta_path.name + FAI_SUFFIX)
+
+
+def build_fasta_index(fasta_path: Union[str, Path]) -> List[FastaIndexEntry]:
+    """
+    扫描FASTA文件生成偏移索引
+    
+    与 samtools faidx 的要求相同：同一条序列中除最后一行外各行长度必须一致。
+    记录边界由 mmap.find 定位，行宽检查通过字节切片完成，不逐行遍历。
+    
+    Args:
+        fasta_path: FASTA文件路径
+    
+    Returns:
+        List[FastaIndexEntry]: 按文件顺序排列的索引记录
+    
+    Raises:
+        ParsingError: 文件不是可索引的FASTA格式
+        FileNotFoundError: 文件不存在
+    """
+    fasta_path = Path(fasta_path)
+    if not fasta_path.exists():
+        raise FileNotFoundError(f"文件不存在: {fasta_path}")
+    if fasta_path.stat().st_size == 0:
+        raise ParsingError(f"文件为空: {fasta_path}")
+    
+    entries = []
+    with open(fasta_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        start = 0
+        # 跳过文件开头的空行
+        while start < size and mm[start:start + 1] in (b'\n', b'\r'):
+            start += 1
+        if mm[start:start + 1] != b'>':
+            raise ParsingError("FASTA文件应以 '>' 开头的头部行开始", 1)
+        
+        while start < size:
+            header_end = mm.find(b'\n', start)
+            if header_end == -1:
+                header_end = size
+            next_start = mm.find(b'\n>', header_end)
+            next_start = size if next_start == -1 else next_start + 1
+            
+            header = mm[start + 1:header_end].decode('utf-8', errors='replace').split(None, 1)
+            if not header:
+                raise ParsingError(f"字节偏移 {start} 处的FASTA头部行为空")
+            
+            entries.append(_index_record(header[0], mm[header_end + 1:next_start], header_end + 1))
+            start = next_start
+    
+    return entries
+
+
+def _index_record(name: str, region: bytes, offset: int) -> FastaIndexEntry:
+    """
+    计算单条序列的索引记录
+    
+    Args:
+        name: 序列名（头部行的第一个词）
+        region: 头部行之后到下一条记录之前的字节
+        offset: region 在文件中的起始偏移
+    
+    Returns:
+        FastaIndexEntry: 索引记录
+    
+    Raises:
+        ParsingError: 序列各行长度不一致
+    """
+    body = region.rstrip(b'\r\n')
+    if not body:
+        return FastaIndexEntry(name, 0, offset, 0, 0)
+    
+    first_newline = body.find(b'\n')
+    if first_newline == -1:
+        # 单行序列，行宽按其后的换行符计算
+        eol = 2 if region[len(body):len(body) + 2] == b'\r\n' else 1
+        return FastaIndexEntry(name, len(body), offset, len(body), len(body) + eol)
+    
+    line_width = first_newline + 1
+    eol = 2 if body[first_newline - 1:first_newline] == b'\r' else 1
+    line_bases = line_width - eol
+    full_lines = body.count(b'\n')
+    full_end = full_lines * line_width
+    last_line = len(body) - full_end
+    
+    # 各完整行的换行符都应在固定行宽的位置上，且最后一行不超过行宽
+    uniform = (
+        line_bases > 0
+        and 0 < last_line <= line_bases
+        and body[line_width - 1:full_end:line_width] == b'\n' * full_lines
+        and (eol == 1 or body[line_width - 2:full_end:line_width] == b'\r' * full_lines)
+    )
+    if not uniform:
+        raise ParsingError(
+            f"序列 {name} 的各行长度不一致，无法建立索引",
+            context={"sequence_id": name}
+        )
+    
+    return FastaIndexEntry(
+        name, full_lines * line_bases + last_line, offset, line_bases, line_width
+    )
+
+
+def write_fasta_index(entries: Iterable[FastaIndexEntry], fai_path: Union[str, Path]) -> None:
+    """
+    写入 .fai 索引文件（先写临时文件再替换，避免中断时损坏）
+    
+    Args:
+        entries: 索引记录
+        fai_path: 索引文件路径
+    """
+    fai_path = Path(fai_path)
+    temp_path = fai_path.with_name(fai_path.name + ".tmp")
+    with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+        for entry in entries:
+            f.write(entry.to_line() + "\n")
+    os.replace(temp_path, fai_path)
+
+
+def read_fasta_index(fai_path: Union[str, Path]) -> List[FastaIndexEntry]:
+    """
+    读取 .fai 索引文件
+    
+    Args:
+        fai_path: 索引文件路径
+    
+    Returns:
+        List[FastaIndexEntry]: 索引记录
+    
+    Raises:
+        ValueError: 索引文件格式错误
+    """
+    entries = []
+    with open(fai_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 5:
+                raise ValueError(f"{fai_path} 第{line_number}行格式错误: {line.strip()}")
+            entries.append(FastaIndexEntry(fields[0], *(int(value) for value in fields[1:5])))
+    return entries
+
+
+def ensure_fasta_index(fasta_path: Union[str, Path]) -> Path:
+    """
+    确保FASTA文件旁有最新的 .fai 索引，缺失或早于FASTA文件时重新生成
+    
+    Args:
+        fasta_path: FASTA文件路径
+    
+    Returns:
+        Path: 索引文件路径
+    
+    Raises:
+        ParsingError: 文件不是可索引的FASTA格式
+        OSError: 无法写入索引文件
+    """
+    fasta_path = Path(fasta_path)
+    fai_path = fasta_index_path(fasta_path)
+    if fai_path.exists() and fai_path.stat().st_mtime >= fasta_path.stat().st_mtime:
+        return fai_path
+    
+    entries = build_fasta_index(fasta_path)
+    write_fasta_index(entries, fai_path)
+    logger.info(f"已生成FASTA索引 {fai_path}，共{len(entries)}条序列")
+    return fai_path
+
+
+class IndexedFastaReader:
+    """
+    基于 .fai 索引和内存映射的FASTA随机读取器
+    
+    只读取请求的字节区间，读取耗时与文件大小无关。序列名除原始ID外，
+    还可使用 SEQ ID NO 的各种写法（标准化为 SEQ_ID_NO_<n> 后匹配）。
+    """
+    
+    def __init__(self, fasta_path: Union[str, Path], build_index: bool = True):
+        """
+        打开FASTA文件
+        
+        Args:
+            fasta_path: FASTA文件路径
+            build_index: 索引缺失或过期时是否自动生成
+        
+        Raises:
+            FileNotFoundError: FASTA文件或索引不存在
+            ParsingError: 文件不是可索引的FASTA格式
+        """
+        self.fasta_path = Path(fasta_path)
+        if not self.fasta_path.exists():
+            raise FileNotFoundError(f"文件不存在: {self.fasta_path}")
+        
+        fai_path = fasta_index_path(self.fasta_path)
+        if build_index:
+            ensure_fasta_index(self.fasta_path)
+        elif not fai_path.exists():
+            raise FileNotFoundError(f"FASTA索引不存在: {fai_path}")
+        
+        self.entries: Dict[str, FastaIndexEntry] = {}
+        for entry in read_fasta_index(fai_path):
+            if entry.name in self.entries:
+                logger.warning(f"{self.fasta_path}: 忽略重复的序列名 {entry.name}")
+                continue
+            self.entries[entry.name] = entry
+        
+        self._aliases: Optional[Dict[str, str]] = None
+        self._file = open(self.fasta_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __enter__(self) -> "IndexedFastaReader":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """关闭内存映射和文件"""
+        self._mmap.close()
+        self._file.close()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+    
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        将序列名解析为索引中的序列名
+        
+        原始ID优先，其次按标准化的 SEQ_ID_NO_<n> 匹配。
+        
+        Args:
+            name: 序列名或 SEQ ID NO 写法
+        
+        Returns:
+            Optional[str]: 索引中的序列名，找不到时返回 None
+        """
+        if name in self.entries:
+            return name
+        
+        normalized = normalize_seq_id(name)
+        if not normalized:
+            return None
+        
+        # 序列表导出的FASTA通常直接以编号或 SEQ_ID_NO_<n> 命名，无需建立别名表
+        for candidate in (normalized, normalized.rsplit('_', 1)[1]):
+            if candidate in self.entries:
+                return candidate
+        
+        if self._aliases is None:
+            self._aliases = {}
+            for entry_name in self.entries:
+                normalized_name = normalize_seq_id(entry_name)
+                if normalized_name:
+                    self._aliases.setdefault(normalized_name, entry_name)
+        
+        return self._aliases.get(normalized)
+    
+    def length(self, name: str) -> int:
+        """返回序列长度"""
+        return self._entry(name).length
+    
+    def fetch(self, name: str, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        读取序列或其中的残基区间
+        
+        区间与Python切片一致：从0开始，包含 start，不包含 end。
+        
+        Args:
+            name: 序列名或 SEQ ID NO 写法
+            start: 起始位置
+            end: 结束位置，默认到序列末尾
+        
+        Returns:
+            str: 残基字符串
+        
+        Raises:
+            KeyError: 序列不存在
+            ValueError: 区间超出序列范围
+        """
+        entry = self._entry(name)
+        end = entry.length if end is None else end
+        if not 0 <= start <= end <= entry.length:
+            raise ValueError(f"区间 [{start}, {end}) 超出序列 {entry.name} 的范围 (长度 {entry.length})")
+        if start == end:
+            return ""
+        
+        byte_start = entry.byte_offset(start)
+        byte_end = entry.byte_offset(end - 1) + 1
+        if byte_end - byte_start == end - start:
+            # 区间在同一行内，直接从映射内存解码
+            return str(memoryview(self._mmap)[byte_start:byte_end], 'ascii')
+        return self._mmap[byte_start:byte_end].translate(None, b'\r\n').decode('ascii')
+    
+    def fetch_many(self, names: Iterable[str]) -> Dict[str, str]:
+        """
+        读取多条序列，跳过不存在的序列
+        
+        Args:
+            names: 序列名或 SEQ ID NO 写法
+        
+        Returns:
+            Dict[str, str]: 请求的序列名到残基字符串的映射
+        """
+        sequences = {}
+        for name in names:
+            resolved = self.resolve(name)
+            if resolved is None:
+                logger.debug(f"{self.fasta_path}: 未找到序列 {name}")
+                continue
+            sequences[name] = self.fetch(resolved)
+        return sequences
+    
+    def _entry(self, name: str) -> FastaIndexEntry:
+        """查找索引记录"""
+        resolved = self.resolve(name)
+        if resolved is None:
+            raise KeyError(f"序列不存在: {name}")
+        return self.entries[resolved]
@@ -1,15 +1,17 @@
 """
 序列格式自动检测器
 
-能够自动识别FASTA、CSV、JSON等序列文件格式。
+能够自动识别FASTA、CSV、ST.26 XML、JSON等序列文件格式。
 """
 
+import codecs
 import csv
 import json
 import logging
 import re
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, TextIO
+from typing import Dict, List
 
 from ..models.format_models import (
     SequenceFormat, 
@@ -19,6 +21,31 @@ from ..models.format_models import (
 
 logger = logging.getLogger(__name__)
 
+# 格式检测只读取文件开头和结尾的有限字节，与文件大小无关
+HEAD_SAMPLE_BYTES = 64 * 1024
+TAIL_SAMPLE_BYTES = 8 * 1024
+
+
+@dataclass
+class _FileSample:
+    """格式检测使用的文件采样"""
+    head: str
+    tail: str
+    truncated: bool
+    
+    def head_lines(self) -> List[str]:
+        """开头采样中的完整行，截断时丢弃最后一个不完整行"""
+        lines = self.head.splitlines()
+        return lines[:-1] if self.truncated else lines
+    
+    def tail_lines(self) -> List[str]:
+        """结尾采样中的完整行，丢弃第一个不完整行"""
+        return self.tail.splitlines()[1:] if self.truncated else []
+    
+    def lines(self) -> List[str]:
+        """采样中的全部完整行（保留原始内容）"""
+        return self.head_lines() + self.tail_lines()
+
 
 class SequenceFormatDetector:
     """序列格式自动检测器"""
@@ -54,28 +81,34 @@ class SequenceFormatDetector:
         format_specific_info = {}
         
         try:
-            # 读取文件内容进行分析
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # 检测FASTA格式
-                fasta_score, fasta_info = self._detect_fasta(f)
-                confidence_scores[SequenceFormat.FASTA] = fasta_score
-                format_specific_info['fasta'] = fasta_info
-                
-                # 重置文件指针
-                f.seek(0)
-                
-                # 检测CSV格式
-                csv_score, csv_info = self._detect_csv(f)
-                confidence_scores[SequenceFormat.CSV] = csv_score
-                format_specific_info['csv'] = csv_info
-                
-                # 重置文件指针
-                f.seek(0)
-                
-                # 检测JSON格式
-                json_score, json_info = self._detect_json(f)
-                confidence_scores[SequenceFormat.JSON] = json_score
-                format_specific_info['json'] = json_info
+            # 读取一次有限采样，供所有格式检测共用
+            sample = self._read_sample(file_path, file_size)
+            lines = sample.lines()
+            
+            # 检测FASTA格式
+            fasta_score, fasta_info = self._detect_fasta(self._fasta_sample_lines(sample))
+            confidence_scores[SequenceFormat.FASTA] = fasta_score
+            format_specific_info['fasta'] = fasta_info
+            
+            # 检测CSV格式
+            csv_score, csv_info = self._detect_csv(lines)
+            confidence_scores[SequenceFormat.CSV] = csv_score
+            format_specific_info['csv'] = csv_info
+            
+            # 检测ST.26 XML格式
+            st26_score, st26_info = self._detect_st26(sample)
+            confidence_scores[SequenceFormat.ST26] = st26_score
+            format_specific_info['st26'] = st26_info
+            
+            # 检测JSON格式
+            json_score, json_info = self._detect_json(sample)
+            confidence_scores[SequenceFormat.JSON] = json_score
+            format_specific_info['json'] = json_info
+            
+            format_specific_info['sample'] = {
+                "truncated": sample.truncated,
+                "sampled_lines": len(lines)
+            }
                 
         except Exception as e:
             logger.warning(f"读取文件时出错 {file_path}: {e}")
@@ -97,19 +130,73 @@ class SequenceFormatDetector:
             format_specific_info=format_specific_info
         )
     
-    def _detect_fasta(self, file_handle: TextIO) -> tuple[float, Dict]:
+    def _read_sample(self, file_path: Path, file_size: int) -> _FileSample:
+        """
+        读取文件开头和结尾的字节采样
+        
+        文件不超过采样大小时读取全部内容，否则只读取开头 HEAD_SAMPLE_BYTES
+        和结尾 TAIL_SAMPLE_BYTES 字节。
+        
+        Args:
+            file_path: 文件路径
+            file_size: 文件大小（字节）
+            
+        Returns:
+            _FileSample: 文件采样
+            
+        Raises:
+            UnicodeDecodeError: 文件不是UTF-8编码
+        """
+        with open(file_path, 'rb') as f:
+            if file_size <= HEAD_SAMPLE_BYTES + TAIL_SAMPLE_BYTES:
+                return _FileSample(head=f.read().decode('utf-8'), tail="", truncated=False)
+            
+            head_bytes = f.read(HEAD_SAMPLE_BYTES)
+            f.seek(file_size - TAIL_SAMPLE_BYTES)
+            tail_bytes = f.read(TAIL_SAMPLE_BYTES)
+        
+        # 开头采样末尾可能截断多字节字符，增量解码器会保留不完整的字节
+        head = codecs.getincrementaldecoder('utf-8')().decode(head_bytes, final=False)
+        # 结尾采样开头跳过UTF-8续字节，从完整字符开始解码
+        start = 0
+        while start < len(tail_bytes) and 0x80 <= tail_bytes[start] <= 0xBF:
+            start += 1
+        tail = tail_bytes[start:].decode('utf-8')
+        
+        return _FileSample(head=head, tail=tail, truncated=True)
+    
+    def _fasta_sample_lines(self, sample: _FileSample) -> List[str]:
+        """
+        提取用于FASTA检测的非空行
+        
+        截断采样中，开头部分末尾的头部行对应的序列不在采样内，
+        将其去掉以免影响序列行/头部行比例。
+        
+        Args:
+            sample: 文件采样
+            
+        Returns:
+            List[str]: 去除首尾空白后的非空行
+        """
+        head_lines = [line.strip() for line in sample.head_lines() if line.strip()]
+        if sample.truncated:
+            while head_lines and head_lines[-1].startswith('>'):
+                head_lines.pop()
+        
+        tail_lines = [line.strip() for line in sample.tail_lines() if line.strip()]
+        return head_lines + tail_lines
+    
+    def _detect_fasta(self, lines: List[str]) -> tuple[float, Dict]:
         """
         检测FASTA格式
         
         Args:
-            file_handle: 文件句柄
+            lines: 采样中的非空行
             
         Returns:
             tuple: (置信度评分, 格式特定信息)
         """
         try:
-            lines = [line.strip() for line in file_handle.readlines() if line.strip()]
-            
             if not lines:
                 return 0.0, {"error": "文件为空"}
             
@@ -156,23 +243,20 @@ class SequenceFormatDetector:
         except Exception as e:
             return 0.0, {"error": str(e)}
     
-    def _detect_csv(self, file_handle: TextIO) -> tuple[float, Dict]:
+    def _detect_csv(self, lines: List[str]) -> tuple[float, Dict]:
         """
         检测CSV格式
         
         Args:
-            file_handle: 文件句柄
+            lines: 采样中的原始行，第一行视为表头
             
         Returns:
             tuple: (置信度评分, 格式特定信息)
         """
         try:
-            # 尝试用不同分隔符解析
-            content = file_handle.read()
-            if not content.strip():
+            if not any(line.strip() for line in lines):
                 return 0.0, {"error": "文件为空"}
             
-            lines = content.strip().split('\n')
             if len(lines) < 2:
                 return 0.0, {"error": "行数太少"}
             
@@ -184,8 +268,8 @@ class SequenceFormatDetector:
             
             for delimiter in delimiters:
                 try:
-                    # 重置内容并尝试解析
-                    reader = csv.reader(content.splitlines(), delimiter=delimiter)
+                    # 尝试用不同分隔符解析
+                    reader = csv.reader(lines, delimiter=delimiter)
                     rows = list(reader)
                     
                     if len(rows) < 2:
@@ -250,21 +334,61 @@ class SequenceFormatDetector:
         except Exception as e:
             return 0.0, {"error": str(e)}
     
-    def _detect_json(self, file_handle: TextIO) -> tuple[float, Dict]:
+    def _detect_st26(self, sample: _FileSample) -> tuple[float, Dict]:
+        """
+        检测WIPO ST.26 XML序列表格式
+        
+        根据采样中的XML声明、根元素和 SequenceData/INSDSeq 元素判断，
+        不解析整个文件。
+        
+        Args:
+            sample: 文件采样
+            
+        Returns:
+            tuple: (置信度评分, 格式特定信息)
+        """
+        head = sample.head.lstrip('\ufeff').lstrip()
+        if not head.startswith('<'):
+            return 0.0, {"error": "文件不是XML"}
+        
+        info = {
+            "has_xml_declaration": head.startswith('<?xml'),
+            "has_root_element": bool(re.search(r'<ST26SequenceListing\b', head)),
+            "sequence_entries_in_sample": len(re.findall(r'<SequenceData\b', head + sample.tail)),
+            "has_insdseq": '<INSDSeq>' in head or '<INSDSeq ' in head
+        }
+        
+        score = 0.1 if info["has_xml_declaration"] else 0.0
+        if info["has_root_element"]:
+            score += 0.6
+        if info["sequence_entries_in_sample"]:
+            score += 0.2
+        if info["has_insdseq"]:
+            score += 0.1
+        
+        return min(score, 1.0), info
+    
+    def _detect_json(self, sample: _FileSample) -> tuple[float, Dict]:
         """
         检测JSON格式
         
+        文件完整包含在采样中时执行完整解析；否则根据开头和结尾的
+        结构特征及顶层键名进行启发式判断。
+        
         Args:
-            file_handle: 文件句柄
+            sample: 文件采样
             
         Returns:
             tuple: (置信度评分, 格式特定信息)
         """
         try:
-            content = file_handle.read()
+            content = sample.head
             if not content.strip():
                 return 0.0, {"error": "文件为空"}
             
+            if sample.truncated:
+                return self._detect_json_from_sample(sample)
+            
             # 尝试解析JSON
             try:
                 data = json.loads(content)
@@ -281,39 +405,93 @@ class SequenceFormatDetector:
                 # 检查是否有序列相关的键
                 keys = list(data.keys())
                 info["top_level_keys"] = keys
-                
-                if "sequences" in keys:
-                    score += 0.3
-                    info["has_sequences_key"] = True
-                
-                if "metadata" in keys:
-                    score += 0.1
-                    info["has_metadata_key"] = True
-                
-                if "statistics" in keys:
-                    score += 0.1
-                    info["has_statistics_key"] = True
+                score += self._score_json_keys(keys, info)
                 
             elif isinstance(data, list):
                 # 检查列表中是否包含序列对象
                 if data and isinstance(data[0], dict):
                     first_item_keys = list(data[0].keys())
                     info["first_item_keys"] = first_item_keys
-                    
-                    sequence_related = any(
-                        keyword in ' '.join(first_item_keys).lower()
-                        for keyword in ['sequence', 'seq', 'id', 'name']
-                    )
-                    
-                    if sequence_related:
-                        score += 0.2
-                        info["appears_to_be_sequence_list"] = True
+                    score += self._score_json_item_keys(first_item_keys, info)
             
             return min(score, 1.0), info
             
         except Exception as e:
             return 0.0, {"error": str(e)}
     
+    def _detect_json_from_sample(self, sample: _FileSample) -> tuple[float, Dict]:
+        """
+        根据截断的采样启发式检测JSON格式
+        
+        Args:
+            sample: 文件采样（truncated为True）
+            
+        Returns:
+            tuple: (置信度评分, 格式特定信息)
+        """
+        head = sample.head.lstrip()
+        tail = sample.tail.rstrip()
+        
+        closing = {'{': '}', '[': ']'}
+        opening = head[:1]
+        if opening not in closing or not tail.endswith(closing[opening]):
+            return 0.0, {"error": "采样的首尾不符合JSON结构"}
+        
+        score = 0.5  # 基础分，首尾结构符合JSON
+        info = {
+            "is_valid_json": None,  # 未完整解析，无法确认
+            "sampled": True,
+            "data_type": "dict" if opening == '{' else "list"
+        }
+        
+        # 采样中出现的键名（包含嵌套键，仅用于启发式评分）
+        key_pattern = re.compile(r'"([^"\\]{1,64})"\s*:')
+        
+        if opening == '{':
+            keys = list(dict.fromkeys(
+                key_pattern.findall(head) + key_pattern.findall(tail)
+            ))
+            info["sampled_keys"] = keys[:50]
+            score += self._score_json_keys(keys, info)
+        else:
+            first_item = head[1:].lstrip()
+            if first_item.startswith('{'):
+                first_item_keys = list(dict.fromkeys(key_pattern.findall(first_item)))
+                info["first_item_keys"] = first_item_keys[:50]
+                score += self._score_json_item_keys(first_item_keys, info)
+        
+        return min(score, 1.0), info
+    
+    def _score_json_keys(self, keys: List[str], info: Dict) -> float:
+        """根据JSON对象的键计算附加置信度"""
+        score = 0.0
+        
+        if "sequences" in keys:
+            score += 0.3
+            info["has_sequences_key"] = True
+        
+        if "metadata" in keys:
+            score += 0.1
+            info["has_metadata_key"] = True
+        
+        if "statistics" in keys:
+            score += 0.1
+            info["has_statistics_key"] = True
+        
+        return score
+    
+    def _score_json_item_keys(self, item_keys: List[str], info: Dict) -> float:
+        """根据JSON列表首个元素的键计算附加置信度"""
+        sequence_related = any(
+            keyword in ' '.join(item_keys).lower()
+            for keyword in ['sequence', 'seq', 'id', 'name']
+        )
+        
+        if sequence_related:
+            info["appears_to_be_sequence_list"] = True
+            return 0.2
+        return 0.0
+    
     def _adjust_scores_by_extension(self, scores: Dict[SequenceFormat, float], 
                                   extension: str) -> None:
         """
@@ -330,6 +508,7 @@ class SequenceFormatDetector:
             'seq': SequenceFormat.FASTA,
             'csv': SequenceFormat.CSV,
             'tsv': SequenceFormat.CSV,
+            'xml': SequenceFormat.ST26,
             'json': SequenceFormat.JSON
         }
         
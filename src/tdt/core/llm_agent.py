@@ -4,12 +4,19 @@
 使用Qwen API进行专利规则分析和生成。
 """
 
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
 
-from openai import OpenAI
+import httpx
+from openai import (
+    APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient
+)
 
 from ..agents.prompts import (
     PATENT_ANALYSIS_PROMPT, SYSTEM_PROMPT, format_claims_for_llm,
@@ -21,45 +28,235 @@ from ..models.rule_models import (
     RuleGenerationResult
 )
 from ..models.sequence_record import SequenceProcessingResult
+from .llm_cache import LLMResponseCache
+from .rate_limiter import (
+    BackoffPolicy, CircuitBreaker, CircuitOpenError, RateLimiter, parse_retry_after
+)
+from ..utils.text_utils import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+QWEN_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# 单个Agent同时进行的LLM请求数上限（跨专利共享）
+DEFAULT_MAX_CONCURRENCY = 8
+
+T = TypeVar('T')
+
 
 class QwenAPIError(Exception):
     """Qwen API调用错误"""
     pass
 
 
+def _is_retryable_error(error: Exception) -> bool:
+    """网络错误、超时、限流和服务端错误可以重试，其余错误（如认证失败）直接报告"""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def _is_service_failure(error: Exception) -> bool:
+    """
+    连接错误、超时和服务端错误说明服务不可用，计入熔断；
+    限流（429）等携带 Retry-After 的响应说明服务可达，只需等待后重试
+    """
+    if _retry_after_seconds(error) is not None:
+        return False
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 408 or error.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(error: Optional[Exception]) -> Optional[float]:
+    """读取服务端（Retry-After 响应头）或熔断器要求的等待秒数"""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    response = getattr(error, 'response', None)
+    return parse_retry_after(response.headers) if response is not None else None
+
+
+@dataclass
+class _AsyncClientState:
+    """绑定到某个事件循环的异步客户端及并发信号量"""
+    client: AsyncOpenAI
+    semaphore: asyncio.Semaphore
+
+
 class LLMRuleAgent:
     """基于Qwen的规则生成智能体"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "qwen3-max-preview"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "qwen3-max-preview",
+                 cache: Optional[LLMResponseCache] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 backoff: Optional[BackoffPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 prompt_cache: bool = False):
         """初始化LLM Agent
         
         Args:
             api_key: Qwen API密钥，如果为None则从环境变量读取
             model: 使用的模型名称
+            cache: LLM响应缓存，为None时不使用缓存
+            max_concurrency: 同时进行的LLM请求数上限，同时决定HTTP连接池大小
+            rate_limiter: 按API配额限流，为None时不限流
+            backoff: 失败重试的退避策略
+            circuit_breaker: 熔断器，连续失败后暂停请求
+            prompt_cache: 为带公共前缀的请求显式标记 cache_control，使用服务端上下文缓存
         """
         self.api_key = api_key or os.getenv('QWEN_API_KEY')
         if not self.api_key:
             raise ValueError("需要提供Qwen API密钥")
         
         self.model = model
+        self.cache = cache
+        
+        # 采样参数，同时作为缓存键的一部分
+        self.sampling_params = {
+            "temperature": 0.3,
+            "max_tokens": 4000
+        }
+        
+        self.max_concurrency = max(1, max_concurrency)
+        
+        # 限流与容错，在所有事件循环间共享
+        self.rate_limiter = rate_limiter
+        self.backoff = backoff or BackoffPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # 上下文缓存：未开启显式缓存时前缀仍放在用户消息开头，可命中服务端的隐式缓存
+        self.prompt_cache = prompt_cache
+        self.usage_stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self._usage_lock = threading.Lock()
         
-        # 配置OpenAI客户端使用Qwen API
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
+        # 异步客户端按事件循环分别创建，循环结束后自动释放
+        self._async_states: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncClientState]' = (
+            weakref.WeakKeyDictionary()
         )
         
+        # 同步接口使用的后台事件循环
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        
         logger.info(f"初始化LLM Agent，使用模型: {self.model}")
     
+    @property
+    def demo_mode(self) -> bool:
+        """未提供API密钥时返回演示响应，不调用API"""
+        return not self.api_key
+    
+    def _get_async_state(self) -> _AsyncClientState:
+        """获取当前事件循环对应的异步客户端，不存在时创建
+        
+        同一事件循环内的所有请求共享一个连接池和并发信号量。
+        
+        Returns:
+            当前事件循环的客户端状态
+        """
+        loop = asyncio.get_running_loop()
+        state = self._async_states.get(loop)
+        if state is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            state = _AsyncClientState(
+                client=AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=QWEN_BASE_URL,
+                    http_client=http_client,
+                    # 重试由 _call_llm_async 统一处理，以便遵守限流和熔断
+                    max_retries=0
+                ),
+                semaphore=asyncio.Semaphore(self.max_concurrency)
+            )
+            self._async_states[loop] = state
+        return state
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动（如尚未启动）同步接口使用的后台事件循环"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="llm-agent-loop", daemon=True
+                )
+                thread.start()
+                self._loop, self._loop_thread = loop, thread
+            return self._loop
+    
+    def run_sync(self, coroutine: Awaitable[T]) -> T:
+        """在后台事件循环中执行协程并等待结果
+        
+        可以从多个线程同时调用，所有请求共享同一个连接池和并发上限。
+        
+        Args:
+            coroutine: 待执行的协程
+            
+        Returns:
+            协程的返回值
+            
+        Raises:
+            RuntimeError: 在后台事件循环线程中调用
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            coroutine.close()
+            raise RuntimeError("不能在LLM Agent事件循环中调用同步接口，请使用对应的异步方法")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+    
+    async def aclose(self) -> None:
+        """关闭当前事件循环中的异步客户端"""
+        state = self._async_states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.close()
+    
+    def close(self) -> None:
+        """关闭后台事件循环及其中的异步客户端"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        
+        if loop is None:
+            return
+        
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    
     def analyze_patent_claims(self, 
                             claims_data: ClaimsDocument,
                             existing_rules_data: Dict,
                             sequence_data: SequenceProcessingResult) -> RuleGenerationResult:
         """分析权利要求书内容，结合已有规则和序列数据
         
+        Args:
+            claims_data: 权利要求书文档
+            existing_rules_data: 现有规则数据
+            sequence_data: 标准化序列数据
+            
+        Returns:
+            规则生成结果
+        """
+        return self.run_sync(self.analyze_patent_claims_async(
+            claims_data, existing_rules_data, sequence_data
+        ))
+    
+    async def analyze_patent_claims_async(self, 
+                                        claims_data: ClaimsDocument,
+                                        existing_rules_data: Dict,
+                                        sequence_data: SequenceProcessingResult) -> RuleGenerationResult:
+        """analyze_patent_claims 的异步版本
+        
         Args:
             claims_data: 权利要求书文档
             existing_rules_data: 现有规则数据
@@ -87,7 +284,7 @@ class LLMRuleAgent:
             )
             
             # 调用LLM分析
-            response = self._call_llm(prompt)
+            response = await self._call_llm_async(prompt)
             
             # 解析响应
             analysis_result = self._parse_analysis_response(response, claims_data.patent_number)
@@ -146,6 +343,17 @@ class LLMRuleAgent:
     def evaluate_rule_complexity(self, rule_data: Dict) -> ComplexityAnalysis:
         """评估规则复杂度
         
+        Args:
+            rule_data: 规则数据
+            
+        Returns:
+            复杂度分析结果
+        """
+        return self.run_sync(self.evaluate_rule_complexity_async(rule_data))
+    
+    async def evaluate_rule_complexity_async(self, rule_data: Dict) -> ComplexityAnalysis:
+        """evaluate_rule_complexity 的异步版本
+        
         Args:
             rule_data: 规则数据
             
@@ -159,7 +367,7 @@ class LLMRuleAgent:
                 rule_info=json.dumps(rule_data, ensure_ascii=False, indent=2)
             )
             
-            response = self._call_llm(prompt)
+            response = await self._call_llm_async(prompt)
             result = json.loads(response)
             
             complexity_data = result.get('complexity_analysis', {})
@@ -190,6 +398,22 @@ class LLMRuleAgent:
                                     sequence_info: Dict) -> List[AvoidanceStrategy]:
         """生成回避策略
         
+        Args:
+            protection_rules: 保护规则
+            sequence_info: 序列信息
+            
+        Returns:
+            回避策略列表
+        """
+        return self.run_sync(self.generate_avoidance_strategies_async(
+            protection_rules, sequence_info
+        ))
+    
+    async def generate_avoidance_strategies_async(self, 
+                                                protection_rules: Dict,
+                                                sequence_info: Dict) -> List[AvoidanceStrategy]:
+        """generate_avoidance_strategies 的异步版本
+        
         Args:
             protection_rules: 保护规则
             sequence_info: 序列信息
@@ -205,7 +429,7 @@ class LLMRuleAgent:
                 sequence_info=json.dumps(sequence_info, ensure_ascii=False, indent=2)
             )
             
-            response = self._call_llm(prompt)
+            response = await self._call_llm_async(prompt)
             result = json.loads(response)
             
             strategies = []
@@ -226,12 +450,15 @@ class LLMRuleAgent:
             logger.error(f"回避策略生成失败: {e}")
             raise
     
-    def _call_llm(self, prompt: str, max_retries: int = 3) -> str:
+    def _call_llm(self, prompt: str, max_retries: int = 3, use_cache: bool = True,
+                  prefix: str = "") -> str:
         """调用Qwen LLM API
         
         Args:
             prompt: 输入提示
             max_retries: 最大重试次数
+            use_cache: 是否读写响应缓存，为False时强制请求API
+            prefix: 多个请求共用的提示前缀，放在用户消息开头
             
         Returns:
             LLM响应文本
@@ -239,36 +466,145 @@ class LLMRuleAgent:
         Raises:
             QwenAPIError: API调用失败
         """
-        # 检查API密钥是否配置
-        api_key = os.getenv('QWEN_API_KEY') or os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        return self.run_sync(self._call_llm_async(prompt, max_retries, use_cache, prefix))
+    
+    def _build_messages(self, prompt: str, prefix: str = "") -> List[Dict[str, Any]]:
+        """
+        构建请求消息
+        
+        系统提示和前缀在前、可变内容在后，使同一批请求共享尽可能长的相同前缀。
+        开启 prompt_cache 时前缀作为单独的内容块并标记 cache_control。
+        
+        Args:
+            prompt: 可变部分
+            prefix: 公共前缀
+            
+        Returns:
+            List[Dict[str, Any]]: 消息列表
+        """
+        if prefix and self.prompt_cache:
+            user_content: Any = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt}
+            ]
+        else:
+            user_content = prefix + prompt
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_content}
+        ]
+    
+    def _record_usage(self, usage: Any) -> None:
+        """累计API返回的令牌用量，包括命中上下文缓存的输入令牌数"""
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', None) or 0
+        with self._usage_lock:
+            self.usage_stats["requests"] += 1
+            self.usage_stats["prompt_tokens"] += usage.prompt_tokens or 0
+            self.usage_stats["cached_tokens"] += cached_tokens
+            self.usage_stats["completion_tokens"] += usage.completion_tokens or 0
+    
+    async def _call_llm_async(self, prompt: str, max_retries: int = 3,
+                              use_cache: bool = True, prefix: str = "") -> str:
+        """异步调用Qwen LLM API，并发数受 max_concurrency 限制
+        
+        Args:
+            prompt: 输入提示
+            max_retries: 最大重试次数
+            use_cache: 是否读写响应缓存，为False时强制请求API
+            prefix: 多个请求共用的提示前缀，放在用户消息开头
+            
+        Returns:
+            LLM响应文本
+            
+        Raises:
+            QwenAPIError: API调用失败
+        """
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key(self.model, SYSTEM_PROMPT, prefix + prompt, self.sampling_params)
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        
+        if self.demo_mode:
             logger.warning("未找到LLM API密钥，使用演示模式")
-            return self._get_demo_response(prompt)
+            return self._get_demo_response(prefix + prompt)
+        
+        state = self._get_async_state()
+        messages = self._build_messages(prompt, prefix)
+        estimated_tokens = (
+            estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prefix) + estimate_tokens(prompt)
+            + self.sampling_params["max_tokens"]
+        )
+        last_error: Optional[Exception] = None
         
         for attempt in range(max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=4000
+            if attempt > 0:
+                delay = self.backoff.delay(attempt - 1, _retry_after_seconds(last_error))
+                logger.warning(
+                    f"LLM调用失败 (尝试 {attempt}/{max_retries})，{delay:.1f}秒后重试: {last_error}"
                 )
-                
-                content = response.choices[0].message.content
-                if not content:
-                    raise QwenAPIError("LLM返回空响应")
-                
-                return content.strip()
-                
+                await asyncio.sleep(delay)
+            
+            try:
+                is_trial = self.circuit_breaker.before_call()
+            except CircuitOpenError as e:
+                # 熔断期间等到半开时刻再试，占用一次重试机会
+                if attempt + 1 >= max_retries:
+                    raise QwenAPIError(f"LLM服务暂不可用: {e}") from last_error
+                last_error = e
+                continue
+            
+            reserved_tokens = 0
+            try:
+                if self.rate_limiter is not None:
+                    reserved_tokens = await self.rate_limiter.acquire(estimated_tokens)
+                async with state.semaphore:
+                    response = await state.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        **self.sampling_params
+                    )
             except Exception as e:
-                logger.warning(f"LLM调用失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    # 如果真实API失败，也返回演示响应
-                    logger.warning("LLM API调用失败，使用演示模式")
-                    return self._get_demo_response(prompt)
+                last_error = e
+                if _is_service_failure(e):
+                    self.circuit_breaker.record_failure()
+                elif is_trial:
+                    # 限流或请求本身有误说明服务可达：不计入熔断，也不清零连续失败数，
+                    # 只释放半开状态的试探名额
+                    self.circuit_breaker.release_trial()
+                if not _is_retryable_error(e):
+                    raise QwenAPIError(f"LLM调用失败: {e}") from e
+                continue
+            except BaseException:
+                # 被取消（CancelledError 不属于 Exception）时没有调用结果，
+                # 不计入熔断，但必须释放试探名额，否则熔断器会一直停在半开状态
+                if is_trial:
+                    self.circuit_breaker.release_trial()
+                raise
+            
+            self.circuit_breaker.record_success()
+            self._record_usage(response.usage)
+            if self.rate_limiter is not None and response.usage is not None:
+                self.rate_limiter.reconcile(reserved_tokens, response.usage.total_tokens)
+            
+            content = response.choices[0].message.content if response.choices else None
+            if not content or not content.strip():
+                last_error = QwenAPIError("LLM返回空响应")
+                continue
+            
+            content = content.strip()
+            
+            # 仅缓存真实的API响应，演示响应不会写入缓存
+            if cache_key is not None:
+                self.cache.set(cache_key, content, {"model": self.model})
+            
+            return content
+        
+        raise QwenAPIError(f"LLM调用失败，已重试{max_retries}次: {last_error}") from last_error
     
     def _parse_analysis_response(self, response: str, patent_number: str) -> RuleGenerationResult:
         """解析LLM分析响应，支持容错机制
@@ -469,7 +805,7 @@ class LLMRuleAgent:
             连接是否成功
         """
         try:
-            response = self._call_llm("请回复'连接成功'")
+            response = self._call_llm("请回复'连接成功'", use_cache=False)
             return "连接成功" in response or "connection" in response.lower()
         except Exception as e:
             logger.error(f"连接测试失败: {e}")
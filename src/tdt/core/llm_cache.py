@@ -0,0 +1,237 @@
+"""
+LLM响应缓存
+
+以内容寻址的方式将LLM响应持久化到本地磁盘，避免对未变化的输入重复调用API。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(".cache") / "llm"
+
+
+class LLMResponseCache:
+    """基于磁盘的LLM响应缓存
+
+    缓存键由模型名称、系统提示、用户提示和采样参数共同决定，
+    任一输入变化都会产生新的缓存条目。每个条目以独立JSON文件存储，
+    支持按存活时间（TTL）和总大小（LRU）淘汰。
+    """
+
+    def __init__(self,
+                 cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 ttl_seconds: Optional[float] = 30 * 24 * 3600,
+                 max_size_bytes: Optional[int] = 512 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl_seconds: 条目存活时间（秒），None表示永不过期
+            max_size_bytes: 缓存总大小上限（字节），None表示不限制
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        self._current_size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """根据请求内容生成缓存键
+
+        Args:
+            model: 模型名称
+            system_prompt: 系统提示
+            user_prompt: 用户提示
+            params: 采样参数（temperature、max_tokens等）
+
+        Returns:
+            SHA-256十六进制缓存键
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "system": system_prompt,
+                "user": user_prompt,
+                "params": params or {},
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应文本，未命中或已过期时返回None
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"缓存条目损坏，已忽略: {entry_path} ({e})")
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        if self._is_expired(entry.get("created_at", 0)):
+            logger.debug(f"缓存条目已过期: {key[:12]}")
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        # 更新访问时间，用于按大小淘汰时的LRU排序
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        logger.debug(f"LLM缓存命中: {key[:12]}")
+        return entry.get("response")
+
+    def set(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """写入响应到缓存
+
+        Args:
+            key: 缓存键
+            response: 响应文本
+            metadata: 附加的元数据（如模型名称），仅用于排查
+        """
+        entry_path = self._entry_path(key)
+        entry = {
+            "key": key,
+            "created_at": time.time(),
+            "metadata": metadata or {},
+            "response": response,
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，避免并发读取到半写入的条目
+            fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"写入LLM缓存失败: {e}")
+            return
+
+        with self._lock:
+            if self._current_size is not None:
+                self._current_size += len(data)
+
+        self._evict_if_needed()
+
+    def evict(self) -> int:
+        """清理过期条目，并在超出大小上限时按最近访问时间淘汰
+
+        Returns:
+            被删除的条目数量
+        """
+        with self._lock:
+            entries = []
+            removed = 0
+
+            for entry_path in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = entry_path.stat()
+                except OSError:
+                    continue
+
+                # 修改时间不早于创建时间，长期未访问的条目必然已过期
+                if self._is_expired(stat.st_mtime):
+                    self._remove(entry_path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+            total_size = sum(size for _, size, _ in entries)
+
+            if self.max_size_bytes is not None and total_size > self.max_size_bytes:
+                entries.sort()
+                # 淘汰到上限的90%，避免每次写入都触发全量扫描
+                target_size = int(self.max_size_bytes * 0.9)
+                for _, size, entry_path in entries:
+                    if total_size <= target_size:
+                        break
+                    self._remove(entry_path)
+                    total_size -= size
+                    removed += 1
+
+            self._current_size = total_size
+
+        if removed:
+            logger.info(f"LLM缓存淘汰了{removed}个条目")
+        return removed
+
+    def clear(self) -> None:
+        """清空全部缓存"""
+        with self._lock:
+            for entry_path in self.cache_dir.glob("*/*.json"):
+                self._remove(entry_path)
+            self._current_size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        return {
+            "cache_dir": str(self.cache_dir),
+            "hits": self.hits,
+            "misses": self.misses,
+            "size_bytes": self._current_size,
+        }
+
+    def _entry_path(self, key: str) -> Path:
+        """缓存条目路径，按键前缀分目录避免单目录文件过多"""
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _is_expired(self, timestamp: float) -> bool:
+        """判断时间戳是否已超过TTL"""
+        if self.ttl_seconds is None:
+            return False
+        return time.time() - timestamp > self.ttl_seconds
+
+    def _evict_if_needed(self) -> None:
+        """当缓存大小未知或超过上限时执行淘汰"""
+        if self.max_size_bytes is None:
+            return
+
+        with self._lock:
+            needs_eviction = (
+                self._current_size is None or self._current_size > self.max_size_bytes
+            )
+
+        if needs_eviction:
+            self.evict()
+
+    @staticmethod
+    def _remove(entry_path: Path) -> None:
+        """删除缓存条目，忽略并发删除导致的错误"""
+        try:
+            entry_path.unlink()
+        except OSError:
+            pass
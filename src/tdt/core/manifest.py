@@ -0,0 +1,236 @@
+"""
+增量处理清单
+
+为每个产出记录输入文件的内容哈希、处理代码版本、处理参数和输出文件，
+重新运行时只处理输入、版本或参数发生变化（或输出丢失）的条目。
+
+清单为输出目录下的一个JSON文件。输入文件的大小和修改时间未变化时
+直接复用记录的MD5，不重新读取文件，因此在大规模归档上检查也很快。
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .. import __version__
+from ..utils.file_utils import calculate_file_md5
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = ".tdt-manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+# 每记录多少条后写回一次磁盘，中途中断时最多重做这么多条
+DEFAULT_AUTOSAVE_INTERVAL = 50
+
+
+class ProcessingManifest:
+    """增量处理清单"""
+
+    def __init__(self, path: Union[str, Path],
+                 autosave_interval: int = DEFAULT_AUTOSAVE_INTERVAL):
+        """
+        初始化清单，文件存在时加载已有记录
+
+        Args:
+            path: 清单文件路径
+            autosave_interval: 自动写回间隔（记录条数），0 表示只在 save 时写回
+        """
+        self.path = Path(path)
+        self.autosave_interval = autosave_interval
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, Dict[str, Any]] = {}
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def for_output_dir(cls, output_dir: Union[str, Path], **kwargs) -> 'ProcessingManifest':
+        """
+        使用输出目录下的默认清单文件
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            ProcessingManifest: 清单
+        """
+        return cls(Path(output_dir) / MANIFEST_FILENAME, **kwargs)
+
+    def __enter__(self) -> 'ProcessingManifest':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.save()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"清单文件无法读取，将重新处理全部文件: {self.path} ({e})")
+            return
+
+        if data.get("format_version") != MANIFEST_FORMAT_VERSION:
+            logger.warning(f"清单格式版本不匹配，将重新处理全部文件: {self.path}")
+            return
+
+        self.entries = data.get("entries", {})
+        # 汇总各条目记录的输入文件指纹，用于跳过未修改文件的哈希计算
+        for entry in self.entries.values():
+            self._fingerprints.update(entry.get("inputs", {}))
+
+    @staticmethod
+    def make_key(stage: str, input_path: Union[str, Path]) -> str:
+        """
+        生成条目键
+
+        Args:
+            stage: 处理阶段（如 extract、sequences、rules）
+            input_path: 主输入文件路径
+
+        Returns:
+            str: 条目键
+        """
+        return f"{stage}:{Path(input_path).resolve()}"
+
+    def fingerprint(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """
+        获取文件指纹（MD5、大小、修改时间）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            Dict[str, Any]: 文件指纹
+        """
+        resolved = str(Path(path).resolve())
+        stat = os.stat(resolved)
+
+        with self._lock:
+            cached = self._fingerprints.get(resolved)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached
+
+        fingerprint = {
+            "md5": calculate_file_md5(resolved),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        with self._lock:
+            self._fingerprints[resolved] = fingerprint
+        return fingerprint
+
+    def is_current(self, stage: str, input_path: Union[str, Path],
+                   inputs: Iterable[Union[str, Path]] = (),
+                   version: str = __version__,
+                   params: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        判断条目是否无需重新处理
+
+        条件：存在记录，版本和参数一致，全部输入文件内容未变，记录的输出文件均存在。
+
+        Args:
+            stage: 处理阶段
+            input_path: 主输入文件路径
+            inputs: 其他输入文件路径
+            version: 处理代码版本
+            params: 影响输出的处理参数
+
+        Returns:
+            bool: 是否可以跳过
+        """
+        with self._lock:
+            entry = self.entries.get(self.make_key(stage, input_path))
+        if entry is None:
+            return False
+        if entry.get("version") != version or entry.get("params") != (params or {}):
+            return False
+
+        paths = [input_path, *inputs]
+        recorded = entry.get("inputs", {})
+        if set(recorded) != {str(Path(path).resolve()) for path in paths}:
+            return False
+
+        try:
+            for path in paths:
+                if self.fingerprint(path)["md5"] != recorded[str(Path(path).resolve())]["md5"]:
+                    return False
+        except OSError:
+            return False
+
+        return all(Path(output).exists() for output in entry.get("outputs", []))
+
+    def get(self, stage: str, input_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """获取条目记录"""
+        with self._lock:
+            return self.entries.get(self.make_key(stage, input_path))
+
+    def record(self, stage: str, input_path: Union[str, Path],
+               outputs: Iterable[Union[str, Path]],
+               inputs: Iterable[Union[str, Path]] = (),
+               version: str = __version__,
+               params: Optional[Dict[str, Any]] = None,
+               info: Optional[Dict[str, Any]] = None) -> None:
+        """
+        记录一次成功的处理
+
+        Args:
+            stage: 处理阶段
+            input_path: 主输入文件路径
+            outputs: 输出文件路径
+            inputs: 其他输入文件路径
+            version: 处理代码版本
+            params: 影响输出的处理参数
+            info: 附加信息（如序列数），跳过时用于汇报
+        """
+        paths = [input_path, *inputs]
+        entry = {
+            "stage": stage,
+            "inputs": {str(Path(path).resolve()): self.fingerprint(path) for path in paths},
+            "version": version,
+            "params": params or {},
+            "outputs": [str(Path(output).resolve()) for output in outputs],
+            "info": info or {},
+            "updated_at": datetime.now().isoformat(),
+        }
+
+        with self._lock:
+            self.entries[self.make_key(stage, input_path)] = entry
+            self._pending += 1
+            autosave = self.autosave_interval and self._pending >= self.autosave_interval
+        if autosave:
+            self.save()
+
+    def discard(self, stage: str, input_path: Union[str, Path]) -> None:
+        """删除条目，使其下次必定重新处理"""
+        with self._lock:
+            if self.entries.pop(self.make_key(stage, input_path), None) is not None:
+                self._pending += 1
+
+    def save(self) -> None:
+        """写回清单文件（先写临时文件再替换，避免中断时损坏）"""
+        with self._lock:
+            if self._pending == 0 and self.path.exists():
+                return
+            data = {
+                "format_version": MANIFEST_FORMAT_VERSION,
+                "entries": self.entries,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self._pending = 0
+
+    def outputs(self, stage: str, input_path: Union[str, Path]) -> List[Path]:
+        """获取条目记录的输出文件"""
+        entry = self.get(stage, input_path)
+        return [Path(output) for output in entry.get("outputs", [])] if entry else []
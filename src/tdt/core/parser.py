@@ -5,13 +5,16 @@ PDF解析模块
 """
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pdfplumber
 from pdfplumber.page import Page
 
 logger = logging.getLogger(__name__)
 
+# 快速扫描时截取的页面顶部区域比例，足以覆盖页眉和正文开头几行
+PREVIEW_REGION_RATIO = 0.35
+
 
 class PDFParser:
     """
@@ -63,13 +66,132 @@ class PDFParser:
             logger.error(f"解析PDF文件失败: {e}")
             raise ValueError(f"无法解析PDF文件: {e}")
     
-    def _extract_page_content(self, page: Page, page_number: int) -> Dict:
+    def iter_pages(
+        self,
+        pdf_path: str,
+        page_numbers: Optional[Iterable[int]] = None,
+        include_bbox: bool = True
+    ) -> Iterator[Dict]:
+        """
+        按需逐页解析PDF文件，每页处理完毕后立即释放pdfplumber的页面缓存。
+        
+        与 parse_pdf 不同，该方法不会把结果保存到 self.pages_data，
+        调用方可以在任意页停止迭代。
+        
+        Args:
+            pdf_path: PDF文件路径
+            page_numbers: 需要解析的页码（从1开始），为None时解析全部页面
+            include_bbox: 是否生成逐字符的文本框信息
+            
+        Yields:
+            与 parse_pdf 结构相同的单页信息字典
+            
+        Raises:
+            FileNotFoundError: PDF文件不存在
+            ValueError: PDF文件无法解析
+        """
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
+        
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num in self._select_page_numbers(len(pdf.pages), page_numbers):
+                    page = pdf.pages[page_num - 1]
+                    try:
+                        yield self._extract_page_content(page, page_num, include_bbox)
+                    finally:
+                        page.close()
+        except (FileNotFoundError, ValueError):
+            raise
+        except Exception as e:
+            logger.error(f"解析PDF文件失败: {e}")
+            raise ValueError(f"无法解析PDF文件: {e}")
+    
+    def scan_headers(self, pdf_path: str) -> Iterator[Dict]:
+        """
+        快速扫描PDF页面，只提取页眉和页面顶部区域的文本。
+        
+        用于在完整解析之前定位目标章节。返回的 content 只是页面开头部分
+        的预览文本，不包含 bbox_info。
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Yields:
+            包含 page_number、header_text、content（预览）的页面字典
+            
+        Raises:
+            FileNotFoundError: PDF文件不存在
+            ValueError: PDF文件无法解析
+        """
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
+        
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page in enumerate(pdf.pages, 1):
+                    try:
+                        header_text = self._extract_header(page.chars, page.height)
+                        x0, top, x1, _ = page.bbox
+                        preview_region = page.crop(
+                            (x0, top, x1, top + page.height * PREVIEW_REGION_RATIO)
+                        )
+                        preview_text = preview_region.extract_text()
+                        
+                        yield {
+                            "page_number": page_num,
+                            "header_text": header_text,
+                            "content": preview_text or "",
+                            "page_height": page.height,
+                            "page_width": page.width,
+                        }
+                    finally:
+                        page.close()
+        except (FileNotFoundError, ValueError):
+            raise
+        except Exception as e:
+            logger.error(f"扫描PDF页眉失败: {e}")
+            raise ValueError(f"无法解析PDF文件: {e}")
+    
+    def _select_page_numbers(
+        self,
+        total_pages: int,
+        page_numbers: Optional[Iterable[int]]
+    ) -> List[int]:
+        """
+        规范化待解析的页码列表。
+        
+        Args:
+            total_pages: PDF总页数
+            page_numbers: 请求的页码，为None时表示全部页面
+            
+        Returns:
+            去重、排序并过滤越界值后的页码列表
+        """
+        if page_numbers is None:
+            return list(range(1, total_pages + 1))
+        
+        requested = set(page_numbers)
+        selected = sorted(n for n in requested if 1 <= n <= total_pages)
+        if len(selected) < len(requested):
+            logger.warning(f"忽略超出范围的页码（共 {total_pages} 页）")
+        return selected
+    
+    def _extract_page_content(
+        self,
+        page: Page,
+        page_number: int,
+        include_bbox: bool = True
+    ) -> Dict:
         """
         从单个页面提取内容和结构信息。
         
         Args:
             page: pdfplumber页面对象
             page_number: 页码
+            include_bbox: 是否生成逐字符的文本框信息
             
         Returns:
             包含页面信息的字典
@@ -87,7 +209,7 @@ class PDFParser:
         content_text = page.extract_text()
         
         # 获取文本框信息
-        bbox_info = self._get_text_bboxes(chars)
+        bbox_info = self._get_text_bboxes(chars) if include_bbox else []
         
         return {
             "page_number": page_number,
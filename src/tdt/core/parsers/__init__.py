@@ -4,13 +4,16 @@
 提供各种序列格式的解析器实现。
 """
 
-from .base import BaseSequenceParser, ParsingError
+from .base import BaseSequenceParser, ParsingError, SequenceValidator
 from .fasta_parser import FastaParser
 from .csv_parser import CsvParser
+from .st26_parser import St26Parser
 
 __all__ = [
     'BaseSequenceParser',
     'ParsingError',
+    'SequenceValidator',
     'FastaParser', 
-    'CsvParser'
+    'CsvParser',
+    'St26Parser'
 ]
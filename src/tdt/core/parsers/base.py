@@ -6,15 +6,44 @@
 
 import logging
 from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, Type, TypeVar
 
-from ...models.sequence_record import SequenceRecord
+import numpy as np
+from pydantic import BaseModel
+
+from ...models.sequence_record import SequenceRecord, construct_model
 from ...models.processing_models import ValidationResult
 from ...models.format_models import SequenceFormat
 
 logger = logging.getLogger(__name__)
 
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+# 分子类型检测使用的字符集
+_PROTEIN_SPECIFIC_CHARS = frozenset('EQHILKMFPWY')
+_PROTEIN_CHARS = frozenset('ACDEFGHIKLMNPQRSTVWY')
+_NUCLEIC_CHARS = frozenset('ATCGUN')  # 包括通用核苷酸字符
+
+# 各分子类型允许的字符
+_ALLOWED_CHARS = {
+    'protein': frozenset('ACDEFGHIKLMNPQRSTVWY*-'),
+    'dna': frozenset('ATCGNRYSWKMBDHV*-'),  # 包括IUPAC核酸代码
+    'rna': frozenset('AUCGNRYSWKMBDHV*-'),  # 包括IUPAC核酸代码
+    'unknown': frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ*-')  # 允许所有字母
+}
+
+
+@dataclass
+class SequenceProfile:
+    """单条序列的残基统计结果"""
+    composition: Dict[str, int]
+    molecular_type: str
+    errors: List[str]
+
 
 class ParsingError(Exception):
     """解析错误异常"""
@@ -32,17 +61,105 @@ class ParsingError(Exception):
         super().__init__(full_message)
 
 
+class SequenceValidator:
+    """
+    单次遍历的序列验证器
+    
+    逐条累计基础检查（序列ID重复、长度）并调用解析器的 record_issues，
+    全部序列添加完后调用 summary_issues。解析器通过这两个钩子扩展检查，
+    不增加遍历次数。批量验证和流式验证共用此类。
+    """
+    
+    def __init__(self, parser: "BaseSequenceParser"):
+        """
+        初始化验证器
+        
+        Args:
+            parser: 提供格式特定检查的解析器
+        """
+        self.parser = parser
+        self.count = 0
+        self.lengths = array('q')
+        self._id_counts: Counter = Counter()
+        self._basic_errors: List[str] = []
+        self._basic_warnings: List[str] = []
+        self._format_errors: List[str] = []
+        self._format_warnings: List[str] = []
+    
+    def add(self, sequence: SequenceRecord) -> None:
+        """
+        验证一条序列
+        
+        Args:
+            sequence: 序列记录
+        """
+        index = self.count
+        self.count += 1
+        self._id_counts[sequence.sequence_id] += 1
+        
+        seq_length = sequence.sequence_data.length
+        self.lengths.append(seq_length)
+        if seq_length == 0:
+            self._basic_errors.append(f"序列{index+1} ({sequence.sequence_id}) 长度为0")
+        elif seq_length < 10:
+            self._basic_warnings.append(
+                f"序列{index+1} ({sequence.sequence_id}) 长度过短: {seq_length}"
+            )
+        
+        errors, warnings = self.parser.record_issues(index, sequence)
+        self._format_errors.extend(errors)
+        self._format_warnings.extend(warnings)
+    
+    def finish(self) -> ValidationResult:
+        """
+        汇总验证结果
+        
+        Returns:
+            ValidationResult: 验证结果
+        """
+        errors = []
+        warnings = []
+        
+        if self.count == 0:
+            errors.append("未解析到任何序列")
+        
+        duplicates = [sid for sid, count in self._id_counts.items() if count > 1]
+        if duplicates:
+            warnings.append(f"发现重复的序列ID: {sorted(duplicates)}")
+        
+        errors.extend(self._basic_errors)
+        warnings.extend(self._basic_warnings)
+        errors.extend(self._format_errors)
+        warnings.extend(self._format_warnings)
+        
+        summary_errors, summary_warnings = self.parser.summary_issues(self.lengths)
+        errors.extend(summary_errors)
+        warnings.extend(summary_warnings)
+        
+        return ValidationResult(
+            is_valid=len(errors) == 0,
+            total_errors=len(errors),
+            total_warnings=len(warnings),
+            errors=errors,
+            warnings=warnings
+        )
+
+
 class BaseSequenceParser(ABC):
     """序列解析器抽象基类"""
     
-    def __init__(self, format_type: SequenceFormat):
+    def __init__(self, format_type: SequenceFormat, validate_models: bool = False):
         """
         初始化解析器
         
         Args:
             format_type: 支持的序列格式
+            validate_models: 是否对解析器创建的模型执行完整的Pydantic验证。
+                默认跳过（解析器已保证各字段一致），需要时可用
+                SequenceRecord.revalidate() 单独验证
         """
         self.format_type = format_type
+        self.validate_models = validate_models
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
     
     @abstractmethod
@@ -62,18 +179,77 @@ class BaseSequenceParser(ABC):
         """
         pass
     
-    @abstractmethod
+    def iter_parse(self, file_path: Path) -> Iterator[SequenceRecord]:
+        """
+        逐条解析序列文件，按文件顺序产出序列记录
+        
+        默认实现基于 parse，支持流式读取的解析器应重写该方法，
+        使内存占用与文件大小无关。
+        
+        Args:
+            file_path: 文件路径
+            
+        Yields:
+            SequenceRecord: 序列记录
+            
+        Raises:
+            ParsingError: 解析错误
+            FileNotFoundError: 文件不存在
+        """
+        yield from self.parse(file_path)
+    
+    def record_issues(self, index: int, 
+                      sequence: SequenceRecord) -> Tuple[List[str], List[str]]:
+        """
+        检查单条序列的格式特定问题，供 validate 和流式验证共用
+        
+        Args:
+            index: 序列在文件中的索引（从0开始）
+            sequence: 序列记录
+            
+        Returns:
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
+        """
+        return [], []
+    
+    def summary_issues(self, lengths: Sequence[int]) -> Tuple[List[str], List[str]]:
+        """
+        基于全部序列长度检查格式特定问题，在逐条检查之后执行
+        
+        Args:
+            lengths: 按文件顺序排列的序列长度
+            
+        Returns:
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
+        """
+        return [], []
+    
     def validate(self, sequences: List[SequenceRecord]) -> ValidationResult:
         """
         验证解析结果的正确性
         
+        对全部序列只遍历一次，格式特定的检查通过 record_issues 和
+        summary_issues 提供。
+        
         Args:
             sequences: 序列记录列表
             
         Returns:
             ValidationResult: 验证结果
         """
-        pass
+        validator = self.create_validator()
+        for sequence in sequences:
+            validator.add(sequence)
+        return validator.finish()
+    
+    def create_validator(self) -> SequenceValidator:
+        """
+        创建单次遍历的验证器，供 validate 和流式处理使用
+        
+        Returns:
+            SequenceValidator: 验证器
+        """
+        return SequenceValidator(self)
     
     def get_supported_extensions(self) -> List[str]:
         """
@@ -95,6 +271,31 @@ class BaseSequenceParser(ABC):
         """
         return self.format_type
     
+    def _construct(self, model_cls: Type[ModelT], **fields: Any) -> ModelT:
+        """
+        创建解析器内部使用的模型实例
+        
+        未开启 validate_models 时跳过Pydantic验证：模型提供 construct_trusted
+        时使用它（只保留廉价的必要检查），否则直接用 construct_model 创建。
+        
+        Args:
+            model_cls: 模型类
+            **fields: 字段值
+            
+        Returns:
+            ModelT: 模型实例
+            
+        Raises:
+            ValueError: 字段不满足模型约束
+        """
+        if self.validate_models:
+            return model_cls(**fields)
+        
+        construct = getattr(model_cls, 'construct_trusted', None)
+        if construct is not None:
+            return construct(**fields)
+        return construct_model(model_cls, **fields)
+    
     def _validate_file(self, file_path: Path) -> None:
         """
         验证输入文件
@@ -115,12 +316,35 @@ class BaseSequenceParser(ABC):
         if file_path.stat().st_size == 0:
             raise ValueError(f"文件为空: {file_path}")
     
-    def _detect_molecular_type(self, sequence: str) -> str:
+    def _profile_sequence(self, sequence: str,
+                          molecular_type: Optional[str] = None) -> SequenceProfile:
+        """
+        一次统计序列的组成、分子类型和无效字符
+        
+        只遍历序列一次得到组成直方图，分子类型比例和字符检查都基于直方图计算，
+        开销与序列长度无关。
+        
+        Args:
+            sequence: 清理后的序列
+            molecular_type: 已知的分子类型，为None时自动检测
+            
+        Returns:
+            SequenceProfile: 统计结果
+        """
+        composition = self._calculate_composition(sequence)
+        if molecular_type is None:
+            molecular_type = self._detect_molecular_type(sequence, composition)
+        errors = self._validate_sequence_characters(sequence, molecular_type, composition)
+        return SequenceProfile(composition, molecular_type, errors)
+    
+    def _detect_molecular_type(self, sequence: str,
+                               composition: Optional[Dict[str, int]] = None) -> str:
         """
         自动检测分子类型
         
         Args:
             sequence: 清理后的序列
+            composition: 序列组成，已计算时传入以免再次遍历序列
             
         Returns:
             str: 分子类型 (protein|dna|rna|unknown)
@@ -128,25 +352,24 @@ class BaseSequenceParser(ABC):
         if not sequence:
             return "unknown"
         
-        # 转换为大写并去除空白字符
-        clean_seq = sequence.upper().replace(' ', '').replace('\n', '').replace('\t', '')
+        if composition is None:
+            composition = self._calculate_composition(sequence)
+        
+        # 按大写字符合并计数，忽略空白字符
+        counts: Counter = Counter()
+        for char, count in composition.items():
+            if char not in ' \n\t':
+                counts[char.upper()] += count
         
         # 计算各种字符的比例
-        total_chars = len(clean_seq)
+        total_chars = sum(counts.values())
         if total_chars == 0:
             return "unknown"
         
-        # 蛋白质特有氨基酸
-        protein_specific = set('EQHILKMFPWY')
-        protein_chars = set('ACDEFGHIKLMNPQRSTVWY')
-        
-        # 核酸字符 
-        nucleic_chars = set('ATCGUN')  # 包括通用核苷酸字符
-        
         # 计算各类字符的出现次数
-        protein_specific_count = sum(1 for c in clean_seq if c in protein_specific)
-        protein_total_count = sum(1 for c in clean_seq if c in protein_chars)
-        nucleic_total_count = sum(1 for c in clean_seq if c in nucleic_chars)
+        protein_specific_count = sum(counts[c] for c in _PROTEIN_SPECIFIC_CHARS)
+        protein_total_count = sum(counts[c] for c in _PROTEIN_CHARS)
+        nucleic_total_count = sum(counts[c] for c in _NUCLEIC_CHARS)
         
         # 决策逻辑
         protein_specific_ratio = protein_specific_count / total_chars
@@ -159,20 +382,10 @@ class BaseSequenceParser(ABC):
         
         # 如果所有字符都是核酸字符
         if nucleic_ratio > 0.95:
-            # 区分DNA和RNA
-            has_t = 'T' in clean_seq
-            has_u = 'U' in clean_seq
-            
-            if has_u and not has_t:
+            # 区分DNA和RNA；只有A、C、G或同时有T和U时默认为DNA
+            if counts['U'] and not counts['T']:
                 return "rna"
-            elif has_t and not has_u:
-                return "dna"
-            elif not has_u and not has_t:
-                # 只有A、C、G，默认为DNA
-                return "dna"
-            else:
-                # 同时有T和U，不太可能，默认为DNA
-                return "dna"
+            return "dna"
         
         # 如果大部分是蛋白质字符
         if protein_total_ratio > 0.8:
@@ -208,26 +421,32 @@ class BaseSequenceParser(ABC):
         """
         计算序列组成
         
+        ASCII序列用 numpy.bincount 一次完成计数。字符按首次出现的顺序排列，
+        与逐字符计数的结果一致。
+        
         Args:
             sequence: 序列字符串
             
         Returns:
             Dict[str, int]: 字符计数字典
         """
-        composition = {}
-        for char in sequence:
-            composition[char] = composition.get(char, 0) + 1
+        if not sequence.isascii():
+            return dict(Counter(sequence))
         
-        return composition
+        counts = np.bincount(np.frombuffer(sequence.encode('ascii'), dtype=np.uint8))
+        chars = sorted((chr(code) for code in np.flatnonzero(counts)), key=sequence.find)
+        return {char: int(counts[ord(char)]) for char in chars}
     
     def _validate_sequence_characters(self, sequence: str, 
-                                    molecular_type: str) -> List[str]:
+                                    molecular_type: str,
+                                    composition: Optional[Dict[str, int]] = None) -> List[str]:
         """
         验证序列字符是否符合分子类型
         
         Args:
             sequence: 序列字符串
             molecular_type: 分子类型
+            composition: 序列组成，已计算时传入以免再次遍历序列
             
         Returns:
             List[str]: 错误信息列表
@@ -238,17 +457,10 @@ class BaseSequenceParser(ABC):
             errors.append("序列为空")
             return errors
         
-        # 定义各类型允许的字符
-        allowed_chars = {
-            'protein': set('ACDEFGHIKLMNPQRSTVWY*-'),
-            'dna': set('ATCGNRYSWKMBDHV*-'),  # 包括IUPAC核酸代码
-            'rna': set('AUCGNRYSWKMBDHV*-'),  # 包括IUPAC核酸代码
-            'unknown': set('ABCDEFGHIJKLMNOPQRSTUVWXYZ*-')  # 允许所有字母
-        }
-        
-        if molecular_type in allowed_chars:
-            valid_chars = allowed_chars[molecular_type]
-            invalid_chars = set(sequence.upper()) - valid_chars
+        if molecular_type in _ALLOWED_CHARS:
+            valid_chars = _ALLOWED_CHARS[molecular_type]
+            chars = composition.keys() if composition is not None else set(sequence)
+            invalid_chars = {char.upper() for char in chars} - valid_chars
             
             if invalid_chars:
                 errors.append(
@@ -256,43 +468,3 @@ class BaseSequenceParser(ABC):
                 )
         
         return errors
-    
-    def _create_basic_validation_result(self, 
-                                      sequences: List[SequenceRecord]) -> ValidationResult:
-        """
-        创建基础验证结果
-        
-        Args:
-            sequences: 序列记录列表
-            
-        Returns:
-            ValidationResult: 验证结果
-        """
-        errors = []
-        warnings = []
-        
-        if not sequences:
-            errors.append("未解析到任何序列")
-        
-        # 检查序列ID唯一性
-        sequence_ids = [seq.sequence_id for seq in sequences]
-        duplicates = set([sid for sid in sequence_ids if sequence_ids.count(sid) > 1])
-        
-        if duplicates:
-            warnings.append(f"发现重复的序列ID: {sorted(duplicates)}")
-        
-        # 检查序列长度
-        for i, seq in enumerate(sequences):
-            seq_length = seq.sequence_data.length
-            if seq_length == 0:
-                errors.append(f"序列{i+1} ({seq.sequence_id}) 长度为0")
-            elif seq_length < 10:
-                warnings.append(f"序列{i+1} ({seq.sequence_id}) 长度过短: {seq_length}")
-        
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            total_errors=len(errors),
-            total_warnings=len(warnings),
-            errors=errors,
-            warnings=warnings
-        )
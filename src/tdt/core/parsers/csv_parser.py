@@ -7,7 +7,7 @@ CSV格式序列解析器
 import csv
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from .base import BaseSequenceParser, ParsingError
 from ...models.sequence_record import (
@@ -18,16 +18,20 @@ from ...models.sequence_record import (
     SequenceAnnotations,
     SequenceValidation
 )
-from ...models.processing_models import ValidationResult
 from ...models.format_models import SequenceFormat
 
 
 class CsvParser(BaseSequenceParser):
     """CSV格式序列解析器"""
     
-    def __init__(self):
-        """初始化CSV解析器"""
-        super().__init__(SequenceFormat.CSV)
+    def __init__(self, validate_models: bool = False):
+        """
+        初始化CSV解析器
+        
+        Args:
+            validate_models: 是否对创建的模型执行完整的Pydantic验证
+        """
+        super().__init__(SequenceFormat.CSV, validate_models)
         
         # 预定义的列名映射
         self.column_mappings = {
@@ -57,6 +61,25 @@ class CsvParser(BaseSequenceParser):
         Returns:
             List[SequenceRecord]: 解析出的序列记录列表
             
+        Raises:
+            ParsingError: 解析错误
+            FileNotFoundError: 文件不存在
+        """
+        sequences = list(self.iter_parse(file_path))
+        
+        self.logger.info(f"成功解析CSV文件 {file_path}，共{len(sequences)}个序列")
+        return sequences
+    
+    def iter_parse(self, file_path: Path) -> Iterator[SequenceRecord]:
+        """
+        逐行解析CSV文件，每行产出一条序列记录
+        
+        Args:
+            file_path: CSV文件路径
+            
+        Yields:
+            SequenceRecord: 序列记录
+            
         Raises:
             ParsingError: 解析错误
             FileNotFoundError: 文件不存在
@@ -66,7 +89,7 @@ class CsvParser(BaseSequenceParser):
         # 检测分隔符
         delimiter = self._detect_delimiter(file_path)
         
-        sequences = []
+        sequence_count = 0
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -85,13 +108,14 @@ class CsvParser(BaseSequenceParser):
                         sequence_record = self._create_sequence_record_from_row(
                             row, column_mapping, file_path, row_number
                         )
-                        sequences.append(sequence_record)
                     except Exception as e:
                         raise ParsingError(
                             f"处理第{row_number}行数据时出错: {e}",
                             row_number,
                             {"row_data": row, "original_error": str(e)}
                         )
+                    yield sequence_record
+                    sequence_count += 1
         
         except UnicodeDecodeError as e:
             raise ParsingError(
@@ -111,11 +135,8 @@ class CsvParser(BaseSequenceParser):
                 context={"original_error": str(e)}
             )
         
-        if not sequences:
+        if sequence_count == 0:
             raise ParsingError("CSV文件中未找到任何有效的序列记录")
-        
-        self.logger.info(f"成功解析CSV文件 {file_path}，共{len(sequences)}个序列")
-        return sequences
     
     def _detect_delimiter(self, file_path: Path) -> str:
         """
@@ -269,9 +290,10 @@ class CsvParser(BaseSequenceParser):
         if molecular_type:
             # 标准化分子类型
             molecular_type = self._normalize_molecular_type(molecular_type)
-        else:
-            # 自动检测
-            molecular_type = self._detect_molecular_type(cleaned_sequence)
+        
+        # 一次统计序列组成、分子类型（未声明时自动检测）和无效字符
+        profile = self._profile_sequence(cleaned_sequence, molecular_type or None)
+        molecular_type = profile.molecular_type
         
         # 长度信息
         length_str = self._get_field_value(row, column_mapping, 'length')
@@ -284,9 +306,9 @@ class CsvParser(BaseSequenceParser):
                 f"序列 {sequence_id} 长度不一致: 声明={expected_length}, 实际={actual_length}"
             )
         
-        # 计算序列组成
-        composition_dict = self._calculate_composition(cleaned_sequence)
-        composition = SequenceComposition(
+        # 序列组成
+        composition_dict = profile.composition
+        composition = self._construct(SequenceComposition,
             composition=composition_dict,
             total_residues=actual_length,
             most_frequent=max(composition_dict.items(), key=lambda x: x[1])[0],
@@ -297,7 +319,7 @@ class CsvParser(BaseSequenceParser):
         checksum = hashlib.sha256(cleaned_sequence.encode()).hexdigest()[:16]
         
         # 创建序列数据
-        sequence_data = SequenceData(
+        sequence_data = self._construct(SequenceData,
             raw_sequence=raw_sequence,
             cleaned_sequence=cleaned_sequence,
             length=actual_length,
@@ -307,7 +329,7 @@ class CsvParser(BaseSequenceParser):
         )
         
         # 创建来源信息
-        source = SequenceSource(
+        source = self._construct(SequenceSource,
             file_path=str(file_path),
             file_format="csv",
             line_start=row_number,
@@ -327,15 +349,15 @@ class CsvParser(BaseSequenceParser):
             annotations.custom_annotations['csv_extra_fields'] = csv_data
         
         # 验证序列
-        sequence_errors = self._validate_sequence_characters(cleaned_sequence, molecular_type)
+        sequence_errors = profile.errors
         
-        validation = SequenceValidation(
+        validation = self._construct(SequenceValidation,
             is_valid=len(sequence_errors) == 0,
             errors=sequence_errors
         )
         
         # 创建序列记录
-        sequence_record = SequenceRecord(
+        sequence_record = self._construct(SequenceRecord,
             sequence_id=sequence_id,
             sequence_name=sequence_name,
             description=description,
@@ -394,61 +416,60 @@ class CsvParser(BaseSequenceParser):
         
         return type_mapping.get(mol_type_lower, 'unknown')
     
-    def validate(self, sequences: List[SequenceRecord]) -> ValidationResult:
+    def record_issues(self, index: int, 
+                      sequence: SequenceRecord) -> Tuple[List[str], List[str]]:
         """
-        验证CSV解析结果
+        检查单条CSV序列的问题
         
         Args:
-            sequences: 序列记录列表
+            index: 序列索引（从0开始）
+            sequence: 序列记录
             
         Returns:
-            ValidationResult: 验证结果
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
         """
-        # 获取基础验证结果
-        result = self._create_basic_validation_result(sequences)
-        
-        # CSV特定验证
-        csv_errors = []
-        csv_warnings = []
-        
-        # 检查数据完整性
-        for i, seq in enumerate(sequences):
-            # 检查序列ID的唯一性（这在基础验证中已有，但我们可以加强）
-            if not seq.sequence_id or seq.sequence_id.startswith('seq_'):
-                csv_warnings.append(
-                    f"序列{i+1}使用了自动生成的ID: {seq.sequence_id}"
-                )
+        warnings = []
+        
+        # 检查序列ID的唯一性（这在基础验证中已有，但我们可以加强）
+        if not sequence.sequence_id or sequence.sequence_id.startswith('seq_'):
+            warnings.append(
+                f"序列{index+1}使用了自动生成的ID: {sequence.sequence_id}"
+            )
+        
+        # 检查分子类型一致性
+        if sequence.sequence_data.molecular_type == 'unknown':
+            warnings.append(
+                f"序列{index+1} ({sequence.sequence_id}) 的分子类型未能确定"
+            )
+        
+        return [], warnings
+    
+    def summary_issues(self, lengths: Sequence[int]) -> Tuple[List[str], List[str]]:
+        """
+        检查序列长度分布
+        
+        Args:
+            lengths: 序列长度列表
             
-            # 检查分子类型一致性
-            if seq.sequence_data.molecular_type == 'unknown':
-                csv_warnings.append(
-                    f"序列{i+1} ({seq.sequence_id}) 的分子类型未能确定"
-                )
+        Returns:
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
+        """
+        warnings = []
         
-        # 检查数据质量
-        if sequences:
-            # 检查序列长度分布
-            lengths = [seq.sequence_data.length for seq in sequences]
+        if lengths:
             avg_length = sum(lengths) / len(lengths)
             
-            extremely_short = [seq for seq in sequences if seq.sequence_data.length < avg_length * 0.1]
-            extremely_long = [seq for seq in sequences if seq.sequence_data.length > avg_length * 10]
+            extremely_short = sum(1 for length in lengths if length < avg_length * 0.1)
+            extremely_long = sum(1 for length in lengths if length > avg_length * 10)
             
             if extremely_short:
-                csv_warnings.append(
-                    f"发现{len(extremely_short)}个异常短的序列（少于平均长度的10%）"
+                warnings.append(
+                    f"发现{extremely_short}个异常短的序列（少于平均长度的10%）"
                 )
             
             if extremely_long:
-                csv_warnings.append(
-                    f"发现{len(extremely_long)}个异常长的序列（超过平均长度的10倍）"
+                warnings.append(
+                    f"发现{extremely_long}个异常长的序列（超过平均长度的10倍）"
                 )
         
-        # 合并验证结果
-        result.errors.extend(csv_errors)
-        result.warnings.extend(csv_warnings)
-        result.total_errors = len(result.errors)
-        result.total_warnings = len(result.warnings)
-        result.is_valid = result.total_errors == 0
-        
-        return result
+        return [], warnings
@@ -7,7 +7,7 @@ FASTA格式序列解析器
 import hashlib
 import re
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 from .base import BaseSequenceParser, ParsingError
 from ...models.sequence_record import (
@@ -18,16 +18,20 @@ from ...models.sequence_record import (
     SequenceAnnotations,
     SequenceValidation
 )
-from ...models.processing_models import ValidationResult
 from ...models.format_models import SequenceFormat
 
 
 class FastaParser(BaseSequenceParser):
     """FASTA格式序列解析器"""
     
-    def __init__(self):
-        """初始化FASTA解析器"""
-        super().__init__(SequenceFormat.FASTA)
+    def __init__(self, validate_models: bool = False):
+        """
+        初始化FASTA解析器
+        
+        Args:
+            validate_models: 是否对创建的模型执行完整的Pydantic验证
+        """
+        super().__init__(SequenceFormat.FASTA, validate_models)
     
     def parse(self, file_path: Path) -> List[SequenceRecord]:
         """
@@ -39,13 +43,32 @@ class FastaParser(BaseSequenceParser):
         Returns:
             List[SequenceRecord]: 解析出的序列记录列表
             
+        Raises:
+            ParsingError: 解析错误
+            FileNotFoundError: 文件不存在
+        """
+        sequences = list(self.iter_parse(file_path))
+        
+        self.logger.info(f"成功解析FASTA文件 {file_path}，共{len(sequences)}个序列")
+        return sequences
+    
+    def iter_parse(self, file_path: Path) -> Iterator[SequenceRecord]:
+        """
+        逐条解析FASTA文件，每读完一条序列即产出记录
+        
+        Args:
+            file_path: FASTA文件路径
+            
+        Yields:
+            SequenceRecord: 序列记录
+            
         Raises:
             ParsingError: 解析错误
             FileNotFoundError: 文件不存在
         """
         self._validate_file(file_path)
         
-        sequences = []
+        sequence_count = 0
         current_header = None
         current_sequence_lines = []
         line_number = 0
@@ -63,13 +86,13 @@ class FastaParser(BaseSequenceParser):
                     if line.startswith('>'):
                         # 如果已经有序列数据，先处理之前的序列
                         if current_header is not None:
-                            sequence_record = self._create_sequence_record(
+                            yield self._create_sequence_record(
                                 current_header,
                                 current_sequence_lines,
                                 file_path,
-                                len(sequences)
+                                sequence_count
                             )
-                            sequences.append(sequence_record)
+                            sequence_count += 1
                         
                         # 开始新序列
                         current_header = line
@@ -87,13 +110,13 @@ class FastaParser(BaseSequenceParser):
                 
                 # 处理最后一个序列
                 if current_header is not None:
-                    sequence_record = self._create_sequence_record(
+                    yield self._create_sequence_record(
                         current_header,
                         current_sequence_lines,
                         file_path,
-                        len(sequences)
+                        sequence_count
                     )
-                    sequences.append(sequence_record)
+                    sequence_count += 1
         
         except UnicodeDecodeError as e:
             raise ParsingError(
@@ -110,11 +133,8 @@ class FastaParser(BaseSequenceParser):
                 {"original_error": str(e)}
             )
         
-        if not sequences:
+        if sequence_count == 0:
             raise ParsingError("文件中未找到任何有效的FASTA序列")
-        
-        self.logger.info(f"成功解析FASTA文件 {file_path}，共{len(sequences)}个序列")
-        return sequences
     
     def _create_sequence_record(self, header_line: str, 
                               sequence_lines: List[str],
@@ -145,12 +165,13 @@ class FastaParser(BaseSequenceParser):
                 context={"sequence_id": sequence_id}
             )
         
-        # 检测分子类型
-        molecular_type = self._detect_molecular_type(cleaned_sequence)
+        # 一次统计序列组成、分子类型和无效字符
+        profile = self._profile_sequence(cleaned_sequence)
+        molecular_type = profile.molecular_type
         
-        # 计算序列组成
-        composition_dict = self._calculate_composition(cleaned_sequence)
-        composition = SequenceComposition(
+        # 序列组成
+        composition_dict = profile.composition
+        composition = self._construct(SequenceComposition,
             composition=composition_dict,
             total_residues=len(cleaned_sequence),
             most_frequent=max(composition_dict.items(), key=lambda x: x[1])[0],
@@ -161,7 +182,7 @@ class FastaParser(BaseSequenceParser):
         checksum = hashlib.sha256(cleaned_sequence.encode()).hexdigest()[:16]
         
         # 创建序列数据
-        sequence_data = SequenceData(
+        sequence_data = self._construct(SequenceData,
             raw_sequence=raw_sequence,
             cleaned_sequence=cleaned_sequence,
             length=len(cleaned_sequence),
@@ -171,24 +192,22 @@ class FastaParser(BaseSequenceParser):
         )
         
         # 创建来源信息
-        source = SequenceSource(
+        source = self._construct(SequenceSource,
             file_path=str(file_path),
             file_format="fasta",
             original_header=header_line
         )
         
         # 验证序列
-        sequence_errors = self._validate_sequence_characters(
-            cleaned_sequence, molecular_type
-        )
+        sequence_errors = profile.errors
         
-        validation = SequenceValidation(
+        validation = self._construct(SequenceValidation,
             is_valid=len(sequence_errors) == 0,
             errors=sequence_errors
         )
         
         # 创建序列记录
-        sequence_record = SequenceRecord(
+        sequence_record = self._construct(SequenceRecord,
             sequence_id=sequence_id,
             sequence_name=name,
             description=description,
@@ -330,46 +349,36 @@ class FastaParser(BaseSequenceParser):
         
         return keywords
     
-    def validate(self, sequences: List[SequenceRecord]) -> ValidationResult:
+    def record_issues(self, index: int, 
+                      sequence: SequenceRecord) -> Tuple[List[str], List[str]]:
         """
-        验证FASTA解析结果
+        检查单条FASTA序列的问题
         
         Args:
-            sequences: 序列记录列表
+            index: 序列索引（从0开始）
+            sequence: 序列记录
             
         Returns:
-            ValidationResult: 验证结果
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
         """
-        # 获取基础验证结果
-        result = self._create_basic_validation_result(sequences)
+        errors = []
+        warnings = []
+        
+        # 检查序列ID格式
+        if not sequence.sequence_id or len(sequence.sequence_id.strip()) == 0:
+            errors.append(f"序列{index+1}的ID为空")
+        
+        # 检查序列字符（组成字典的键即序列中出现的全部字符）
+        residues = ''.join(sequence.sequence_data.composition.composition)
+        if re.search(r'[^A-Za-z\-\*]', residues):
+            warnings.append(
+                f"序列{index+1} ({sequence.sequence_id}) 包含非标准字符"
+            )
         
-        # FASTA特定验证
-        fasta_errors = []
-        fasta_warnings = []
+        # 检查序列长度合理性
+        if sequence.sequence_data.length > 50000:
+            warnings.append(
+                f"序列{index+1} ({sequence.sequence_id}) 长度异常大: {sequence.sequence_data.length}"
+            )
         
-        for i, seq in enumerate(sequences):
-            # 检查序列ID格式
-            if not seq.sequence_id or len(seq.sequence_id.strip()) == 0:
-                fasta_errors.append(f"序列{i+1}的ID为空")
-            
-            # 检查序列字符
-            cleaned_seq = seq.sequence_data.cleaned_sequence
-            if re.search(r'[^A-Za-z\-\*]', cleaned_seq):
-                fasta_warnings.append(
-                    f"序列{i+1} ({seq.sequence_id}) 包含非标准字符"
-                )
-            
-            # 检查序列长度合理性
-            if seq.sequence_data.length > 50000:
-                fasta_warnings.append(
-                    f"序列{i+1} ({seq.sequence_id}) 长度异常大: {seq.sequence_data.length}"
-                )
-        
-        # 合并验证结果
-        result.errors.extend(fasta_errors)
-        result.warnings.extend(fasta_warnings)
-        result.total_errors = len(result.errors)
-        result.total_warnings = len(result.warnings)
-        result.is_valid = result.total_errors == 0
-        
-        return result
+        return errors, warnings
@@ -0,0 +1,398 @@
+"""
+WIPO ST.26 XML序列表解析器
+
+使用增量XML解析逐条读取ST.26序列表，每读完一个 SequenceData 元素即产出记录并释放，
+内存占用与序列表大小无关。
+"""
+
+import hashlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import BaseSequenceParser, ParsingError
+from ...models.sequence_record import (
+    SequenceRecord,
+    SequenceData,
+    SequenceComposition,
+    SequenceSource,
+    SequenceAnnotations,
+    SequenceValidation
+)
+from ...models.processing_models import ValidationResult
+from ...models.format_models import SequenceFormat
+
+ST26_ROOT_TAG = "ST26SequenceListing"
+
+# INSDSeq_moltype 到分子类型的映射
+_MOLTYPE_MAPPING = {
+    "AA": "protein",
+    "DNA": "dna",
+    "RNA": "rna",
+}
+
+# ST.26 中有意省略的序列以 "000" 占位
+_SKIPPED_SEQUENCE = "000"
+
+
+class St26Parser(BaseSequenceParser):
+    """WIPO ST.26 XML序列表解析器"""
+
+    def __init__(self, validate_models: bool = False):
+        """
+        初始化ST.26解析器
+        
+        Args:
+            validate_models: 是否对创建的模型执行完整的Pydantic验证
+        """
+        super().__init__(SequenceFormat.ST26, validate_models)
+
+    def parse(self, file_path: Path) -> List[SequenceRecord]:
+        """
+        解析ST.26序列表
+
+        Args:
+            file_path: XML文件路径
+
+        Returns:
+            List[SequenceRecord]: 解析出的序列记录列表
+
+        Raises:
+            ParsingError: 解析错误
+            FileNotFoundError: 文件不存在
+        """
+        sequences = list(self.iter_parse(file_path))
+
+        self.logger.info(f"成功解析ST.26序列表 {file_path}，共{len(sequences)}个序列")
+        return sequences
+
+    def iter_parse(self, file_path: Path) -> Iterator[SequenceRecord]:
+        """
+        逐条解析ST.26序列表，每读完一个 SequenceData 元素即产出记录
+
+        已处理的元素随即从文档树中清除；有意省略（序列为 000）的条目不产出记录。
+
+        Args:
+            file_path: XML文件路径
+
+        Yields:
+            SequenceRecord: 序列记录
+
+        Raises:
+            ParsingError: 解析错误
+            FileNotFoundError: 文件不存在
+        """
+        self._validate_file(file_path)
+
+        listing_info: Dict[str, Any] = {}
+        root = None
+        entry_count = 0
+        sequence_count = 0
+
+        try:
+            for event, elem in ET.iterparse(str(file_path), events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                        if elem.tag != ST26_ROOT_TAG:
+                            raise ParsingError(
+                                f"根元素应为 {ST26_ROOT_TAG}，实际为 {elem.tag}"
+                            )
+                        listing_info.update({
+                            key: elem.get(attribute)
+                            for key, attribute in (
+                                ("dtd_version", "dtdVersion"),
+                                ("file_name", "fileName"),
+                                ("production_date", "productionDate"),
+                            )
+                            if elem.get(attribute)
+                        })
+                    continue
+
+                if elem.tag == "SequenceData":
+                    entry_count += 1
+                    record = self._create_sequence_record(elem, file_path, listing_info)
+                    # 释放已处理的元素，保持内存占用恒定
+                    root.clear()
+                    if record is not None:
+                        sequence_count += 1
+                        yield record
+                elif elem.tag == "SequenceTotalQuantity":
+                    listing_info["sequence_total_quantity"] = self._parse_int(elem.text)
+                elif elem.tag == "ApplicationIdentification":
+                    office = (elem.findtext("IPOfficeCode") or "").strip()
+                    number = (elem.findtext("ApplicationNumberText") or "").strip()
+                    if number:
+                        listing_info["application_number"] = f"{office}{number}"
+                elif elem.tag == "ApplicantFileReference":
+                    listing_info["applicant_file_reference"] = (elem.text or "").strip()
+                elif elem.tag == "InventionTitle" and "invention_title" not in listing_info:
+                    listing_info["invention_title"] = (elem.text or "").strip()
+
+        except ET.ParseError as e:
+            line_number = e.position[0] if getattr(e, 'position', None) else None
+            raise ParsingError(
+                f"XML格式错误: {e}",
+                line_number,
+                {"original_error": str(e)}
+            )
+
+        if entry_count == 0:
+            raise ParsingError("序列表中未找到任何 SequenceData 条目")
+
+        declared_total = listing_info.get("sequence_total_quantity")
+        if declared_total is not None and declared_total != entry_count:
+            self.logger.warning(
+                f"{file_path}: SequenceTotalQuantity 声明{declared_total}条，实际{entry_count}条"
+            )
+        if entry_count > sequence_count:
+            self.logger.info(f"{file_path}: 跳过{entry_count - sequence_count}条有意省略的序列")
+
+    def _create_sequence_record(self, elem: ET.Element, file_path: Path,
+                                listing_info: Dict[str, Any]) -> Optional[SequenceRecord]:
+        """
+        由 SequenceData 元素创建序列记录
+
+        Args:
+            elem: SequenceData 元素
+            file_path: 文件路径
+            listing_info: 序列表级别的信息
+
+        Returns:
+            Optional[SequenceRecord]: 序列记录，有意省略的条目返回 None
+
+        Raises:
+            ParsingError: 条目缺少必要信息
+        """
+        id_number = (elem.get("sequenceIDNumber") or "").strip()
+        if not id_number:
+            raise ParsingError("SequenceData 缺少 sequenceIDNumber 属性")
+        sequence_id = f"SEQ_ID_NO_{id_number}"
+
+        insd_seq = elem.find("INSDSeq")
+        if insd_seq is None:
+            raise ParsingError(
+                f"序列 {sequence_id} 缺少 INSDSeq 元素",
+                context={"sequence_id": sequence_id}
+            )
+
+        raw_sequence = "".join((insd_seq.findtext("INSDSeq_sequence") or "").split())
+        if raw_sequence == _SKIPPED_SEQUENCE:
+            return None
+
+        cleaned_sequence = self._clean_sequence(raw_sequence)
+        if not cleaned_sequence:
+            raise ParsingError(
+                f"序列 {sequence_id} 的序列数据为空",
+                context={"sequence_id": sequence_id}
+            )
+
+        moltype = (insd_seq.findtext("INSDSeq_moltype") or "").strip().upper()
+        molecular_type = _MOLTYPE_MAPPING.get(moltype)
+        # ST.26 中RNA序列的尿嘧啶同样以 t 表示
+        if molecular_type == "rna":
+            cleaned_sequence = cleaned_sequence.replace("T", "U")
+
+        # 一次统计序列组成、分子类型（moltype无法识别时自动检测）和无效字符
+        profile = self._profile_sequence(cleaned_sequence, molecular_type)
+        molecular_type = profile.molecular_type
+
+        # 含有分子类型之外的残基（如蛋白质中的 X、U、O）时不做分子类型约束
+        warnings = []
+        if profile.errors:
+            warnings.extend(profile.errors)
+            molecular_type = "unknown"
+
+        features, source_qualifiers = self._parse_features(insd_seq)
+        annotations = self._build_annotations(
+            id_number, moltype, insd_seq, features, source_qualifiers, listing_info
+        )
+
+        composition_dict = profile.composition
+        composition = self._construct(SequenceComposition,
+            composition=composition_dict,
+            total_residues=len(cleaned_sequence),
+            most_frequent=max(composition_dict.items(), key=lambda x: x[1])[0],
+            least_frequent=min(composition_dict.items(), key=lambda x: x[1])[0]
+        )
+
+        sequence_data = self._construct(SequenceData,
+            raw_sequence=raw_sequence,
+            cleaned_sequence=cleaned_sequence,
+            length=len(cleaned_sequence),
+            molecular_type=molecular_type,
+            checksum=hashlib.sha256(cleaned_sequence.encode()).hexdigest()[:16],
+            composition=composition
+        )
+
+        source = self._construct(SequenceSource,
+            file_path=str(file_path),
+            file_format="st26",
+            original_header=f"SEQ ID NO: {id_number}"
+        )
+
+        notes = [value for name, value in source_qualifiers if name.lower() == "note" and value]
+
+        return self._construct(SequenceRecord,
+            sequence_id=sequence_id,
+            sequence_name=f"SEQ ID NO: {id_number}",
+            description="; ".join(notes),
+            source=source,
+            sequence_data=sequence_data,
+            annotations=annotations,
+            validation=self._construct(SequenceValidation, is_valid=True, warnings=warnings)
+        )
+
+    def _parse_features(self, insd_seq: ET.Element
+                        ) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """
+        解析特征表
+
+        Args:
+            insd_seq: INSDSeq 元素
+
+        Returns:
+            Tuple: (source 以外的特征列表, source 特征的限定词列表)
+        """
+        features = []
+        source_qualifiers: List[Tuple[str, str]] = []
+
+        for feature in insd_seq.iter("INSDFeature"):
+            key = (feature.findtext("INSDFeature_key") or "").strip()
+            qualifiers = [
+                (
+                    (qualifier.findtext("INSDQualifier_name") or "").strip(),
+                    (qualifier.findtext("INSDQualifier_value") or "").strip()
+                )
+                for qualifier in feature.iter("INSDQualifier")
+            ]
+
+            if key == "source" and not source_qualifiers:
+                source_qualifiers = qualifiers
+                continue
+
+            feature_info: Dict[str, Any] = {
+                "key": key,
+                "location": (feature.findtext("INSDFeature_location") or "").strip(),
+            }
+            if qualifiers:
+                feature_info["qualifiers"] = [
+                    {"name": name, "value": value} for name, value in qualifiers
+                ]
+            features.append(feature_info)
+
+        return features, source_qualifiers
+
+    def _build_annotations(self, id_number: str, moltype: str, insd_seq: ET.Element,
+                           features: List[Dict[str, Any]],
+                           source_qualifiers: List[Tuple[str, str]],
+                           listing_info: Dict[str, Any]) -> SequenceAnnotations:
+        """
+        将ST.26限定词映射为序列注释
+
+        Args:
+            id_number: 序列编号
+            moltype: INSDSeq_moltype
+            insd_seq: INSDSeq 元素
+            features: source 以外的特征
+            source_qualifiers: source 特征的限定词
+            listing_info: 序列表级别的信息
+
+        Returns:
+            SequenceAnnotations: 注释信息
+        """
+        qualifier_values: Dict[str, str] = {}
+        for name, value in source_qualifiers:
+            qualifier_values.setdefault(name.lower(), value)
+
+        products = [
+            qualifier["value"]
+            for feature in features
+            for qualifier in feature.get("qualifiers", [])
+            if qualifier["name"].lower() == "product" and qualifier["value"]
+        ]
+
+        custom_annotations: Dict[str, Any] = {
+            "sequence_id_number": self._parse_int(id_number),
+            "moltype": moltype,
+            "declared_length": self._parse_int(insd_seq.findtext("INSDSeq_length")),
+            "header_format": "st26",
+        }
+        if qualifier_values.get("mol_type"):
+            custom_annotations["mol_type"] = qualifier_values["mol_type"]
+        if features:
+            custom_annotations["features"] = features
+        custom_annotations.update(listing_info)
+
+        return SequenceAnnotations(
+            organism=qualifier_values.get("organism", ""),
+            function=products[0] if products else "",
+            custom_annotations=custom_annotations
+        )
+
+    @staticmethod
+    def _parse_int(text: Optional[str]) -> Optional[int]:
+        """解析整数文本，无法解析时返回 None"""
+        try:
+            return int((text or "").strip())
+        except ValueError:
+            return None
+
+    def validate(self, sequences: List[SequenceRecord]) -> ValidationResult:
+        """
+        验证ST.26解析结果
+
+        Args:
+            sequences: 序列记录列表
+
+        Returns:
+            ValidationResult: 验证结果
+        """
+        result = super().validate(sequences)
+
+        declared_total = (
+            sequences[0].annotations.custom_annotations.get("sequence_total_quantity")
+            if sequences else None
+        )
+        if declared_total is not None and declared_total != len(sequences):
+            result.warnings.append(
+                f"SequenceTotalQuantity 声明{declared_total}条序列，解析到{len(sequences)}条"
+                f"（其余为有意省略的序列）"
+            )
+
+        result.total_errors = len(result.errors)
+        result.total_warnings = len(result.warnings)
+        result.is_valid = result.total_errors == 0
+
+        return result
+
+    def record_issues(self, index: int,
+                      sequence: SequenceRecord) -> Tuple[List[str], List[str]]:
+        """
+        检查单条ST.26序列的问题
+
+        Args:
+            index: 序列索引（从0开始）
+            sequence: 序列记录
+
+        Returns:
+            Tuple[List[str], List[str]]: (错误列表, 警告列表)
+        """
+        errors = []
+        warnings = list(sequence.validation.warnings)
+        custom = sequence.annotations.custom_annotations
+
+        declared_length = custom.get("declared_length")
+        if declared_length is not None and declared_length != sequence.sequence_data.length:
+            errors.append(
+                f"序列{index+1} ({sequence.sequence_id}) 长度与 INSDSeq_length 不一致: "
+                f"{sequence.sequence_data.length} != {declared_length}"
+            )
+
+        if custom.get("moltype") not in _MOLTYPE_MAPPING:
+            warnings.append(
+                f"序列{index+1} ({sequence.sequence_id}) 的 INSDSeq_moltype 无法识别: "
+                f"{custom.get('moltype')!r}"
+            )
+
+        return errors, warnings
@@ -0,0 +1,554 @@
+"""
+多专利流水线
+
+将PDF权利要求书提取、权利要求书解析、序列处理和LLM规则生成组织为
+由有界队列连接的多个阶段，各阶段同时运行：CPU密集的PDF/序列解析
+（可放入进程池）与等待网络的LLM调用相互重叠。阶段之间直接传递内存中的
+对象，中间文件只作为产出写出，不再被下游重新读取。
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .. import __version__
+from .data_loader import DataLoader
+from .extractor import ClaimsExtractor
+from .manifest import ProcessingManifest
+from .parser import PDFParser
+from .rule_generator import IntelligentRuleGenerator
+from .sequence_processor import UnifiedSequenceProcessor
+from ..models.claims_models import ClaimsDocument
+from ..models.processing_models import ProcessingStatus
+from ..models.rule_models import RuleGenerationResult
+from ..models.sequence_record import SequenceProcessingResult
+from ..utils.file_utils import ensure_output_dir, get_output_filename, get_pdf_files_in_directory
+
+logger = logging.getLogger(__name__)
+
+# 阶段之间队列的默认容量，限制在途专利数以控制内存占用
+DEFAULT_QUEUE_SIZE = 4
+
+STAGE_EXTRACT = "extract"
+STAGE_CLAIMS = "claims"
+STAGE_SEQUENCES = "sequences"
+STAGE_RULES = "rules"
+
+# 通知下游工作线程退出的哨兵
+_STOP = object()
+
+
+@dataclass
+class PatentJob:
+    """流水线中的单个专利任务，各阶段依次填充其中的字段"""
+    patent_id: str
+    pdf_path: Path
+    sequence_path: Optional[Path] = None
+    claims_path: Optional[Path] = None
+    claims_markdown: Optional[str] = None
+    claims_doc: Optional[ClaimsDocument] = None
+    sequence_data: Optional[SequenceProcessingResult] = None
+    result: Optional[RuleGenerationResult] = None
+    output_files: List[Path] = field(default_factory=list)
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+    skipped: bool = False
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> bool:
+        """是否已完成全部阶段（含因输入未变化而跳过）"""
+        return self.error is None and (self.result is not None or self.skipped)
+
+
+@dataclass
+class StageMetrics:
+    """单个阶段的吞吐统计"""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    idle_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+    def throughput(self, elapsed_seconds: float) -> float:
+        """按流水线总耗时计算的每分钟处理数"""
+        return self.processed * 60.0 / elapsed_seconds if elapsed_seconds > 0 else 0.0
+
+    def utilization(self, elapsed_seconds: float) -> float:
+        """工作线程忙碌时间占比"""
+        capacity = self.workers * elapsed_seconds
+        return self.busy_seconds / capacity if capacity > 0 else 0.0
+
+    def to_dict(self, elapsed_seconds: float) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "idle_seconds": round(self.idle_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "per_minute": round(self.throughput(elapsed_seconds), 2),
+            "utilization": round(self.utilization(elapsed_seconds), 3),
+        }
+
+
+@dataclass
+class PipelineResult:
+    """流水线运行结果"""
+    jobs: List[PatentJob]
+    stages: List[StageMetrics]
+    elapsed_seconds: float
+
+    @property
+    def succeeded(self) -> List[PatentJob]:
+        return [job for job in self.jobs if job.succeeded]
+
+    @property
+    def failed(self) -> List[PatentJob]:
+        return [job for job in self.jobs if not job.succeeded]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可写入JSON的字典"""
+        return {
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "total_patents": len(self.jobs),
+            "succeeded": len(self.succeeded),
+            "skipped": sum(1 for job in self.jobs if job.skipped),
+            "failed": len(self.failed),
+            "stages": [stage.to_dict(self.elapsed_seconds) for stage in self.stages],
+            "patents": [
+                {
+                    "patent_id": job.patent_id,
+                    "pdf_path": str(job.pdf_path),
+                    "sequence_path": str(job.sequence_path) if job.sequence_path else None,
+                    "status": (
+                        "skipped" if job.skipped else "success" if job.succeeded else "failed"
+                    ),
+                    "failed_stage": job.failed_stage,
+                    "error": job.error,
+                    "output_files": [str(path) for path in job.output_files],
+                    "stage_seconds": {
+                        name: round(seconds, 3) for name, seconds in job.stage_seconds.items()
+                    },
+                }
+                for job in self.jobs
+            ],
+        }
+
+
+def _extract_claims_task(task: Tuple[str, str, bool]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    提取PDF中的权利要求书并写出Markdown文件，可在工作进程中执行
+
+    Args:
+        task: (PDF文件路径, 输出目录, 是否按需解析)
+
+    Returns:
+        (输出文件路径, Markdown内容)，未找到权利要求书时均为 None
+    """
+    pdf_path, output_dir, lazy = task
+    parser = PDFParser()
+    extractor = ClaimsExtractor()
+
+    if lazy:
+        claims_content = extractor.extract_claims_lazy(parser, pdf_path)
+    else:
+        claims_content = extractor.extract_claims(parser.parse_pdf(pdf_path))
+    if not claims_content:
+        return None, None
+
+    markdown = extractor.format_claims(claims_content, pdf_path, "markdown")
+    output_path = ensure_output_dir(output_dir) / get_output_filename(pdf_path, "markdown")
+    output_path.write_text(markdown, encoding='utf-8')
+    return str(output_path), markdown
+
+
+def _process_sequences_task(task: Tuple[str, str]) -> SequenceProcessingResult:
+    """
+    处理序列文件并写出标准化JSON，可在工作进程中执行
+
+    Args:
+        task: (序列文件路径, 输出JSON路径)
+
+    Returns:
+        SequenceProcessingResult: 序列数据
+
+    Raises:
+        ValueError: 序列文件处理失败
+    """
+    sequence_path, output_path = task
+    result = UnifiedSequenceProcessor().process_file(sequence_path, output_path=output_path)
+    if result.status == ProcessingStatus.FAILED:
+        raise ValueError(f"序列文件处理失败: {'; '.join(result.validation.errors)}")
+    return DataLoader().convert_processing_result(result)
+
+
+class _Stage:
+    """流水线阶段：一组工作线程从输入队列取任务，处理后放入输出队列"""
+
+    def __init__(self, name: str, handler: Callable[[PatentJob], None], workers: int,
+                 input_queue: queue.Queue, output_queue: queue.Queue):
+        self.name = name
+        self.handler = handler
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.metrics = StageMetrics(name=name, workers=workers)
+        # 本阶段全部退出后需要向下游发送的哨兵数，由 PatentPipeline 连接阶段时设置
+        self.downstream_workers = 1
+        self._active = workers
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"pipeline-{name}-{index}", daemon=True)
+            for index in range(workers)
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self) -> None:
+        while True:
+            waited_at = time.perf_counter()
+            job = self.input_queue.get()
+            idle = time.perf_counter() - waited_at
+            if job is _STOP:
+                break
+
+            busy = 0.0
+            handled = job.error is None
+            failed = False
+            # 上游已失败的任务直接传递到末端，保持计数完整
+            if handled:
+                started_at = time.perf_counter()
+                try:
+                    self.handler(job)
+                except Exception as e:
+                    logger.error(f"[{self.name}] {job.patent_id} 处理失败: {e}")
+                    job.error = str(e)
+                    job.failed_stage = self.name
+                    failed = True
+                busy = time.perf_counter() - started_at
+                job.stage_seconds[self.name] = busy
+
+            blocked_at = time.perf_counter()
+            self.output_queue.put(job)
+            blocked = time.perf_counter() - blocked_at
+
+            with self._lock:
+                self.metrics.idle_seconds += idle
+                self.metrics.blocked_seconds += blocked
+                if handled:
+                    self.metrics.busy_seconds += busy
+                    self.metrics.processed += 1
+                    self.metrics.failed += int(failed)
+
+        with self._lock:
+            self._active -= 1
+            last = self._active == 0
+        if last:
+            for _ in range(self.downstream_workers):
+                self.output_queue.put(_STOP)
+
+
+class PatentPipeline:
+    """多专利流水线编排器"""
+
+    def __init__(self, generator: IntelligentRuleGenerator, output_dir: Path,
+                 existing_rules: Optional[Dict] = None, cpu_workers: int = 1,
+                 llm_workers: int = 2, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 lazy: bool = False, export_markdown: bool = False,
+                 manifest: Optional[ProcessingManifest] = None, force: bool = False):
+        """
+        初始化流水线
+
+        Args:
+            generator: 规则生成器，其LLM Agent 在所有专利间共享并发和限流配额
+            output_dir: 输出根目录，产出写入 markdowns/、sequences/、strategy/ 子目录
+            existing_rules: 现有规则数据，None 表示没有现有规则
+            cpu_workers: PDF提取和序列处理的并行数，大于1时使用进程池
+            llm_workers: 同时进行规则生成的专利数
+            queue_size: 阶段之间队列的容量
+            lazy: PDF是否按需解析，只完整提取权利要求书所在页面
+            export_markdown: 是否同时导出Markdown规则文档
+            manifest: 增量处理清单，提供时跳过输入、版本和参数均未变化的阶段
+            force: 忽略清单中的记录，重新处理全部专利（仍会更新清单）
+        """
+        self.generator = generator
+        self.output_dir = Path(output_dir)
+        self.existing_rules = existing_rules if existing_rules is not None else {"rules": []}
+        self.cpu_workers = max(1, cpu_workers)
+        self.llm_workers = max(1, llm_workers)
+        self.queue_size = max(1, queue_size)
+        self.lazy = lazy
+        self.export_markdown = export_markdown
+        self.manifest = manifest
+        self.force = force
+        self.data_loader = DataLoader()
+        self._executor: Optional[Executor] = None
+
+        # 影响各阶段输出的参数，参与清单比对
+        existing_rules_digest = hashlib.md5(
+            json.dumps(self.existing_rules, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        self._extract_params = {"format": "markdown", "lazy": lazy}
+        self._sequence_params = {"output_format": "json", "auto_detect_format": True, "stream": False}
+        self._sequence_version = UnifiedSequenceProcessor().processor_version
+        self._rules_params = {
+            "model": generator.llm_agent.model,
+            "lazy": lazy,
+            "export_markdown": export_markdown,
+            "existing_rules_md5": existing_rules_digest,
+            "chunk_token_budget": generator.chunk_token_budget,
+        }
+
+    @property
+    def markdown_dir(self) -> Path:
+        return self.output_dir / "markdowns"
+
+    @property
+    def sequence_dir(self) -> Path:
+        return self.output_dir / "sequences"
+
+    @property
+    def strategy_dir(self) -> Path:
+        return self.output_dir / "strategy"
+
+    @staticmethod
+    def discover_jobs(pdf_dir: Path, sequence_dir: Optional[Path] = None) -> List[PatentJob]:
+        """
+        在目录中查找PDF并按文件名匹配序列表
+
+        序列文件名与PDF同名（忽略扩展名大小写），或以PDF文件名加 _、-、. 开头时视为匹配，
+        例如 CN202210107337.pdf 对应 CN202210107337.FASTA 或 CN202210107337_seq.csv。
+
+        Args:
+            pdf_dir: PDF目录
+            sequence_dir: 序列表目录，默认与PDF目录相同
+
+        Returns:
+            List[PatentJob]: 按PDF文件名排序的任务列表
+        """
+        sequence_dir = Path(sequence_dir or pdf_dir)
+        processor = UnifiedSequenceProcessor()
+        extensions = {
+            extension
+            for format_type in processor.get_supported_formats()
+            for extension in processor._get_parser(format_type).get_supported_extensions()
+        }
+        sequence_files = sorted(
+            path for path in sequence_dir.iterdir()
+            if path.is_file() and path.suffix.lower().lstrip('.') in extensions
+        )
+
+        jobs = []
+        for pdf_path in get_pdf_files_in_directory(pdf_dir):
+            stem = pdf_path.stem.lower()
+            matches = [
+                path for path in sequence_files
+                if path.stem.lower() == stem
+                or any(path.stem.lower().startswith(stem + sep) for sep in "_-.")
+            ]
+            # 同名文件优先，其次按文件名排序
+            matches.sort(key=lambda path: (path.stem.lower() != stem, path.name))
+            if len(matches) > 1:
+                logger.warning(
+                    f"{pdf_path.name} 匹配到多个序列文件，使用 {matches[0].name}"
+                )
+            jobs.append(PatentJob(
+                patent_id=pdf_path.stem,
+                pdf_path=pdf_path,
+                sequence_path=matches[0] if matches else None
+            ))
+        return jobs
+
+    def run(self, jobs: List[PatentJob],
+            on_complete: Optional[Callable[[PatentJob], None]] = None) -> PipelineResult:
+        """
+        运行流水线
+
+        Args:
+            jobs: 专利任务列表
+            on_complete: 每个任务离开流水线时的回调（在调用线程中执行）
+
+        Returns:
+            PipelineResult: 运行结果，任务顺序与输入一致
+        """
+        stage_specs = [
+            (STAGE_EXTRACT, self._extract_claims, self.cpu_workers),
+            (STAGE_CLAIMS, self._parse_claims, 1),
+            (STAGE_SEQUENCES, self._process_sequences, self.cpu_workers),
+            (STAGE_RULES, self._generate_rules, self.llm_workers),
+        ]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stage_specs) + 1)]
+        stages = [
+            _Stage(name, handler, workers, queues[index], queues[index + 1])
+            for index, (name, handler, workers) in enumerate(stage_specs)
+        ]
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.downstream_workers = next_stage.metrics.workers
+
+        if self.cpu_workers > 1:
+            # 主进程中已有阶段线程和LLM事件循环线程，使用 spawn 避免 fork 复制锁状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+        # 规则的全部输入均未变化的专利无需进入流水线
+        pending = []
+        for job in jobs:
+            if self._is_current(STAGE_RULES, job.pdf_path, self._rules_inputs(job),
+                                params=self._rules_params):
+                job.skipped = True
+                job.output_files = self.manifest.outputs(STAGE_RULES, job.pdf_path)
+            else:
+                pending.append(job)
+
+        def feed() -> None:
+            for job in pending:
+                queues[0].put(job)
+            for _ in range(stages[0].metrics.workers):
+                queues[0].put(_STOP)
+
+        started_at = time.perf_counter()
+        try:
+            for stage in stages:
+                stage.start()
+            threading.Thread(target=feed, name="pipeline-feed", daemon=True).start()
+
+            if on_complete is not None:
+                for job in jobs:
+                    if job.skipped:
+                        on_complete(job)
+
+            while True:
+                job = queues[-1].get()
+                if job is _STOP:
+                    break
+                if on_complete is not None:
+                    on_complete(job)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            if self.manifest is not None:
+                self.manifest.save()
+
+        elapsed = time.perf_counter() - started_at
+        return PipelineResult(
+            jobs=list(jobs),
+            stages=[stage.metrics for stage in stages],
+            elapsed_seconds=elapsed
+        )
+
+    def _is_current(self, stage: str, input_path: Path, inputs: List[Path] = (),
+                    version: str = __version__, params: Optional[Dict] = None) -> bool:
+        """判断阶段产出是否可沿用"""
+        if self.manifest is None or self.force:
+            return False
+        return self.manifest.is_current(stage, input_path, inputs, version=version, params=params)
+
+    @staticmethod
+    def _rules_inputs(job: PatentJob) -> List[Path]:
+        return [job.sequence_path] if job.sequence_path is not None else []
+
+    def _submit(self, function: Callable, task: Tuple) -> Any:
+        """CPU密集任务：有进程池时在工作进程中执行，否则在当前线程执行"""
+        if self._executor is None:
+            return function(task)
+        return self._executor.submit(function, task).result()
+
+    def _extract_claims(self, job: PatentJob) -> None:
+        outputs = self.manifest.outputs(STAGE_EXTRACT, job.pdf_path) if self.manifest else []
+        if outputs and self._is_current(STAGE_EXTRACT, job.pdf_path, params=self._extract_params):
+            # PDF未变化，读取已提取的权利要求书，跳过PDF解析
+            claims_path = outputs[0]
+            markdown = claims_path.read_text(encoding='utf-8')
+        else:
+            claims_path, markdown = self._submit(
+                _extract_claims_task, (str(job.pdf_path), str(self.markdown_dir), self.lazy)
+            )
+            if markdown is None:
+                raise ValueError("未在PDF文件中找到权利要求书内容")
+            claims_path = Path(claims_path)
+            if self.manifest is not None:
+                self.manifest.record(STAGE_EXTRACT, job.pdf_path, [claims_path],
+                                     params=self._extract_params)
+        job.claims_path = claims_path
+        job.claims_markdown = markdown
+        job.output_files.append(job.claims_path)
+
+    def _parse_claims(self, job: PatentJob) -> None:
+        job.claims_doc = self.data_loader.parse_claims_markdown(
+            job.claims_markdown, job.claims_path
+        )
+
+    def _process_sequences(self, job: PatentJob) -> None:
+        if job.sequence_path is None:
+            raise FileNotFoundError("未找到与PDF匹配的序列文件")
+        output_path = ensure_output_dir(self.sequence_dir) / f"{job.patent_id}.json"
+        if self._is_current(STAGE_SEQUENCES, job.sequence_path,
+                            version=self._sequence_version, params=self._sequence_params):
+            job.sequence_data = self.data_loader.load_sequence_json(output_path)
+        else:
+            job.sequence_data = self._submit(
+                _process_sequences_task, (str(job.sequence_path), str(output_path))
+            )
+            if self.manifest is not None:
+                self.manifest.record(
+                    STAGE_SEQUENCES, job.sequence_path, [output_path],
+                    version=self._sequence_version, params=self._sequence_params,
+                    info={"total_sequences": job.sequence_data.metadata.total_sequences}
+                )
+        job.output_files.append(output_path)
+
+    def _generate_rules(self, job: PatentJob) -> None:
+        result = self.generator.generate_rules(
+            job.claims_doc, job.sequence_data, self.existing_rules
+        )
+        job.result = result
+        # 规则已生成，释放不再需要的中间数据
+        job.claims_markdown = None
+        job.sequence_data = None
+
+        ensure_output_dir(self.strategy_dir)
+        patent_number = result.patent_number.replace(' ', '_').replace('/', '_')
+        json_output = self.strategy_dir / f"{patent_number}_rules.json"
+        self.generator.export_simplified_json(
+            result, str(json_output), getattr(result, 'raw_llm_response', None)
+        )
+        job.output_files.append(json_output)
+
+        if self.export_markdown:
+            simplified_data = None
+            try:
+                with open(json_output, 'r', encoding='utf-8') as f:
+                    simplified_data = json.load(f)
+            except Exception as e:
+                logger.warning(f"简化JSON读取失败: {e}")
+            md_output = self.strategy_dir / f"{patent_number}_rules.md"
+            self.generator.export_to_markdown(result, str(md_output), simplified_data)
+            job.output_files.append(md_output)
+
+        # 演示模式的结果不记录，配置API密钥后会重新生成；
+        # 部分分析块失败时清除条目，下次运行补齐缺失的权利要求
+        if self.manifest is not None and not self.generator.llm_agent.demo_mode:
+            failed_chunks = (result.analysis_summary or {}).get("failed_chunks", 0)
+            if failed_chunks:
+                logger.warning(f"{job.patent_id}: {failed_chunks}个分析块失败，不记录到增量清单")
+                self.manifest.discard(STAGE_RULES, job.pdf_path)
+            else:
+                self.manifest.record(STAGE_RULES, job.pdf_path, job.output_files,
+                                     self._rules_inputs(job), params=self._rules_params)
@@ -0,0 +1,309 @@
+"""
+LLM API客户端限流与容错
+
+提供令牌桶限流（每分钟请求数/令牌数）、带抖动的指数退避以及熔断器，
+用于在不超过API配额的前提下保持吞吐量，并在服务持续异常时快速失败。
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，拒绝请求"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            message: 错误信息
+            retry_after: 距离进入半开状态的秒数，未知时为 None
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    按固定速率补充令牌，桶容量即允许的突发量。取令牌时允许余额暂时为负，
+    调用方按欠额等待，因此并发请求按到达顺序排队且不会相互饿死。
+    加锁只保护余额计算，可以在多个线程和事件循环中共享。
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化令牌桶
+
+        Args:
+            rate_per_minute: 每分钟补充的令牌数
+            capacity: 桶容量，默认等于每分钟补充量
+            clock: 单调时钟，便于替换
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute必须大于0")
+
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        预留令牌
+
+        Args:
+            amount: 令牌数
+
+        Returns:
+            float: 需要等待的秒数，0 表示可以立即执行
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """归还多预留的令牌（amount 为负时表示补扣）"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        取出令牌，不足时异步等待
+
+        Args:
+            amount: 令牌数
+        """
+        wait = self.reserve(amount)
+        if wait <= 0:
+            return
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.refund(amount)
+            raise
+
+
+class RateLimiter:
+    """按每分钟请求数和每分钟令牌数同时限流"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化限流器
+
+        Args:
+            requests_per_minute: 每分钟请求数上限，None 表示不限制
+            tokens_per_minute: 每分钟令牌数上限（输入+输出），None 表示不限制
+            clock: 单调时钟
+        """
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        )
+
+    async def acquire(self, estimated_tokens: int) -> int:
+        """
+        为一次请求预留配额
+
+        Args:
+            estimated_tokens: 预估的令牌用量
+
+        Returns:
+            int: 实际预留的令牌数，请求完成后传给 reconcile
+        """
+        if self.request_bucket is not None:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket is None:
+            return 0
+        await self.token_bucket.acquire(estimated_tokens)
+        return estimated_tokens
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        按API返回的实际用量修正预留的令牌数
+
+        Args:
+            reserved_tokens: acquire 返回的预留数
+            actual_tokens: 实际用量，未知时不修正
+        """
+        if self.token_bucket is None or actual_tokens is None:
+            return
+        self.token_bucket.refund(reserved_tokens - actual_tokens)
+
+
+@dataclass
+class BackoffPolicy:
+    """带完全抖动（full jitter）的指数退避"""
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    multiplier: float = 2.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第 attempt 次失败（从0开始）后的等待时间
+
+        服务端给出 Retry-After 时，等待时间不少于该值。
+
+        Args:
+            attempt: 已失败次数减一
+            retry_after: 服务端要求的等待秒数
+
+        Returns:
+            float: 等待秒数
+        """
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    从响应头中解析服务端要求的等待时间
+
+    支持 retry-after-ms、以秒为单位的 Retry-After 以及HTTP日期格式。
+
+    Args:
+        headers: 响应头（键不区分大小写的映射）
+
+    Returns:
+        Optional[float]: 等待秒数，未给出或无法解析时返回 None
+    """
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后打开，打开期间直接拒绝请求；经过 reset_timeout 后
+    进入半开状态，只放行一个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多少秒进入半开状态
+            clock: 单调时钟
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> bool:
+        """
+        请求前检查
+
+        Returns:
+            bool: 本次请求是否占用了半开状态的试探名额
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已有试探请求
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if self._state == self.OPEN and remaining > 0:
+                raise CircuitOpenError(
+                    f"连续失败{self._failures}次，熔断中，{remaining:.0f}秒后重试",
+                    retry_after=remaining
+                )
+
+            if self._trial_in_flight:
+                raise CircuitOpenError("熔断器半开，等待试探请求结果")
+
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self) -> None:
+        """试探请求未得到结果（如被取消）时释放名额，不改变熔断状态"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        """记录一次成功请求"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("LLM服务恢复，熔断器关闭")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录一次失败请求"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"LLM请求连续失败{self._failures}次，熔断器打开")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
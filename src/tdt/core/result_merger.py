@@ -4,15 +4,36 @@
 该模块实现了将多个分析块的结果合并为最终统一结果的功能。
 """
 import logging
-from typing import List, Dict, Any, Optional, Set
+import math
+from bisect import bisect_right
+from typing import List, Dict, Any, FrozenSet, Optional, Set, Tuple
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import Counter, defaultdict
 import json
 
 from .chunked_analyzer import ChunkAnalysisResult
 
 logger = logging.getLogger(__name__)
 
+# 同类型规则的突变位点 Jaccard 相似度超过该值（严格大于）时合并
+RULE_SIMILARITY_THRESHOLD = 0.6
+
+
+def _mutation_tokens(rule: Dict[str, Any]) -> FrozenSet[str]:
+    """规则的突变位点集合（按 "/" 拆分）"""
+    return frozenset(rule.get("mutation", "").split("/"))
+
+
+def _prefix_length(size: int, threshold: float = RULE_SIMILARITY_THRESHOLD) -> int:
+    """
+    前缀过滤的前缀长度
+    
+    两个集合的 Jaccard 相似度不低于阈值时，交集至少为 ceil(threshold * |A|)，
+    因此按同一全局顺序排列后，二者长度为 |A| - ceil(threshold * |A|) + 1 的前缀必有公共元素。
+    减去一个极小量避免浮点误差使前缀变短而漏掉候选。
+    """
+    return size - max(1, math.ceil(threshold * size - 1e-9)) + 1
+
 
 @dataclass
 class MergedAnalysisResult:
@@ -128,10 +149,30 @@ class ResultMerger:
         return optimized
     
     def _optimize_wildtype_rules(self, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """优化同一野生型的规则"""
+        """
+        优化同一野生型的规则
+        
+        按顺序取未合并的规则，与其后所有相似的未合并规则合并（只与该规则比较，不传递）。
+        候选规则通过前缀过滤的倒排索引查找：突变位点按出现频率从低到高排序，
+        只为每条规则的前缀位点建立索引，相似规则必定共享前缀位点，
+        再对候选精确计算 Jaccard 相似度，因此结果与两两比较完全一致。
+        """
         if len(rules) <= 1:
             return rules
         
+        tokens = [_mutation_tokens(rule) for rule in rules]
+        frequency = Counter(token for token_set in tokens for token in token_set)
+        
+        # (规则类型, 前缀位点) -> 规则下标（升序）
+        prefix_index: Dict[Tuple[Any, str], List[int]] = defaultdict(list)
+        prefixes: List[List[str]] = []
+        for index, (rule, token_set) in enumerate(zip(rules, tokens)):
+            ordered = sorted(token_set, key=lambda token: (frequency[token], token))
+            prefix = ordered[:_prefix_length(len(ordered))]
+            prefixes.append(prefix)
+            for token in prefix:
+                prefix_index[(rule.get("rule"), token)].append(index)
+        
         # 合并相似的规则
         merged_rules = []
         processed_indices = set()
@@ -140,13 +181,18 @@ class ResultMerger:
             if i in processed_indices:
                 continue
             
-            similar_rules = [rule1]
             processed_indices.add(i)
             
-            # 查找相似规则
-            for j, rule2 in enumerate(rules[i+1:], i+1):
-                if j not in processed_indices and self._are_rules_similar(rule1, rule2):
-                    similar_rules.append(rule2)
+            # 查找相似规则：只验证共享前缀位点的后续规则
+            candidates = set()
+            for token in prefixes[i]:
+                postings = prefix_index[(rule1.get("rule"), token)]
+                candidates.update(postings[bisect_right(postings, i):])
+            
+            similar_rules = [rule1]
+            for j in sorted(candidates):
+                if j not in processed_indices and self._tokens_similar(tokens[i], tokens[j]):
+                    similar_rules.append(rules[j])
                     processed_indices.add(j)
             
             # 合并相似规则
@@ -158,6 +204,14 @@ class ResultMerger:
         
         return merged_rules
     
+    @staticmethod
+    def _tokens_similar(mutations1: FrozenSet[str], mutations2: FrozenSet[str]) -> bool:
+        """突变位点集合的 Jaccard 相似度是否超过阈值"""
+        if mutations1 and mutations2:
+            overlap = len(mutations1 & mutations2) / len(mutations1 | mutations2)
+            return overlap > RULE_SIMILARITY_THRESHOLD
+        return False
+    
     def _are_rules_similar(self, rule1: Dict[str, Any], rule2: Dict[str, Any]) -> bool:
         """判断两个规则是否相似"""
         # 检查规则类型
@@ -165,15 +219,7 @@ class ResultMerger:
             return False
         
         # 检查突变位点重叠度
-        mutations1 = set(rule1.get("mutation", "").split("/"))
-        mutations2 = set(rule2.get("mutation", "").split("/"))
-        
-        if mutations1 and mutations2:
-            overlap = len(mutations1 & mutations2) / len(mutations1 | mutations2)
-            if overlap > 0.6:  # 60%以上重叠认为相似
-                return True
-        
-        return False
+        return self._tokens_similar(_mutation_tokens(rule1), _mutation_tokens(rule2))
     
     def _merge_similar_rules(self, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
         """合并相似规则"""
@@ -13,11 +13,15 @@ from pathlib import Path
 from typing import Dict, Optional, List, Any
 
 from .data_loader import DataLoader
-from .llm_agent import LLMRuleAgent
-from .claims_splitter import ClaimsSplitter
-from .chunked_analyzer import ChunkedAnalyzer
+from .llm_agent import DEFAULT_MAX_CONCURRENCY, LLMRuleAgent, QwenAPIError
+from .llm_cache import LLMResponseCache
+from .rate_limiter import RateLimiter
+from .claims_splitter import DEFAULT_CHUNK_TOKEN_BUDGET, ClaimsSplitter
+from .chunked_analyzer import ChunkedAnalyzer, build_sequence_index
 from .result_merger import ResultMerger
+from ..models.claims_models import ClaimsDocument
 from ..models.rule_models import RuleGenerationResult, StandardizedRuleOutput
+from ..models.sequence_record import SequenceProcessingResult
 
 logger = logging.getLogger(__name__)
 
@@ -25,18 +29,22 @@ logger = logging.getLogger(__name__)
 class IntelligentRuleGenerator:
     """智能规则生成和输出管理器"""
     
-    def __init__(self, llm_agent: LLMRuleAgent):
+    def __init__(self, llm_agent: LLMRuleAgent, max_concurrency: int = 1,
+                 chunk_token_budget: int = DEFAULT_CHUNK_TOKEN_BUDGET):
         """初始化规则生成器
         
         Args:
             llm_agent: LLM规则生成智能体
+            max_concurrency: 分段处理时同时分析的块数上限
+            chunk_token_budget: 分段处理时每个请求的输入令牌预算
         """
         self.llm_agent = llm_agent
+        self.chunk_token_budget = chunk_token_budget
         self.data_loader = DataLoader()
         
         # 初始化分段处理组件
         self.claims_splitter = ClaimsSplitter()
-        self.chunked_analyzer = ChunkedAnalyzer(llm_agent)
+        self.chunked_analyzer = ChunkedAnalyzer(llm_agent, max_concurrency=max_concurrency)
         self.result_merger = ResultMerger()
         
         logger.info("智能规则生成器初始化完成（支持分段处理）")
@@ -91,23 +99,55 @@ class IntelligentRuleGenerator:
         claim_segments = self.claims_splitter.split_claims(full_claims_text)
         logger.info(f"📋 权利要求书分段完成: {len(claim_segments)}个段落")
         
-        # 2. 创建分析块
-        claim_chunks = self.claims_splitter.create_analysis_chunks(claim_segments, max_chunk_size=3)
+        # 2. 按令牌预算创建分析块
+        sequence_dict = sequence_data.model_dump() if hasattr(sequence_data, 'model_dump') else sequence_data
+        rule_list = existing_rules.rules if hasattr(existing_rules, 'rules') else []
+        prompt_prefix = self.chunked_analyzer.build_prompt_prefix(rule_list, claims_doc.patent_number)
+        sequence_index = build_sequence_index(sequence_dict)
+        claim_chunks = self.claims_splitter.create_token_budget_chunks(
+            claim_segments,
+            token_budget=self.chunk_token_budget,
+            estimate_tokens=lambda chunk: self.chunked_analyzer.estimate_chunk_tokens(
+                chunk, sequence_dict, rule_list,
+                prefix=prompt_prefix, sequence_index=sequence_index
+            ),
+            max_claims=self.chunked_analyzer.max_claims_per_chunk()
+        )
         logger.info(f"🧩 创建分析块: {len(claim_chunks)}个块")
         
+        payload_tokens = self.chunked_analyzer.payload_token_report(claim_chunks, sequence_dict)
+        if payload_tokens["verbose_tokens"]:
+            saved = 1 - payload_tokens["compact_tokens"] / payload_tokens["verbose_tokens"]
+            logger.info(
+                f"📉 {claims_doc.patent_number} 分析数据令牌: "
+                f"{payload_tokens['verbose_tokens']} → {payload_tokens['compact_tokens']}（减少{saved:.0%}）"
+            )
+        
         # 3. 分块分析
         chunk_results = self.chunked_analyzer.analyze_chunks(
-            claim_chunks, 
-            sequence_data.model_dump() if hasattr(sequence_data, 'model_dump') else sequence_data,
-            existing_rules.rules if hasattr(existing_rules, 'rules') else []
+            claim_chunks, sequence_dict, rule_list,
+            patent_number=claims_doc.patent_number
         )
         
+        failed_chunks = [r for r in chunk_results if r.error_message]
+        if chunk_results and len(failed_chunks) == len(chunk_results):
+            raise QwenAPIError(
+                f"全部{len(chunk_results)}个分析块均失败: {failed_chunks[0].error_message}"
+            )
+        if failed_chunks:
+            logger.warning(
+                f"⚠️ {len(failed_chunks)}/{len(chunk_results)}个分析块失败，"
+                f"对应权利要求未生成规则: {[r.claim_numbers for r in failed_chunks]}"
+            )
+        
         # 4. 合并结果
         merged_result = self.result_merger.merge_chunk_results(
             chunk_results, 
             claims_doc.patent_number
         )
         
+        merged_result.analysis_summary["payload_tokens"] = payload_tokens
+        merged_result.analysis_summary["failed_chunks"] = len(failed_chunks)
         logger.info(f"✅ 分段处理完成: 生成{len(merged_result.merged_rules)}条规则")
         
         # 5. 转换为标准格式
@@ -189,6 +229,27 @@ class IntelligentRuleGenerator:
             
             logger.info(f"数据加载完成: {claims_doc.patent_number}")
             
+        except Exception as e:
+            logger.error(f"规则生成失败: {e}")
+            raise
+        
+        return self.generate_rules(claims_doc, sequence_data, existing_rules)
+    
+    def generate_rules(self,
+                       claims_doc: ClaimsDocument,
+                       sequence_data: SequenceProcessingResult,
+                       existing_rules: Dict) -> RuleGenerationResult:
+        """由已加载的专利数据生成保护规则
+        
+        Args:
+            claims_doc: 权利要求书文档
+            sequence_data: 序列处理结果
+            existing_rules: 现有规则数据
+            
+        Returns:
+            规则生成结果
+        """
+        try:
             # 创建序列与权利要求的映射
             sequence_mapping = self.data_loader.create_sequence_claims_mapping(
                 claims_doc, sequence_data
@@ -658,15 +719,30 @@ class IntelligentRuleGenerator:
         return "\n".join(lines)
     
     @classmethod
-    def create_with_qwen(cls, api_key: Optional[str] = None, model: str = "qwen-plus") -> 'IntelligentRuleGenerator':
+    def create_with_qwen(cls, api_key: Optional[str] = None, model: str = "qwen-plus",
+                         max_concurrency: int = 1,
+                         cache: Optional[LLMResponseCache] = None,
+                         rate_limiter: Optional[RateLimiter] = None,
+                         chunk_token_budget: int = DEFAULT_CHUNK_TOKEN_BUDGET,
+                         prompt_cache: bool = False) -> 'IntelligentRuleGenerator':
         """创建使用Qwen的规则生成器
         
         Args:
             api_key: Qwen API密钥
             model: 模型名称
+            max_concurrency: 分段处理时同时分析的块数上限
+            cache: LLM响应缓存，为None时不使用缓存
+            rate_limiter: 按API配额限流，为None时不限流
+            chunk_token_budget: 分段处理时每个请求的输入令牌预算
+            prompt_cache: 为各块共用的提示前缀显式启用服务端上下文缓存
             
         Returns:
             智能规则生成器实例
         """
-        llm_agent = LLMRuleAgent(api_key=api_key, model=model)
-        return cls(llm_agent)
+        llm_agent = LLMRuleAgent(
+            api_key=api_key, model=model, cache=cache,
+            max_concurrency=max(max_concurrency, DEFAULT_MAX_CONCURRENCY),
+            rate_limiter=rate_limiter, prompt_cache=prompt_cache
+        )
+        return cls(llm_agent, max_concurrency=max_concurrency,
+                   chunk_token_budget=chunk_token_budget)
@@ -0,0 +1,852 @@
+"""
+专利保护规则匹配器
+
+将规则JSON中的 mutation_logic / identity_logic 表达式一次性编译为谓词，
+再批量筛查候选序列，报告每条候选序列命中的保护规则。
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .alignment import AlignmentIdentityService
+from .sequence_matrix import PAD_CODE, SequenceMatrix
+from ..utils.text_utils import normalize_seq_id
+
+logger = logging.getLogger(__name__)
+
+# 直接以氨基酸序列给出野生型时的最短长度（旧版Excel规则中常见）
+MIN_INLINE_SEQUENCE_LENGTH = 20
+
+_INLINE_SEQUENCE_RE = re.compile(r'[ACDEFGHIKLMNPQRSTVWYXBZUO]+')
+
+_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<lparen>\()|(?P<rparen>\))'
+    r'|(?P<and>&&?)|(?P<or>\|\|?)|(?P<not>!)'
+    r'|(?P<word>[A-Za-z0-9_*]+))'
+)
+
+_KEYWORD_TOKENS = {'AND': 'and', 'OR': 'or', 'NOT': 'not'}
+
+# 原子表达式：Y178A / 178A / 53T（指定位置为指定残基）
+_SUBSTITUTION_RE = re.compile(r'([A-Z])?(\d+)([A-Z*])')
+# 原子表达式：pos271_mut / pos2_mutated / mutated_at_2 / 75（指定位置与野生型不同）
+_MUTATED_AT_RES = (
+    re.compile(r'pos(\d+)_mut(?:ated)?', re.IGNORECASE),
+    re.compile(r'mutated_at_(\d+)', re.IGNORECASE),
+    re.compile(r'(\d+)'),
+)
+
+# identity_logic：seq_identity >= 80% / identity>80 等
+_IDENTITY_RE = re.compile(
+    r'identity\s*(>=|≥|>|=)\s*(\d+(?:\.\d+)?)\s*%?', re.IGNORECASE
+)
+
+_EMPTY_LOGIC_VALUES = {'', 'N/A', 'NA', 'NONE', '-'}
+
+# 批量筛查时每个序列矩阵包含的候选序列数，控制矩阵内存占用
+SCREEN_BATCH_SIZE = 4096
+
+
+class RuleCompileError(ValueError):
+    """规则表达式无法编译"""
+    pass
+
+
+@dataclass(frozen=True)
+class ResidueAt:
+    """指定位置（1起始）的残基属于给定集合"""
+    position: int
+    residues: FrozenSet[str]
+    wild_residue: Optional[str] = None
+
+    def evaluate(self, candidate: str, wild_type: Optional[str]) -> bool:
+        index = self.position - 1
+        return index < len(candidate) and candidate[index] in self.residues
+
+    def evaluate_matrix(self, matrix: SequenceMatrix, wild_type: Optional[str]) -> np.ndarray:
+        return matrix.residue_in(self.position, self.residues)
+
+    def positions(self) -> FrozenSet[int]:
+        return frozenset([self.position])
+
+    def requires_wild_type(self) -> bool:
+        return False
+
+
+@dataclass(frozen=True)
+class MutatedAt:
+    """指定位置（1起始）的残基与野生型不同"""
+    position: int
+
+    def evaluate(self, candidate: str, wild_type: Optional[str]) -> bool:
+        index = self.position - 1
+        if wild_type is None or index >= len(wild_type) or index >= len(candidate):
+            return False
+        return candidate[index] != wild_type[index]
+
+    def evaluate_matrix(self, matrix: SequenceMatrix, wild_type: Optional[str]) -> np.ndarray:
+        return matrix.differs_from(self.position, wild_type)
+
+    def positions(self) -> FrozenSet[int]:
+        return frozenset([self.position])
+
+    def requires_wild_type(self) -> bool:
+        return True
+
+
+@dataclass(frozen=True)
+class AllOf:
+    """逻辑与"""
+    children: Tuple[Any, ...]
+
+    def evaluate(self, candidate: str, wild_type: Optional[str]) -> bool:
+        return all(child.evaluate(candidate, wild_type) for child in self.children)
+
+    def evaluate_matrix(self, matrix: SequenceMatrix, wild_type: Optional[str]) -> np.ndarray:
+        mask = self.children[0].evaluate_matrix(matrix, wild_type)
+        for child in self.children[1:]:
+            if not mask.any():
+                break
+            mask = mask & child.evaluate_matrix(matrix, wild_type)
+        return mask
+
+    def positions(self) -> FrozenSet[int]:
+        return frozenset().union(*(child.positions() for child in self.children))
+
+    def requires_wild_type(self) -> bool:
+        return any(child.requires_wild_type() for child in self.children)
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    """逻辑或"""
+    children: Tuple[Any, ...]
+
+    def evaluate(self, candidate: str, wild_type: Optional[str]) -> bool:
+        return any(child.evaluate(candidate, wild_type) for child in self.children)
+
+    def evaluate_matrix(self, matrix: SequenceMatrix, wild_type: Optional[str]) -> np.ndarray:
+        mask = self.children[0].evaluate_matrix(matrix, wild_type)
+        for child in self.children[1:]:
+            if mask.all():
+                break
+            mask = mask | child.evaluate_matrix(matrix, wild_type)
+        return mask
+
+    def positions(self) -> FrozenSet[int]:
+        return frozenset().union(*(child.positions() for child in self.children))
+
+    def requires_wild_type(self) -> bool:
+        return any(child.requires_wild_type() for child in self.children)
+
+
+@dataclass(frozen=True)
+class Negation:
+    """逻辑非"""
+    child: Any
+
+    def evaluate(self, candidate: str, wild_type: Optional[str]) -> bool:
+        return not self.child.evaluate(candidate, wild_type)
+
+    def evaluate_matrix(self, matrix: SequenceMatrix, wild_type: Optional[str]) -> np.ndarray:
+        return ~self.child.evaluate_matrix(matrix, wild_type)
+
+    def positions(self) -> FrozenSet[int]:
+        return self.child.positions()
+
+    def requires_wild_type(self) -> bool:
+        return self.child.requires_wild_type()
+
+
+Predicate = Union[ResidueAt, MutatedAt, AllOf, AnyOf, Negation]
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    """
+    将 mutation_logic 表达式切分为记号
+
+    Args:
+        expression: 表达式文本
+
+    Returns:
+        List[Tuple[str, str]]: (记号类型, 文本) 列表
+
+    Raises:
+        RuleCompileError: 存在无法识别的内容
+    """
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise RuleCompileError(f"无法识别的内容: {expression[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'word' and text.upper() in _KEYWORD_TOKENS:
+            kind = _KEYWORD_TOKENS[text.upper()]
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class _LogicParser:
+    """mutation_logic 递归下降解析器（优先级：! > & > |）"""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.index = 0
+
+    def parse(self) -> Predicate:
+        if not self.tokens:
+            raise RuleCompileError("表达式为空")
+        node = self._parse_or()
+        if self.index < len(self.tokens):
+            raise RuleCompileError(f"多余的内容: {self.tokens[self.index][1]!r}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.index][0] if self.index < len(self.tokens) else None
+
+    def _parse_or(self) -> Predicate:
+        children = [self._parse_and()]
+        while self._peek() == 'or':
+            self.index += 1
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else AnyOf(tuple(children))
+
+    def _parse_and(self) -> Predicate:
+        children = [self._parse_unary()]
+        while self._peek() == 'and':
+            self.index += 1
+            children.append(self._parse_unary())
+        return children[0] if len(children) == 1 else AllOf(tuple(children))
+
+    def _parse_unary(self) -> Predicate:
+        if self._peek() == 'not':
+            self.index += 1
+            return Negation(self._parse_unary())
+        return self._parse_primary()
+
+    def _parse_primary(self) -> Predicate:
+        kind = self._peek()
+        if kind is None:
+            raise RuleCompileError("表达式意外结束")
+
+        text = self.tokens[self.index][1]
+        self.index += 1
+
+        if kind == 'lparen':
+            node = self._parse_or()
+            if self._peek() != 'rparen':
+                raise RuleCompileError("括号不匹配")
+            self.index += 1
+            return node
+        if kind == 'word':
+            return _parse_atom(text)
+        raise RuleCompileError(f"意外的符号: {text!r}")
+
+
+def _parse_atom(text: str) -> Predicate:
+    """
+    解析单个突变原子
+
+    Args:
+        text: 原子文本
+
+    Returns:
+        Predicate: 对应的谓词
+
+    Raises:
+        RuleCompileError: 不支持的原子
+    """
+    match = _SUBSTITUTION_RE.fullmatch(text.upper())
+    if match:
+        wild_residue, position, residue = match.groups()
+        if int(position) == 0:
+            raise RuleCompileError(f"位置编号必须从1开始: {text!r}")
+        return ResidueAt(int(position), frozenset(residue), wild_residue)
+
+    for pattern in _MUTATED_AT_RES:
+        match = pattern.fullmatch(text)
+        if match:
+            if int(match.group(1)) == 0:
+                raise RuleCompileError(f"位置编号必须从1开始: {text!r}")
+            return MutatedAt(int(match.group(1)))
+
+    raise RuleCompileError(f"不支持的突变表达式: {text!r}")
+
+
+def compile_mutation_logic(expression: Optional[str]) -> Optional[Predicate]:
+    """
+    编译 mutation_logic 表达式
+
+    支持 Y178A、178A、pos271_mut、mutated_at_2、75 等原子，
+    以及 &、|、!（或 AND、OR、NOT）与括号组合。
+
+    Args:
+        expression: 表达式文本
+
+    Returns:
+        Optional[Predicate]: 编译后的谓词，表达式为空时返回 None（无突变约束）
+
+    Raises:
+        RuleCompileError: 表达式无法编译
+    """
+    if expression is None or expression.strip().upper() in _EMPTY_LOGIC_VALUES:
+        return None
+    return _LogicParser(_tokenize(expression)).parse()
+
+
+def parse_identity_threshold(identity_logic: Optional[str],
+                             rule_text: Optional[str] = None) -> Tuple[Optional[float], bool]:
+    """
+    解析序列同一性阈值
+
+    先解析 identity_logic，未给出时再从 rule 字段中查找（如 "identity>80"）。
+
+    Args:
+        identity_logic: 同一性表达式，如 "seq_identity >= 80%"
+        rule_text: 规则类型字段
+
+    Returns:
+        Tuple[Optional[float], bool]: (阈值百分比, 是否为严格大于)，
+        阈值为 None 表示无同一性约束
+    """
+    for text in (identity_logic, rule_text):
+        if not text:
+            continue
+        match = _IDENTITY_RE.search(text)
+        if match:
+            threshold = float(match.group(2))
+            strict = match.group(1) == '>'
+            if threshold <= 0 and not strict:
+                return None, False
+            return threshold, strict
+    return None, False
+
+
+def positional_identity(candidate: str, wild_type: str) -> float:
+    """
+    按位置（不引入空位）计算序列同一性百分比
+
+    适用于与野生型采用相同编号的点突变变体；长度不同时以较长序列为分母。
+
+    Args:
+        candidate: 候选序列
+        wild_type: 野生型序列
+
+    Returns:
+        float: 同一性百分比（0-100）
+    """
+    length = max(len(candidate), len(wild_type))
+    if length == 0:
+        return 0.0
+    matches = sum(1 for a, b in zip(candidate, wild_type) if a == b)
+    return matches * 100.0 / length
+
+
+@dataclass
+class CompiledRule:
+    """编译后的单条保护规则"""
+    rule_id: str
+    patent_number: str
+    wild_type_ref: Optional[str]
+    rule_type: Optional[str]
+    mutation_logic: Optional[str]
+    predicate: Optional[Predicate] = None
+    min_identity: Optional[float] = None
+    identity_strict: bool = False
+    wild_type_id: Optional[str] = None
+    wild_type_sequence: Optional[str] = None
+    error: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def is_supported(self) -> bool:
+        """规则能否参与筛查"""
+        return self.error is None
+
+    def identity_satisfied(self, identity: float) -> bool:
+        """同一性是否满足阈值"""
+        if self.min_identity is None:
+            return True
+        if self.identity_strict:
+            return identity > self.min_identity
+        return identity >= self.min_identity
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为报告中使用的字典"""
+        return {
+            "rule_id": self.rule_id,
+            "patent_number": self.patent_number,
+            "wild_type": self.wild_type_ref,
+            "wild_type_id": self.wild_type_id,
+            "mutation_logic": self.mutation_logic,
+            "min_identity": self.min_identity,
+            "error": self.error,
+            "warnings": self.warnings
+        }
+
+
+@dataclass
+class RuleHit:
+    """候选序列命中的一条规则"""
+    rule_id: str
+    patent_number: str
+    wild_type_id: Optional[str]
+    identity: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rule_id": self.rule_id,
+            "patent_number": self.patent_number,
+            "wild_type_id": self.wild_type_id,
+            "identity": round(self.identity, 2) if self.identity is not None else None
+        }
+
+
+@dataclass
+class CandidateScreenResult:
+    """单条候选序列的筛查结果"""
+    candidate_id: str
+    length: int
+    hits: List[RuleHit] = field(default_factory=list)
+
+    @property
+    def patents(self) -> List[str]:
+        """命中的专利号（保持首次出现顺序）"""
+        return list(dict.fromkeys(hit.patent_number for hit in self.hits))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "candidate_id": self.candidate_id,
+            "length": self.length,
+            "patents": self.patents,
+            "hits": [hit.to_dict() for hit in self.hits]
+        }
+
+
+def load_wild_type_sequences(paths: Iterable[Path]) -> Dict[str, str]:
+    """
+    从标准化序列JSON或FASTA文件加载野生型序列
+
+    每条序列同时以原始ID和标准化的 SEQ_ID_NO_<n> 形式登记。
+
+    Args:
+        paths: 序列文件路径（.json 为 tdt-seq 输出，其余按FASTA解析）
+
+    Returns:
+        Dict[str, str]: 序列ID到序列的映射
+    """
+    from .parsers.fasta_parser import FastaParser
+
+    sequences: Dict[str, str] = {}
+    for path in paths:
+        path = Path(path)
+        if path.suffix.lower() == '.json':
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            records = [
+                (item['sequence_id'], item['sequence_data']['cleaned_sequence'])
+                for item in data.get('sequences', [])
+            ]
+        else:
+            records = [
+                (record.sequence_id, record.sequence_data.cleaned_sequence)
+                for record in FastaParser().iter_parse(path)
+            ]
+
+        for sequence_id, sequence in records:
+            sequences[sequence_id] = sequence
+            normalized = normalize_seq_id(sequence_id)
+            if normalized:
+                sequences.setdefault(normalized, sequence)
+        logger.info(f"从 {path} 加载 {len(records)} 条野生型序列")
+
+    return sequences
+
+
+class RuleMatcher:
+    """保护规则匹配器：编译规则并批量筛查候选序列"""
+
+    def __init__(self, wild_types: Optional[Dict[str, str]] = None,
+                 default_wild_type: Optional[str] = None,
+                 aligner: Optional[AlignmentIdentityService] = None):
+        """
+        初始化匹配器
+
+        Args:
+            wild_types: 野生型序列ID到序列的映射
+            default_wild_type: 规则的野生型无法解析时使用的序列ID
+            aligner: 比对同一性服务，None 表示按位置计算同一性；设置后
+                同一性和突变位置条件均按候选序列与野生型的比对评估
+        """
+        self.wild_types = dict(wild_types or {})
+        self.default_wild_type = default_wild_type
+        self.aligner = aligner
+        self.rules: List[CompiledRule] = []
+
+        if default_wild_type and default_wild_type not in self.wild_types:
+            raise ValueError(f"默认野生型不在已加载的序列中: {default_wild_type}")
+
+    @property
+    def active_rules(self) -> List[CompiledRule]:
+        """可以参与筛查的规则"""
+        return [rule for rule in self.rules if rule.is_supported]
+
+    @property
+    def unsupported_rules(self) -> List[CompiledRule]:
+        """无法编译或缺少野生型的规则"""
+        return [rule for rule in self.rules if not rule.is_supported]
+
+    def load_rules(self, rules_path: Path) -> List[CompiledRule]:
+        """
+        加载并编译规则JSON文件
+
+        同时支持 generate-rules 输出的单专利格式和 convert-excel 输出的
+        多专利格式（专利号写在每条规则中）。
+
+        Args:
+            rules_path: 规则JSON文件路径
+
+        Returns:
+            List[CompiledRule]: 本文件编译出的规则
+        """
+        rules_path = Path(rules_path)
+        with open(rules_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        patent_number = data.get('patent_number', '') if isinstance(data, dict) else ''
+        raw_rules = data.get('rules', []) if isinstance(data, dict) else data
+
+        compiled = []
+        for index, raw_rule in enumerate(raw_rules):
+            if not isinstance(raw_rule, dict):
+                continue
+            rule_id = f"{rules_path.stem}#{index + 1}"
+            compiled.append(self.compile_rule(raw_rule, rule_id, patent_number))
+
+        self.rules.extend(compiled)
+        supported = sum(1 for rule in compiled if rule.is_supported)
+        logger.info(f"从 {rules_path} 编译 {len(compiled)} 条规则，其中 {supported} 条可用于筛查")
+        return compiled
+
+    def compile_rule(self, raw_rule: Dict[str, Any], rule_id: str,
+                     patent_number: str = '') -> CompiledRule:
+        """
+        编译单条规则
+
+        编译失败不会抛出异常，而是记录在 CompiledRule.error 中。
+
+        Args:
+            raw_rule: 规则字典
+            rule_id: 规则标识
+            patent_number: 文件级专利号，规则中未给出时使用
+
+        Returns:
+            CompiledRule: 编译结果
+        """
+        rule = CompiledRule(
+            rule_id=rule_id,
+            patent_number=raw_rule.get('patent_number') or patent_number,
+            wild_type_ref=raw_rule.get('wild_type'),
+            rule_type=raw_rule.get('rule'),
+            mutation_logic=raw_rule.get('mutation_logic')
+        )
+
+        try:
+            rule.predicate = compile_mutation_logic(rule.mutation_logic)
+        except RuleCompileError as e:
+            rule.error = f"mutation_logic无法编译: {e}"
+            return rule
+
+        rule.min_identity, rule.identity_strict = parse_identity_threshold(
+            raw_rule.get('identity_logic'), rule.rule_type
+        )
+
+        if rule.predicate is None and rule.min_identity is None:
+            rule.error = "规则没有可评估的突变或同一性条件"
+            return rule
+
+        self._resolve_wild_type(rule)
+        needs_wild_type = rule.min_identity is not None or (
+            rule.predicate is not None and rule.predicate.requires_wild_type()
+        )
+        if needs_wild_type and rule.wild_type_sequence is None:
+            rule.error = f"无法解析野生型序列: {rule.wild_type_ref!r}"
+            return rule
+
+        if rule.predicate is not None and rule.wild_type_sequence is not None:
+            self._check_numbering(rule)
+
+        return rule
+
+    def _resolve_wild_type(self, rule: CompiledRule) -> None:
+        """
+        解析规则引用的野生型序列，结果写入 rule.wild_type_id / wild_type_sequence
+
+        依次尝试：内联氨基酸序列、原始ID、标准化的 SEQ_ID_NO_<n>、默认野生型。
+
+        Args:
+            rule: 待解析的规则
+        """
+        reference = rule.wild_type_ref
+        if reference:
+            compact = re.sub(r'\s+', '', reference).upper()
+            if (len(compact) >= MIN_INLINE_SEQUENCE_LENGTH
+                    and _INLINE_SEQUENCE_RE.fullmatch(compact)):
+                rule.wild_type_id, rule.wild_type_sequence = "inline", compact
+                return
+
+            for key in (reference.strip(), normalize_seq_id(reference)):
+                if key and key in self.wild_types:
+                    rule.wild_type_id, rule.wild_type_sequence = key, self.wild_types[key]
+                    return
+
+        if self.default_wild_type:
+            rule.wild_type_id = self.default_wild_type
+            rule.wild_type_sequence = self.wild_types[self.default_wild_type]
+            rule.warnings.append(
+                f"野生型 {reference!r} 未找到，使用默认野生型 {self.default_wild_type}"
+            )
+
+    def _check_numbering(self, rule: CompiledRule) -> None:
+        """检查规则中的野生型残基和位置是否与解析到的野生型序列一致"""
+        wild_type = rule.wild_type_sequence
+        out_of_range = sorted(p for p in rule.predicate.positions() if p > len(wild_type))
+        if out_of_range:
+            rule.warnings.append(
+                f"位置超出野生型长度({len(wild_type)}): {out_of_range[:10]}"
+            )
+
+        mismatched = sorted({
+            f"{node.wild_residue}{node.position}"
+            for node in _iter_nodes(rule.predicate)
+            if isinstance(node, ResidueAt) and node.wild_residue
+            and node.position <= len(wild_type)
+            and wild_type[node.position - 1] != node.wild_residue
+        })
+        if mismatched:
+            rule.warnings.append(f"野生型残基与序列不一致: {mismatched[:10]}")
+
+        for warning in rule.warnings:
+            logger.warning(f"规则 {rule.rule_id}: {warning}")
+
+    def screen_sequence(self, candidate_id: str, sequence: str) -> CandidateScreenResult:
+        """
+        筛查单条候选序列
+
+        按位置计算同一性时，先评估突变谓词，只有谓词满足时才计算同一性。
+        使用比对时，先将候选序列映射到野生型编号（插入被丢弃，缺失位置视为突变），
+        再在映射后的序列上评估突变谓词。同一野生型在单条候选序列内只计算一次。
+
+        Args:
+            candidate_id: 候选序列ID
+            sequence: 候选序列（大写）
+
+        Returns:
+            CandidateScreenResult: 筛查结果
+        """
+        result = CandidateScreenResult(candidate_id=candidate_id, length=len(sequence))
+        identities: Dict[str, float] = {}
+        alignments: Dict[str, Tuple[float, str]] = {}
+
+        for rule in self.rules:
+            if not rule.is_supported:
+                continue
+
+            wild_type = rule.wild_type_sequence
+            target = sequence
+            identity = None
+            if wild_type is not None and self.aligner is not None:
+                aligned = alignments.get(wild_type)
+                if aligned is None:
+                    aligned = self.aligner.align(sequence, wild_type)
+                    alignments[wild_type] = aligned
+                identity, target = aligned
+
+            if rule.predicate is not None and not rule.predicate.evaluate(target, wild_type):
+                continue
+
+            if wild_type is not None and identity is None:
+                identity = identities.get(wild_type)
+                if identity is None:
+                    identity = positional_identity(sequence, wild_type)
+                    identities[wild_type] = identity
+
+            if identity is not None and not rule.identity_satisfied(identity):
+                continue
+
+            result.hits.append(RuleHit(
+                rule_id=rule.rule_id,
+                patent_number=rule.patent_number,
+                wild_type_id=rule.wild_type_id,
+                identity=identity
+            ))
+
+        return result
+
+    def screen_matrix(self, matrix: SequenceMatrix) -> List[CandidateScreenResult]:
+        """
+        以向量化方式筛查序列矩阵中的全部候选序列
+
+        每条规则对整个矩阵求值一次；同一野生型的同一性只计算一次。
+        使用比对同一性时按规则阈值剪枝后比对，突变谓词在映射到
+        野生型编号的矩阵上求值。结果与逐条调用 screen_sequence 一致。
+
+        Args:
+            matrix: 候选序列矩阵
+
+        Returns:
+            List[CandidateScreenResult]: 按矩阵行顺序排列的筛查结果
+        """
+        results = [
+            CandidateScreenResult(candidate_id=sequence_id, length=int(length))
+            for sequence_id, length in zip(matrix.sequence_ids, matrix.lengths)
+        ]
+        identities: Dict[str, np.ndarray] = {}
+        alignments: Dict[str, Tuple[np.ndarray, SequenceMatrix]] = {}
+
+        for rule in self.rules:
+            if not rule.is_supported:
+                continue
+
+            wild_type = rule.wild_type_sequence
+            if self.aligner is not None and wild_type is not None:
+                mask, identity = self._aligned_rule_mask(matrix, rule, alignments)
+            else:
+                if rule.predicate is not None:
+                    mask = rule.predicate.evaluate_matrix(matrix, wild_type)
+                else:
+                    mask = np.ones(len(matrix), dtype=bool)
+
+                identity = None
+                if wild_type is not None and mask.any():
+                    identity = identities.get(wild_type)
+                    if identity is None:
+                        identity = matrix.percent_identity(wild_type)
+                        identities[wild_type] = identity
+
+            if identity is not None and rule.min_identity is not None:
+                if rule.identity_strict:
+                    mask = mask & (identity > rule.min_identity)
+                else:
+                    mask = mask & (identity >= rule.min_identity)
+
+            for row in np.flatnonzero(mask):
+                results[row].hits.append(RuleHit(
+                    rule_id=rule.rule_id,
+                    patent_number=rule.patent_number,
+                    wild_type_id=rule.wild_type_id,
+                    identity=float(identity[row]) if identity is not None else None
+                ))
+
+        return results
+
+    def _aligned_rule_mask(self, matrix: SequenceMatrix, rule: CompiledRule,
+                           alignments: Dict[str, Tuple[np.ndarray, SequenceMatrix]]
+                           ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        比对模式下评估规则的突变谓词，按需补算候选序列与野生型的比对
+
+        谓词在映射到野生型编号的矩阵上求值，插入/缺失不会使后续位置错位。
+        不可能达到规则阈值的行不比对，其同一性保持为 NaN，不会命中该规则。
+
+        Args:
+            matrix: 候选序列矩阵
+            rule: 当前规则（野生型已解析）
+            alignments: 野生型序列到 (同一性数组, 映射矩阵) 的缓存（NaN 表示尚未计算）
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (谓词命中且已比对的行, 同一性数组)
+        """
+        wild_type = rule.wild_type_sequence
+        cached = alignments.get(wild_type)
+        if cached is None:
+            cached = (
+                np.full(len(matrix), np.nan),
+                SequenceMatrix(
+                    matrix.sequence_ids,
+                    np.full((len(matrix), len(wild_type)), PAD_CODE, dtype=np.uint8),
+                    np.full(len(matrix), len(wild_type), dtype=np.int64)
+                )
+            )
+            alignments[wild_type] = cached
+        identity, projected = cached
+
+        pending = np.flatnonzero(np.isnan(identity))
+        if len(pending):
+            computed, codes = self.aligner.matrix_alignments(
+                matrix, wild_type, rows=pending,
+                threshold=rule.min_identity, strict=rule.identity_strict
+            )
+            filled = ~np.isnan(computed)
+            identity[filled] = computed[filled]
+            projected.codes[filled] = codes[filled]
+
+        mask = ~np.isnan(identity)
+        if rule.predicate is not None and mask.any():
+            mask = mask & rule.predicate.evaluate_matrix(projected, wild_type)
+        return mask, identity
+
+    def screen(self, candidates: Iterable[Tuple[str, str]],
+               batch_size: int = SCREEN_BATCH_SIZE) -> Iterator[CandidateScreenResult]:
+        """
+        批量筛查候选序列
+
+        候选序列按 batch_size 分批编码为序列矩阵后向量化求值，
+        内存占用与候选序列总数无关。
+
+        Args:
+            candidates: (序列ID, 序列) 可迭代对象
+            batch_size: 每批候选序列数
+
+        Yields:
+            CandidateScreenResult: 按输入顺序产出的筛查结果
+        """
+        batch: List[Tuple[str, str]] = []
+        for candidate in candidates:
+            batch.append(candidate)
+            if len(batch) >= batch_size:
+                yield from self.screen_matrix(SequenceMatrix.from_sequences(batch))
+                batch = []
+        if batch:
+            yield from self.screen_matrix(SequenceMatrix.from_sequences(batch))
+
+    def screen_fasta(self, fasta_path: Path,
+                     batch_size: int = SCREEN_BATCH_SIZE) -> Iterator[CandidateScreenResult]:
+        """
+        流式筛查FASTA文件中的候选序列
+
+        Args:
+            fasta_path: 候选序列FASTA文件
+            batch_size: 每批候选序列数
+
+        Yields:
+            CandidateScreenResult: 按文件顺序产出的筛查结果
+        """
+        from .parsers.fasta_parser import FastaParser
+
+        records = FastaParser().iter_parse(Path(fasta_path))
+        yield from self.screen(
+            ((record.sequence_id, record.sequence_data.cleaned_sequence)
+             for record in records),
+            batch_size=batch_size
+        )
+
+
+def _iter_nodes(node: Predicate) -> Iterator[Predicate]:
+    """深度优先遍历谓词树"""
+    yield node
+    if isinstance(node, (AllOf, AnyOf)):
+        for child in node.children:
+            yield from _iter_nodes(child)
+    elif isinstance(node, Negation):
+        yield from _iter_nodes(node.child)
@@ -0,0 +1,405 @@
+"""
+专利规则库
+
+将 generate-rules 输出的单专利规则文件和 convert-excel 输出的历史规则汇总到
+本地 SQLite 数据库，按专利号、野生型、规则类型和突变位置建立索引，
+跨专利查询（如"哪些专利保护 ZaTdT 的271位"）无需逐个读取规则文件。
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from .rule_matcher import RuleCompileError, compile_mutation_logic
+from ..utils.file_utils import calculate_file_md5
+from ..utils.text_utils import normalize_seq_id
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# 突变描述中的位置：Y178A、R335L、G340G 等（野生型残基 + 位置，不含 X1 这类占位符）
+_MUTATION_POSITION_RE = re.compile(r'(?<![A-Za-z0-9])[ACDEFGHIKLMNPQRSTVWY](\d+)(?![0-9])')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    md5 TEXT NOT NULL,
+    rule_count INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    rule_index INTEGER NOT NULL,
+    patent_number TEXT,
+    patent_key TEXT,
+    wild_type TEXT,
+    wild_type_key TEXT,
+    rule_type TEXT,
+    mutation TEXT,
+    mutation_logic TEXT,
+    identity_logic TEXT,
+    statement TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rule_positions (
+    position INTEGER NOT NULL,
+    rule_id INTEGER NOT NULL REFERENCES rules(id) ON DELETE CASCADE,
+    PRIMARY KEY (position, rule_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rules_patent ON rules(patent_key);
+CREATE INDEX IF NOT EXISTS idx_rules_wild_type ON rules(wild_type_key);
+CREATE INDEX IF NOT EXISTS idx_rules_type ON rules(rule_type);
+CREATE INDEX IF NOT EXISTS idx_rules_source ON rules(source_id);
+CREATE INDEX IF NOT EXISTS idx_positions_rule ON rule_positions(rule_id);
+"""
+
+
+def normalize_patent_number(value: Optional[str]) -> Optional[str]:
+    """
+    标准化专利号，去除空白、下划线和连字符并转为大写
+
+    Args:
+        value: 专利号，如 "CN 202210107337" 或 "CN_202210107337"
+
+    Returns:
+        Optional[str]: 标准化后的专利号，为空时返回 None
+    """
+    if not value:
+        return None
+    return re.sub(r'[\s_\-]+', '', str(value)).upper() or None
+
+
+def wild_type_key(value: Optional[str]) -> Optional[str]:
+    """
+    野生型查询键：序列编号标准化为 SEQ_ID_NO_<n>，其他写法去除首尾空白
+
+    Args:
+        value: 规则中的野生型引用
+
+    Returns:
+        Optional[str]: 查询键，为空时返回 None
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    return normalize_seq_id(value) or value or None
+
+
+def extract_rule_positions(rule: Dict[str, Any]) -> Set[int]:
+    """
+    提取规则涉及的突变位置
+
+    mutation_logic 可编译时取其中约束的全部位置，
+    并补充 mutation（以及旧版规则的 mutant）字段中标准突变写法的位置。
+
+    Args:
+        rule: 规则字典
+
+    Returns:
+        Set[int]: 位置集合（1起始）
+    """
+    positions: Set[int] = set()
+
+    logic = rule.get('mutation_logic')
+    if isinstance(logic, str):
+        try:
+            predicate = compile_mutation_logic(logic)
+        except RuleCompileError:
+            predicate = None
+        if predicate is not None:
+            positions.update(predicate.positions())
+
+    for field_name in ('mutation', 'mutant'):
+        text = rule.get(field_name)
+        if isinstance(text, str):
+            positions.update(int(match) for match in _MUTATION_POSITION_RE.findall(text))
+
+    return {position for position in positions if position > 0}
+
+
+@dataclass
+class StoredRule:
+    """规则库中的一条规则"""
+    rule_id: int
+    source: str
+    patent_number: Optional[str]
+    wild_type: Optional[str]
+    rule_type: Optional[str]
+    mutation: Optional[str]
+    mutation_logic: Optional[str]
+    identity_logic: Optional[str]
+    statement: Optional[str]
+    positions: List[int] = field(default_factory=list)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "rule_id": self.rule_id,
+            "source": self.source,
+            "patent_number": self.patent_number,
+            "wild_type": self.wild_type,
+            "rule": self.rule_type,
+            "mutation": self.mutation,
+            "mutation_logic": self.mutation_logic,
+            "identity_logic": self.identity_logic,
+            "statement": self.statement,
+            "positions": self.positions,
+        }
+
+
+@dataclass
+class IngestResult:
+    """一个规则文件的导入结果"""
+    path: Path
+    rule_count: int
+    skipped: bool = False
+
+
+class RuleStore:
+    """基于 SQLite 的专利规则库"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        打开（必要时创建）规则库
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._init_schema()
+
+    def __enter__(self) -> 'RuleStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
+
+    def _init_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"规则库版本不受支持: {version}（当前版本 {SCHEMA_VERSION}）")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def ingest_file(self, rules_path: Union[str, Path], force: bool = False) -> IngestResult:
+        """
+        导入一个规则JSON文件
+
+        同时支持 generate-rules 输出的单专利格式和 convert-excel 输出的
+        多专利格式。文件内容未变化时跳过；已导入过的文件整体替换。
+
+        Args:
+            rules_path: 规则JSON文件路径
+            force: 内容未变化时也重新导入
+
+        Returns:
+            IngestResult: 导入结果
+        """
+        rules_path = Path(rules_path).resolve()
+        md5 = calculate_file_md5(rules_path)
+
+        existing = self._conn.execute(
+            "SELECT id, md5, rule_count FROM sources WHERE path = ?", (str(rules_path),)
+        ).fetchone()
+        if existing is not None and existing["md5"] == md5 and not force:
+            return IngestResult(rules_path, existing["rule_count"], skipped=True)
+
+        with open(rules_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        file_patent = data.get('patent_number', '') if isinstance(data, dict) else ''
+        raw_rules = data.get('rules', []) if isinstance(data, dict) else data
+        raw_rules = [rule for rule in raw_rules if isinstance(rule, dict)]
+
+        with self._conn:
+            if existing is not None:
+                self._conn.execute("DELETE FROM sources WHERE id = ?", (existing["id"],))
+            source_id = self._conn.execute(
+                "INSERT INTO sources (path, md5, rule_count, ingested_at) VALUES (?, ?, ?, ?)",
+                (str(rules_path), md5, len(raw_rules), datetime.now().isoformat())
+            ).lastrowid
+
+            position_rows = []
+            for index, rule in enumerate(raw_rules):
+                patent_number = rule.get('patent_number') or file_patent or None
+                wild_type = rule.get('wild_type')
+                rule_id = self._conn.execute(
+                    """INSERT INTO rules (source_id, rule_index, patent_number, patent_key,
+                           wild_type, wild_type_key, rule_type, mutation, mutation_logic,
+                           identity_logic, statement, data)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        source_id, index, patent_number, normalize_patent_number(patent_number),
+                        wild_type, wild_type_key(wild_type), rule.get('rule'),
+                        rule.get('mutation') or rule.get('mutant'), rule.get('mutation_logic'),
+                        rule.get('identity_logic'), rule.get('statement'),
+                        json.dumps(rule, ensure_ascii=False)
+                    )
+                ).lastrowid
+                position_rows.extend(
+                    (position, rule_id) for position in extract_rule_positions(rule)
+                )
+            self._conn.executemany(
+                "INSERT INTO rule_positions (position, rule_id) VALUES (?, ?)", position_rows
+            )
+
+        logger.info(f"导入规则文件 {rules_path}: {len(raw_rules)} 条规则")
+        return IngestResult(rules_path, len(raw_rules))
+
+    def ingest(self, paths: Iterable[Union[str, Path]], force: bool = False) -> List[IngestResult]:
+        """
+        批量导入规则文件，目录中的 *_rules.json 文件会被递归导入
+
+        Args:
+            paths: 规则文件或目录
+            force: 内容未变化时也重新导入
+
+        Returns:
+            List[IngestResult]: 每个文件的导入结果
+        """
+        results = []
+        for path in paths:
+            path = Path(path)
+            files = sorted(path.rglob('*_rules.json')) if path.is_dir() else [path]
+            for rules_file in files:
+                results.append(self.ingest_file(rules_file, force=force))
+        return results
+
+    def remove_source(self, rules_path: Union[str, Path]) -> bool:
+        """
+        删除一个规则文件导入的全部规则
+
+        Args:
+            rules_path: 规则JSON文件路径
+
+        Returns:
+            bool: 是否删除了记录
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM sources WHERE path = ?", (str(Path(rules_path).resolve()),)
+            )
+        return cursor.rowcount > 0
+
+    def query(self, patent_number: Optional[str] = None,
+              wild_type: Optional[str] = None,
+              rule_type: Optional[str] = None,
+              position: Optional[int] = None,
+              limit: Optional[int] = None) -> List[StoredRule]:
+        """
+        按条件查询规则，各条件之间为"与"关系
+
+        Args:
+            patent_number: 专利号（忽略空格、下划线和连字符）
+            wild_type: 野生型（序列编号的各种写法等价）
+            rule_type: 规则类型
+            position: 涉及的突变位置
+            limit: 最多返回的规则数
+
+        Returns:
+            List[StoredRule]: 按专利号和规则顺序排列的规则
+        """
+        conditions = []
+        params: List[Any] = []
+        if patent_number:
+            conditions.append("r.patent_key = ?")
+            params.append(normalize_patent_number(patent_number))
+        if wild_type:
+            conditions.append("r.wild_type_key = ?")
+            params.append(wild_type_key(wild_type))
+        if rule_type:
+            conditions.append("r.rule_type = ?")
+            params.append(rule_type)
+        if position is not None:
+            conditions.append("r.id IN (SELECT rule_id FROM rule_positions WHERE position = ?)")
+            params.append(position)
+
+        sql = (
+            "SELECT r.*, s.path AS source_path FROM rules r JOIN sources s ON s.id = r.source_id"
+            + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            + " ORDER BY r.patent_key, s.path, r.rule_index"
+        )
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._conn.execute(sql, params).fetchall()
+        positions = self._positions_for([row["id"] for row in rows])
+        return [
+            StoredRule(
+                rule_id=row["id"],
+                source=row["source_path"],
+                patent_number=row["patent_number"],
+                wild_type=row["wild_type"],
+                rule_type=row["rule_type"],
+                mutation=row["mutation"],
+                mutation_logic=row["mutation_logic"],
+                identity_logic=row["identity_logic"],
+                statement=row["statement"],
+                positions=positions.get(row["id"], []),
+                data=json.loads(row["data"])
+            )
+            for row in rows
+        ]
+
+    def _positions_for(self, rule_ids: List[int]) -> Dict[int, List[int]]:
+        positions: Dict[int, List[int]] = {}
+        # SQLite 单条语句的参数个数有限，分批查询
+        for start in range(0, len(rule_ids), 500):
+            batch = rule_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT rule_id, position FROM rule_positions WHERE rule_id IN "
+                f"({','.join('?' * len(batch))}) ORDER BY position",
+                batch
+            )
+            for rule_id, position in rows:
+                positions.setdefault(rule_id, []).append(position)
+        return positions
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        规则库统计信息
+
+        Returns:
+            Dict[str, Any]: 文件数、规则数、专利数、野生型数和规则类型分布
+        """
+        counts = self._conn.execute(
+            """SELECT (SELECT COUNT(*) FROM sources) AS sources,
+                      COUNT(*) AS rules,
+                      COUNT(DISTINCT patent_key) AS patents,
+                      COUNT(DISTINCT wild_type_key) AS wild_types
+               FROM rules"""
+        ).fetchone()
+        rule_types = {
+            row["rule_type"] or "unknown": row["count"]
+            for row in self._conn.execute(
+                "SELECT rule_type, COUNT(*) AS count FROM rules "
+                "GROUP BY rule_type ORDER BY count DESC"
+            )
+        }
+        return {
+            "sources": counts["sources"],
+            "rules": counts["rules"],
+            "patents": counts["patents"],
+            "wild_types": counts["wild_types"],
+            "rule_types": rule_types,
+        }
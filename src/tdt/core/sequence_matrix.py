@@ -0,0 +1,270 @@
+"""
+序列矩阵
+
+将一批序列编码为 uint8 矩阵（每行一条序列，按ASCII编码，右侧以0填充），
+以向量化方式完成按位置取残基、错配计数和序列同一性计算。
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.sequence_record import SequenceProcessingResult
+
+logger = logging.getLogger(__name__)
+
+# 填充值，不与任何残基字符冲突
+PAD_CODE = 0
+
+
+def encode_sequence(sequence: str) -> np.ndarray:
+    """
+    将序列编码为 uint8 数组
+
+    Args:
+        sequence: 清理后的序列（大写ASCII字符）
+
+    Returns:
+        np.ndarray: 一维 uint8 数组
+    """
+    return np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+
+
+def encode_residues(residues: Iterable[str]) -> np.ndarray:
+    """
+    将残基集合编码为 uint8 数组
+
+    Args:
+        residues: 残基字符集合
+
+    Returns:
+        np.ndarray: 一维 uint8 数组
+    """
+    return encode_sequence(''.join(sorted(residues)))
+
+
+class SequenceMatrix:
+    """按行存储一批序列的 uint8 矩阵"""
+
+    def __init__(self, sequence_ids: List[str], codes: np.ndarray, lengths: np.ndarray):
+        """
+        初始化序列矩阵
+
+        Args:
+            sequence_ids: 序列ID，与矩阵行一一对应
+            codes: 形状为 (序列数, 最大长度) 的 uint8 矩阵
+            lengths: 每条序列的长度
+        """
+        if codes.ndim != 2 or not codes.shape[0] == len(sequence_ids) == len(lengths):
+            raise ValueError("序列ID、编码矩阵和长度数组的行数不一致")
+
+        self.sequence_ids = sequence_ids
+        self.codes = codes
+        self.lengths = lengths
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[Tuple[str, str]]) -> 'SequenceMatrix':
+        """
+        由 (序列ID, 序列) 对构建矩阵
+
+        Args:
+            sequences: (序列ID, 序列) 可迭代对象
+
+        Returns:
+            SequenceMatrix: 序列矩阵
+        """
+        sequence_ids = []
+        encoded = []
+        for sequence_id, sequence in sequences:
+            sequence_ids.append(sequence_id)
+            encoded.append(encode_sequence(sequence.upper()))
+
+        lengths = np.fromiter((len(row) for row in encoded), dtype=np.int64, count=len(encoded))
+        width = int(lengths.max()) if len(encoded) else 0
+
+        codes = np.full((len(encoded), width), PAD_CODE, dtype=np.uint8)
+        for row, values in enumerate(encoded):
+            codes[row, :len(values)] = values
+
+        return cls(sequence_ids, codes, lengths)
+
+    @classmethod
+    def from_processing_result(cls, result: SequenceProcessingResult) -> 'SequenceMatrix':
+        """
+        由序列处理结果构建矩阵
+
+        Args:
+            result: tdt-seq 的序列处理结果
+
+        Returns:
+            SequenceMatrix: 序列矩阵
+        """
+        return cls.from_sequences(
+            (record.sequence_id, record.sequence_data.cleaned_sequence)
+            for record in result.sequences
+        )
+
+    @classmethod
+    def from_fasta(cls, fasta_path: Path) -> 'SequenceMatrix':
+        """
+        由FASTA文件构建矩阵
+
+        Args:
+            fasta_path: FASTA文件路径
+
+        Returns:
+            SequenceMatrix: 序列矩阵
+        """
+        from .parsers.fasta_parser import FastaParser
+
+        return cls.from_sequences(
+            (record.sequence_id, record.sequence_data.cleaned_sequence)
+            for record in FastaParser().iter_parse(Path(fasta_path))
+        )
+
+    def __len__(self) -> int:
+        return len(self.sequence_ids)
+
+    @property
+    def width(self) -> int:
+        """矩阵列数（最长序列的长度）"""
+        return self.codes.shape[1]
+
+    def sequence(self, row: int) -> str:
+        """还原指定行的序列字符串"""
+        return self.codes[row, :self.lengths[row]].tobytes().decode('ascii')
+
+    def take(self, rows: np.ndarray) -> 'SequenceMatrix':
+        """
+        取出指定行组成新的序列矩阵
+
+        Args:
+            rows: 行号数组
+
+        Returns:
+            SequenceMatrix: 子矩阵（数据为副本）
+        """
+        return SequenceMatrix(
+            [self.sequence_ids[row] for row in rows],
+            self.codes[rows],
+            self.lengths[rows]
+        )
+
+    def residues_at(self, position: int) -> np.ndarray:
+        """
+        取所有序列在指定位置的残基编码
+
+        Args:
+            position: 位置（1起始）
+
+        Returns:
+            np.ndarray: uint8 数组，序列长度不足时为 PAD_CODE
+        """
+        if position < 1 or position > self.width:
+            return np.full(len(self), PAD_CODE, dtype=np.uint8)
+        return self.codes[:, position - 1]
+
+    def residue_in(self, position: int, residues: Iterable[str]) -> np.ndarray:
+        """
+        判断所有序列在指定位置的残基是否属于给定集合
+
+        Args:
+            position: 位置（1起始）
+            residues: 残基字符集合
+
+        Returns:
+            np.ndarray: 布尔数组
+        """
+        return np.isin(self.residues_at(position), encode_residues(residues))
+
+    def differs_from(self, position: int, reference: Optional[str]) -> np.ndarray:
+        """
+        判断所有序列在指定位置是否与参考序列不同
+
+        序列或参考序列在该位置没有残基时视为未突变。
+
+        Args:
+            position: 位置（1起始）
+            reference: 参考（野生型）序列
+
+        Returns:
+            np.ndarray: 布尔数组
+        """
+        if reference is None or position < 1 or position > len(reference):
+            return np.zeros(len(self), dtype=bool)
+
+        column = self.residues_at(position)
+        reference_code = ord(reference[position - 1])
+        return (column != PAD_CODE) & (column != reference_code)
+
+    def match_counts(self, reference: str) -> np.ndarray:
+        """
+        按位置（不引入空位）统计每条序列与参考序列相同的残基数
+
+        Args:
+            reference: 参考序列
+
+        Returns:
+            np.ndarray: int64 数组
+        """
+        overlap = min(self.width, len(reference))
+        if overlap == 0:
+            return np.zeros(len(self), dtype=np.int64)
+
+        reference_codes = encode_sequence(reference[:overlap])
+        # 填充值不会与参考序列中的残基相等，无需额外屏蔽
+        return np.count_nonzero(self.codes[:, :overlap] == reference_codes, axis=1)
+
+    def mismatch_counts(self, reference: str) -> np.ndarray:
+        """
+        按位置统计每条序列与参考序列的差异数，长度差计入差异
+
+        Args:
+            reference: 参考序列
+
+        Returns:
+            np.ndarray: int64 数组
+        """
+        return np.maximum(self.lengths, len(reference)) - self.match_counts(reference)
+
+    def percent_identity(self, reference: str) -> np.ndarray:
+        """
+        按位置计算每条序列与参考序列的同一性百分比
+
+        与 rule_matcher.positional_identity 口径一致：以两者中较长者为分母。
+
+        Args:
+            reference: 参考序列
+
+        Returns:
+            np.ndarray: float64 数组（0-100）
+        """
+        denominator = np.maximum(self.lengths, len(reference))
+        matches = self.match_counts(reference)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            identity = np.where(denominator > 0, matches * 100.0 / denominator, 0.0)
+        return identity
+
+    def composition_bound(self, reference: str) -> np.ndarray:
+        """
+        每条序列与参考序列可能相同的残基数上界
+
+        任意比对中相同残基数都不超过两条序列各残基计数的较小值之和，
+        可用于在比对前排除不可能达到同一性阈值的序列。
+
+        Args:
+            reference: 参考序列
+
+        Returns:
+            np.ndarray: int64 数组
+        """
+        reference_codes = encode_sequence(reference)
+        values, reference_counts = np.unique(reference_codes, return_counts=True)
+
+        bound = np.zeros(len(self), dtype=np.int64)
+        for value, reference_count in zip(values, reference_counts):
+            counts = np.count_nonzero(self.codes == value, axis=1)
+            bound += np.minimum(counts, reference_count)
+        return bound
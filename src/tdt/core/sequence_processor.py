@@ -6,13 +6,15 @@
 
 import json
 import logging
-import hashlib
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 
+from .fasta_index import FAI_SUFFIX, ensure_fasta_index
 from .format_detector import SequenceFormatDetector
-from .parsers import BaseSequenceParser, FastaParser, CsvParser
+from .parsers import BaseSequenceParser, FastaParser, CsvParser, St26Parser, ParsingError
 from ..models.sequence_record import SequenceRecord
 from ..models.processing_models import (
     ProcessingResult,
@@ -24,27 +26,174 @@ from ..models.processing_models import (
     ProcessingStatus
 )
 from ..models.format_models import SequenceFormat
+from ..utils.file_utils import calculate_file_md5
+from .manifest import ProcessingManifest
 
 logger = logging.getLogger(__name__)
 
+# 进程池中每个工作进程持有的处理器实例，由 _init_process_worker 设置
+_worker_processor: Optional["UnifiedSequenceProcessor"] = None
+
+
+def _init_process_worker(processor: "UnifiedSequenceProcessor") -> None:
+    """进程池初始化函数，在工作进程中保存处理器副本（含已注册的解析器）"""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _process_file_in_worker(file_path: Path, output_path: Path,
+                            output_format: str, auto_detect_format: bool,
+                            stream: bool = False) -> ProcessingResult:
+    """在进程池工作进程中处理单个文件"""
+    return _worker_processor.process_file(
+        file_path=file_path,
+        output_path=output_path,
+        output_format=output_format,
+        auto_detect_format=auto_detect_format,
+        stream=stream
+    )
+
+
+class _StatisticsAccumulator:
+    """逐条累计序列统计信息，结果与一次性统计完全一致"""
+    
+    def __init__(self):
+        self.lengths = array('q')
+        self.type_counts: Dict[str, int] = {}
+        self.valid_sequences = 0
+    
+    def add(self, sequence: SequenceRecord) -> None:
+        """累计一条序列"""
+        self.lengths.append(sequence.sequence_data.length)
+        
+        mol_type = sequence.sequence_data.molecular_type
+        self.type_counts[mol_type] = self.type_counts.get(mol_type, 0) + 1
+        
+        if sequence.validation.is_valid:
+            self.valid_sequences += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """生成统计信息字典"""
+        total = len(self.lengths)
+        if total == 0:
+            return {}
+        
+        total_residues = sum(self.lengths)
+        
+        return {
+            "total_sequences": total,
+            "total_residues": total_residues,
+            "sequence_types": dict(self.type_counts),
+            "length_distribution": {
+                "min": min(self.lengths),
+                "max": max(self.lengths),
+                "mean": total_residues / total,
+                "median": sorted(self.lengths)[total // 2]
+            },
+            "validation_summary": {
+                "valid_sequences": self.valid_sequences,
+                "invalid_sequences": total - self.valid_sequences,
+                "validity_rate": self.valid_sequences / total
+            }
+        }
+
+
+class _StreamingResultWriter:
+    """
+    流式写出处理结果
+    
+    json: 完整的 ProcessingResult 文档，sequences 数组逐条写入，
+    其余字段在处理结束后追加。
+    jsonl: 每行一条序列记录，处理结果摘要写入同名的 .summary.json 文件。
+    """
+    
+    SUPPORTED_FORMATS = ("json", "jsonl")
+    
+    def __init__(self, output_path: Path, output_format: str):
+        output_format = output_format.lower()
+        if output_format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        
+        self.output_path = Path(output_path)
+        self.output_format = output_format
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._file = open(self.output_path, 'w', encoding='utf-8')
+        self._count = 0
+        
+        if self.output_format == "json":
+            self._file.write('{\n  "sequences": [')
+    
+    @property
+    def summary_path(self) -> Path:
+        """jsonl格式下处理结果摘要的路径"""
+        return self.output_path.with_suffix('.summary.json')
+    
+    def write(self, sequence: Dict[str, Any]) -> None:
+        """写入一条序列"""
+        data = json.dumps(sequence, ensure_ascii=False, default=str)
+        
+        if self.output_format == "json":
+            separator = ',' if self._count else ''
+            self._file.write(f'{separator}\n    {data}')
+        else:
+            self._file.write(data + '\n')
+        
+        self._count += 1
+    
+    def finish(self, result: ProcessingResult) -> None:
+        """写入处理结果的其余字段并关闭文件"""
+        summary = result.model_dump(exclude={'sequences'})
+        # 写出的文件包含全部序列，与非流式输出保持一致
+        summary['sequences_omitted'] = False
+        
+        try:
+            if self.output_format == "json":
+                self._file.write('\n  ]' if self._count else ']')
+                for key, value in summary.items():
+                    encoded = json.dumps(value, ensure_ascii=False, indent=2, default=str)
+                    encoded = encoded.replace('\n', '\n  ')
+                    self._file.write(f',\n  {json.dumps(key)}: {encoded}')
+                self._file.write('\n}\n')
+            else:
+                with open(self.summary_path, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        finally:
+            self._file.close()
+    
+    def abort(self) -> None:
+        """处理失败时关闭并删除不完整的输出文件"""
+        self._file.close()
+        try:
+            self.output_path.unlink()
+        except OSError:
+            pass
+
 
 class UnifiedSequenceProcessor:
     """统一序列处理器主类"""
     
-    def __init__(self, processor_version: str = "1.0.0"):
+    def __init__(self, processor_version: str = "1.0.0", validate_models: bool = False,
+                 build_fasta_index: bool = False):
         """
         初始化处理器
         
         Args:
             processor_version: 处理器版本号
+            validate_models: 解析时是否对每条记录执行完整的Pydantic模型验证
+            build_fasta_index: 处理FASTA文件后是否在其旁边生成 .fai 索引，
+                供 IndexedFastaReader 按序列ID随机读取；默认不写入输入目录
         """
         self.processor_version = processor_version
+        self.validate_models = validate_models
+        self.build_fasta_index = build_fasta_index
         self.format_detector = SequenceFormatDetector()
         
         # 注册解析器
         self.parsers = {
-            SequenceFormat.FASTA: FastaParser(),
-            SequenceFormat.CSV: CsvParser()
+            SequenceFormat.FASTA: FastaParser(validate_models),
+            SequenceFormat.CSV: CsvParser(validate_models),
+            SequenceFormat.ST26: St26Parser(validate_models)
         }
         
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
@@ -53,16 +202,21 @@ class UnifiedSequenceProcessor:
                     output_path: Optional[Union[str, Path]] = None,
                     output_format: str = "json",
                     auto_detect_format: bool = True,
-                    expected_format: Optional[SequenceFormat] = None) -> ProcessingResult:
+                    expected_format: Optional[SequenceFormat] = None,
+                    stream: bool = False) -> ProcessingResult:
         """
         处理单个序列文件
         
+        流式模式下逐条解析、验证并写出序列，统计信息在解析过程中累计，
+        内存占用与文件大小无关；返回结果中不保留序列（sequences_omitted为True）。
+        
         Args:
             file_path: 输入文件路径
             output_path: 输出文件路径（可选）
-            output_format: 输出格式 ("json")
+            output_format: 输出格式 ("json"，流式模式下还支持 "jsonl")
             auto_detect_format: 是否自动检测格式
             expected_format: 预期的输入格式
+            stream: 是否使用流式处理
             
         Returns:
             ProcessingResult: 处理结果
@@ -83,7 +237,7 @@ class UnifiedSequenceProcessor:
             
             # 获取文件信息
             file_size = file_path.stat().st_size
-            file_md5 = self._calculate_file_md5(file_path)
+            file_md5 = calculate_file_md5(file_path)
             
             # 格式检测
             if auto_detect_format:
@@ -117,16 +271,36 @@ class UnifiedSequenceProcessor:
             if not parser:
                 raise ValueError(f"不支持的格式: {detected_format}")
             
-            # 解析序列
-            sequences = parser.parse(file_path)
+            writer = None
+            if stream:
+                # 流式解析：边解析边验证、统计和写出
+                if output_path:
+                    writer = _StreamingResultWriter(Path(output_path), output_format)
+                try:
+                    total_sequences, validation_result, statistics = self._parse_streaming(
+                        parser, file_path, writer
+                    )
+                except BaseException:
+                    if writer:
+                        writer.abort()
+                    raise
+                sequences = []
+            else:
+                # 解析序列
+                sequences = parser.parse(file_path)
+                total_sequences = len(sequences)
             
             processing_log.append(ProcessingLog(
                 level=LogLevel.INFO,
-                message=f"成功解析{len(sequences)}个序列"
+                message=f"成功解析{total_sequences}个序列"
             ))
             
             # 验证结果
-            validation_result = parser.validate(sequences)
+            if not stream:
+                validation_result = parser.validate(sequences)
+            
+            if detected_format == SequenceFormat.FASTA and self.build_fasta_index:
+                self._index_fasta(file_path, processing_log)
             
             if validation_result.total_errors > 0:
                 processing_log.append(ProcessingLog(
@@ -152,14 +326,15 @@ class UnifiedSequenceProcessor:
                 source_file=str(file_path),
                 file_format=format_str,
                 processor_version=self.processor_version,
-                total_sequences=len(sequences),
+                total_sequences=total_sequences,
                 file_size_bytes=file_size,
                 md5_checksum=file_md5,
                 processing_duration_ms=processing_duration
             )
             
             # 生成统计信息
-            statistics = self._generate_statistics(sequences)
+            if not stream:
+                statistics = self._generate_statistics(sequences)
             
             # 创建处理结果
             status = ProcessingStatus.SUCCESS if validation_result.is_valid else ProcessingStatus.PARTIAL
@@ -167,6 +342,7 @@ class UnifiedSequenceProcessor:
             result = ProcessingResult(
                 status=status,
                 metadata=metadata,
+                sequences_omitted=stream,
                 sequences=[seq.model_dump() for seq in sequences],
                 validation=validation_result,
                 statistics=statistics,
@@ -174,7 +350,13 @@ class UnifiedSequenceProcessor:
             )
             
             # 保存输出文件
-            if output_path:
+            if writer:
+                writer.finish(result)
+                processing_log.append(ProcessingLog(
+                    level=LogLevel.INFO,
+                    message=f"结果已保存到: {output_path}"
+                ))
+            elif output_path:
                 self._save_output(result, Path(output_path), output_format)
                 processing_log.append(ProcessingLog(
                     level=LogLevel.INFO,
@@ -225,10 +407,18 @@ class UnifiedSequenceProcessor:
                          output_format: str = "json",
                          auto_detect_format: bool = True,
                          recursive: bool = False,
-                         max_workers: Optional[int] = None) -> BatchProcessingResult:
+                         max_workers: Optional[int] = None,
+                         executor: str = "thread",
+                         stream: bool = False,
+                         manifest: Optional[ProcessingManifest] = None,
+                         force: bool = False) -> BatchProcessingResult:
         """
         批量处理目录中的序列文件
         
+        文件按路径排序后处理，无论是否并发，结果都按该顺序合并，
+        保证批量结果可复现。提供处理清单时，跳过内容、处理器版本和参数
+        均未变化且输出仍存在的文件，并在处理成功后更新清单。
+        
         Args:
             input_dir: 输入目录
             output_dir: 输出目录
@@ -236,11 +426,21 @@ class UnifiedSequenceProcessor:
             output_format: 输出格式
             auto_detect_format: 是否自动检测格式
             recursive: 是否递归处理子目录
-            max_workers: 最大并发数
+            max_workers: 最大并发数，为None或1时串行处理
+            executor: 并发方式，"thread"（线程池）或 "process"（进程池）
+            stream: 是否对每个文件使用流式处理
+            manifest: 增量处理清单，为None时处理全部文件
+            force: 忽略清单中的记录，重新处理全部文件（仍会更新清单）
             
         Returns:
             BatchProcessingResult: 批量处理结果
+            
+        Raises:
+            ValueError: 并发方式不受支持
         """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"不支持的并发方式: {executor}")
+        
         input_dir = Path(input_dir)
         output_dir = Path(output_dir)
         
@@ -253,8 +453,8 @@ class UnifiedSequenceProcessor:
         else:
             files = list(input_dir.glob(pattern))
         
-        # 过滤出文件（排除目录）
-        files = [f for f in files if f.is_file()]
+        # 过滤出文件（排除目录和FASTA索引），排序以保证处理顺序确定
+        files = sorted(f for f in files if f.is_file() and f.suffix != FAI_SUFFIX)
         
         # 初始化批量处理结果
         batch_result = BatchProcessingResult(
@@ -274,25 +474,98 @@ class UnifiedSequenceProcessor:
             message=f"开始批量处理，共找到{len(files)}个文件"
         ))
         
-        # 处理每个文件
+        # 生成每个文件的输出路径，按清单筛出无需重新处理的文件；
+        # 开启模型验证或FASTA索引时需要重新处理，因此两者也计入参数
+        manifest_params = {
+            "output_format": output_format,
+            "auto_detect_format": auto_detect_format,
+            "stream": stream,
+            "validate_models": self.validate_models,
+            "build_fasta_index": self.build_fasta_index,
+        }
+        jobs = []
+        skipped = set()
         for file_path in files:
-            try:
-                # 生成输出文件路径
-                relative_path = file_path.relative_to(input_dir)
-                output_file = output_dir / relative_path.with_suffix(f'.{output_format}')
-                output_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                # 处理文件
-                result = self.process_file(
-                    file_path=file_path,
-                    output_path=output_file,
-                    output_format=output_format,
-                    auto_detect_format=auto_detect_format
+            relative_path = file_path.relative_to(input_dir)
+            output_file = output_dir / relative_path.with_suffix(f'.{output_format}')
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            if (manifest is not None and not force and manifest.is_current(
+                    "sequences", file_path, version=self.processor_version,
+                    params=manifest_params)):
+                skipped.add(file_path)
+            else:
+                jobs.append((file_path, output_file))
+        
+        if skipped:
+            batch_result.global_log.append(ProcessingLog(
+                level=LogLevel.INFO,
+                message=f"{len(skipped)}个文件自上次处理后未变化，已跳过"
+            ))
+        
+        pool = self._create_executor(executor, max_workers, len(jobs))
+        if pool is not None:
+            batch_result.global_log.append(ProcessingLog(
+                level=LogLevel.INFO,
+                message=f"并发处理: {executor} x {max_workers}"
+            ))
+        
+        try:
+            if pool is None:
+                outcomes = (
+                    self._run_file_job(self.process_file, file_path, output_file,
+                                       output_format, auto_detect_format, None, stream)
+                    for file_path, output_file in jobs
                 )
+            else:
+                if executor == "process":
+                    futures = [
+                        pool.submit(_process_file_in_worker, file_path, output_file,
+                                    output_format, auto_detect_format, stream)
+                        for file_path, output_file in jobs
+                    ]
+                else:
+                    futures = [
+                        pool.submit(self.process_file, file_path, output_file,
+                                    output_format, auto_detect_format, None, stream)
+                        for file_path, output_file in jobs
+                    ]
+                outcomes = (self._collect_future(future) for future in futures)
+            
+            # 按文件顺序合并结果
+            outcomes = iter(outcomes)
+            output_files = dict(jobs)
+            for file_path in files:
+                if file_path in skipped:
+                    batch_result.add_file_result(
+                        str(file_path), self._skipped_result(file_path, manifest)
+                    )
+                    continue
+                
+                result, error = next(outcomes)
+                if error is not None:
+                    batch_result.failed_files += 1
+                    batch_result.processed_files += 1
+                    
+                    batch_result.global_log.append(ProcessingLog(
+                        level=LogLevel.ERROR,
+                        message=f"处理失败: {file_path} - {error}"
+                    ))
+                    continue
                 
                 # 记录结果
                 batch_result.add_file_result(str(file_path), result)
                 
+                if manifest is not None and result.status != ProcessingStatus.FAILED:
+                    manifest.record(
+                        "sequences", file_path, [output_files[file_path]],
+                        version=self.processor_version, params=manifest_params,
+                        info={
+                            "status": result.status,
+                            "file_format": result.metadata.file_format,
+                            "total_sequences": result.metadata.total_sequences,
+                        }
+                    )
+                
                 if result.status == ProcessingStatus.SUCCESS:
                     batch_result.global_log.append(ProcessingLog(
                         level=LogLevel.INFO,
@@ -303,15 +576,11 @@ class UnifiedSequenceProcessor:
                         level=LogLevel.WARNING,
                         message=f"处理有问题: {file_path} (状态: {result.status})"
                     ))
-                
-            except Exception as e:
-                batch_result.failed_files += 1
-                batch_result.processed_files += 1
-                
-                batch_result.global_log.append(ProcessingLog(
-                    level=LogLevel.ERROR,
-                    message=f"处理失败: {file_path} - {e}"
-                ))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if manifest is not None:
+                manifest.save()
         
         # 完成批量处理
         batch_result.finalize()
@@ -326,6 +595,107 @@ class UnifiedSequenceProcessor:
         
         return batch_result
     
+    def _skipped_result(self, file_path: Path,
+                        manifest: ProcessingManifest) -> ProcessingResult:
+        """
+        为清单中未变化的文件构造跳过状态的处理结果
+        
+        Args:
+            file_path: 输入文件路径
+            manifest: 处理清单
+            
+        Returns:
+            ProcessingResult: 跳过状态的结果，序列数等信息取自清单
+        """
+        entry = manifest.get("sequences", file_path) or {}
+        info = entry.get("info", {})
+        metadata = ProcessingMetadata(
+            source_file=str(file_path),
+            file_format=info.get("file_format", "unknown"),
+            processor_version=self.processor_version,
+            total_sequences=info.get("total_sequences", 0),
+            file_size_bytes=file_path.stat().st_size,
+            md5_checksum=manifest.fingerprint(file_path)["md5"]
+        )
+        return ProcessingResult(
+            status=ProcessingStatus.SKIPPED,
+            metadata=metadata,
+            sequences_omitted=True,
+            validation=ValidationResult(is_valid=True),
+            processing_log=[ProcessingLog(
+                level=LogLevel.INFO,
+                message=f"文件未变化，沿用已有输出: {', '.join(entry.get('outputs', []))}"
+            )]
+        )
+    
+    def _parse_streaming(self, parser: BaseSequenceParser, file_path: Path,
+                         writer: Optional[_StreamingResultWriter]
+                         ) -> Tuple[int, ValidationResult, Dict[str, Any]]:
+        """
+        流式解析文件，逐条验证、统计并写出序列
+        
+        Args:
+            parser: 解析器
+            file_path: 输入文件路径
+            writer: 输出写入器，为None时只统计不写出
+            
+        Returns:
+            Tuple: (序列数量, 验证结果, 统计信息)
+        """
+        validation = parser.create_validator()
+        statistics = _StatisticsAccumulator()
+        
+        for sequence in parser.iter_parse(file_path):
+            validation.add(sequence)
+            statistics.add(sequence)
+            if writer:
+                writer.write(sequence.model_dump())
+        
+        self.logger.info(f"流式解析文件 {file_path}，共{validation.count}个序列")
+        return validation.count, validation.finish(), statistics.to_dict()
+    
+    def _create_executor(self, executor: str, max_workers: Optional[int],
+                         job_count: int) -> Optional[Executor]:
+        """
+        根据并发设置创建线程池或进程池
+        
+        Args:
+            executor: 并发方式，"thread" 或 "process"
+            max_workers: 最大并发数
+            job_count: 待处理文件数
+            
+        Returns:
+            Optional[Executor]: 执行器，无需并发时返回None
+        """
+        if not max_workers or max_workers <= 1 or job_count <= 1:
+            return None
+        
+        workers = min(max_workers, job_count)
+        if executor == "process":
+            # 解析器均为无状态对象，可随处理器一起传给工作进程
+            return ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_process_worker,
+                initargs=(self,)
+            )
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seq-batch")
+    
+    @staticmethod
+    def _run_file_job(func, *args):
+        """执行单个文件任务，返回 (结果, 错误) 元组"""
+        try:
+            return func(*args), None
+        except Exception as e:
+            return None, e
+    
+    @staticmethod
+    def _collect_future(future):
+        """获取并发任务结果，返回 (结果, 错误) 元组"""
+        try:
+            return future.result(), None
+        except Exception as e:
+            return None, e
+    
     def convert_to_json(self, sequences: List[SequenceRecord],
                        metadata: Optional[ProcessingMetadata] = None,
                        include_analysis: bool = True,
@@ -363,33 +733,43 @@ class UnifiedSequenceProcessor:
         
         return json_data
     
-    def _get_parser(self, format_type: SequenceFormat) -> Optional[BaseSequenceParser]:
+    def _index_fasta(self, file_path: Path, processing_log: List[ProcessingLog]) -> None:
         """
-        获取指定格式的解析器
+        生成或更新FASTA文件的 .fai 索引
+        
+        索引只用于随机读取，生成失败（如各行长度不一致、目录不可写）
+        只记录警告，不影响处理结果。
         
         Args:
-            format_type: 格式类型
-            
-        Returns:
-            Optional[BaseSequenceParser]: 解析器实例
+            file_path: FASTA文件路径
+            processing_log: 处理日志
         """
-        return self.parsers.get(format_type)
+        try:
+            fai_path = ensure_fasta_index(file_path)
+        except (ParsingError, OSError) as e:
+            self.logger.warning(f"未能生成FASTA索引 {file_path}: {e}")
+            processing_log.append(ProcessingLog(
+                level=LogLevel.WARNING,
+                message=f"未能生成FASTA索引: {e}"
+            ))
+            return
+        
+        processing_log.append(ProcessingLog(
+            level=LogLevel.INFO,
+            message=f"FASTA索引: {fai_path}"
+        ))
     
-    def _calculate_file_md5(self, file_path: Path) -> str:
+    def _get_parser(self, format_type: SequenceFormat) -> Optional[BaseSequenceParser]:
         """
-        计算文件MD5校验和
+        获取指定格式的解析器
         
         Args:
-            file_path: 文件路径
+            format_type: 格式类型
             
         Returns:
-            str: MD5校验和
+            Optional[BaseSequenceParser]: 解析器实例
         """
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        return self.parsers.get(format_type)
     
     def _generate_statistics(self, sequences: List[SequenceRecord]) -> Dict[str, Any]:
         """
@@ -401,41 +781,10 @@ class UnifiedSequenceProcessor:
         Returns:
             Dict[str, Any]: 统计信息
         """
-        if not sequences:
-            return {}
-        
-        # 基本统计
-        total_residues = sum(seq.sequence_data.length for seq in sequences)
-        lengths = [seq.sequence_data.length for seq in sequences]
-        
-        # 分子类型统计
-        type_counts = {}
+        accumulator = _StatisticsAccumulator()
         for seq in sequences:
-            mol_type = seq.sequence_data.molecular_type
-            type_counts[mol_type] = type_counts.get(mol_type, 0) + 1
-        
-        # 长度分布
-        length_stats = {
-            "min": min(lengths),
-            "max": max(lengths),
-            "mean": total_residues / len(sequences),
-            "median": sorted(lengths)[len(lengths) // 2]
-        }
-        
-        # 验证状态统计
-        valid_sequences = sum(1 for seq in sequences if seq.validation.is_valid)
-        
-        return {
-            "total_sequences": len(sequences),
-            "total_residues": total_residues,
-            "sequence_types": type_counts,
-            "length_distribution": length_stats,
-            "validation_summary": {
-                "valid_sequences": valid_sequences,
-                "invalid_sequences": len(sequences) - valid_sequences,
-                "validity_rate": valid_sequences / len(sequences)
-            }
-        }
+            accumulator.add(seq)
+        return accumulator.to_dict()
     
     def _generate_batch_statistics(self, batch_result: BatchProcessingResult) -> Dict[str, Any]:
         """
@@ -447,25 +796,23 @@ class UnifiedSequenceProcessor:
         Returns:
             Dict[str, Any]: 批量统计信息
         """
-        # 收集所有成功处理的序列
-        all_sequences = []
+        # 序列数取自元数据：流式处理和清单跳过的文件不在内存中保留序列列表
+        total_sequences = 0
         format_counts = {}
         
         for file_path, result in batch_result.file_results.items():
             if result.status == ProcessingStatus.SUCCESS:
                 format_type = result.metadata.file_format
                 format_counts[format_type] = format_counts.get(format_type, 0) + 1
-                
-                # 收集序列统计（不重新创建SequenceRecord对象，直接使用字典）
-                all_sequences.extend(result.sequences)
+                total_sequences += result.metadata.total_sequences
         
         return {
             "file_format_distribution": format_counts,
-            "total_sequences_processed": len(all_sequences),
+            "total_sequences_processed": total_sequences,
             "processing_summary": {
                 "success_rate": batch_result.calculate_success_rate(),
                 "average_sequences_per_file": (
-                    len(all_sequences) / batch_result.successful_files 
+                    total_sequences / batch_result.successful_files 
                     if batch_result.successful_files > 0 else 0
                 )
             }
@@ -14,6 +14,7 @@ class SequenceFormat(str, Enum):
     """支持的序列格式枚举"""
     FASTA = "fasta"
     CSV = "csv"
+    ST26 = "st26"
     JSON = "json"
     UNKNOWN = "unknown"
 
@@ -164,6 +165,29 @@ FORMAT_SPECIFICATIONS = {
         }
     ),
     
+    SequenceFormat.ST26: FormatSpecification(
+        format_name=SequenceFormat.ST26,
+        description="WIPO ST.26 XML序列表",
+        file_extensions=["xml"],
+        mime_types=["application/xml", "text/xml"],
+        characteristics={
+            "structured_format": True,
+            "root_element": "ST26SequenceListing",
+            "sequence_per_record": True,
+            "supports_metadata": True
+        },
+        detection_rules={
+            "root_pattern": r"<ST26SequenceListing\b",
+            "record_pattern": r"<SequenceData\s+sequenceIDNumber=",
+            "required_elements": ["SequenceData", "INSDSeq"]
+        },
+        parsing_rules={
+            "incremental_parsing": True,
+            "skip_intentionally_omitted": True,
+            "validate_sequence_chars": True
+        }
+    ),
+    
     SequenceFormat.JSON: FormatSpecification(
         format_name=SequenceFormat.JSON,
         description="JSON格式序列文件",
@@ -111,6 +111,10 @@ class ProcessingResult(BaseModel):
     
     status: ProcessingStatus = Field(..., description="处理状态")
     metadata: ProcessingMetadata = Field(..., description="处理元数据")
+    sequences_omitted: bool = Field(
+        False,
+        description="流式处理时序列直接写入输出文件，不保留在结果中"
+    )
     sequences: List[Dict[str, Any]] = Field(
         default_factory=list,
         description="解析出的序列列表"
@@ -129,6 +133,8 @@ class ProcessingResult(BaseModel):
     @classmethod
     def validate_sequence_count(cls, v, info):
         """验证序列数量一致性"""
+        if info.data and info.data.get('sequences_omitted'):
+            return v
         if info.data and 'metadata' in info.data:
             metadata = info.data['metadata']
             if metadata and len(v) != metadata.total_sequences:
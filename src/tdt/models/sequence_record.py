@@ -7,11 +7,120 @@
 import hashlib
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, TypeVar
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 
+# 各分子类型允许的残基字符（核酸包括IUPAC简并代码）
+MOLECULAR_TYPE_ALPHABETS = {
+    'protein': frozenset('ACDEFGHIKLMNPQRSTVWY'),
+    'dna': frozenset('ATCGNRYSWKMBDHV'),
+    'rna': frozenset('AUCGNRYSWKMBDHV'),
+}
+
+_MOLECULAR_TYPE_LABELS = {
+    'protein': '蛋白质',
+    'dna': 'DNA',
+    'rna': 'RNA',
+}
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+_object_setattr = object.__setattr__
+
+
+# 各模型字段的 (字段名, 默认工厂, 默认值)，按字段定义顺序排列
+_FIELD_SPECS: Dict[type, Tuple[Tuple[str, Optional[Callable[[], Any]], Any], ...]] = {}
+
+
+def construct_model(model_cls: Type[ModelT], **data: Any) -> ModelT:
+    """
+    跳过验证创建模型实例
+    
+    效果与 model_construct 相同（模型均不含额外字段和私有属性），但直接写入
+    实例状态，并直接调用默认工厂填充未提供的字段：model_construct 每次都会用
+    inspect 检查默认工厂的签名，开销比验证本身还大。字段按定义顺序写入，
+    序列化结果与验证创建的实例一致。
+    
+    Args:
+        model_cls: 模型类
+        **data: 字段值
+        
+    Returns:
+        ModelT: 未经验证的模型实例
+    """
+    specs = _FIELD_SPECS.get(model_cls)
+    if specs is None:
+        specs = _FIELD_SPECS[model_cls] = tuple(
+            (name, field.default_factory, field.default)
+            for name, field in model_cls.model_fields.items()
+        )
+    
+    values = {}
+    for name, factory, default in specs:
+        if name in data:
+            values[name] = data[name]
+        else:
+            values[name] = factory() if factory is not None else default
+    
+    instance = model_cls.__new__(model_cls)
+    _object_setattr(instance, '__dict__', values)
+    _object_setattr(instance, '__pydantic_fields_set__', set(data))
+    _object_setattr(instance, '__pydantic_extra__', None)
+    _object_setattr(instance, '__pydantic_private__', None)
+    return instance
+
+
+def check_molecular_type_residues(molecular_type: str, residues: Iterable[str]) -> None:
+    """
+    检查残基字符是否符合分子类型
+    
+    Args:
+        molecular_type: 分子类型，unknown 不做检查
+        residues: 序列中出现的残基字符（可传入序列本身或组成字典的键）
+        
+    Raises:
+        ValueError: 含有该分子类型不允许的字符
+    """
+    alphabet = MOLECULAR_TYPE_ALPHABETS.get(molecular_type)
+    if alphabet is None:
+        return
+    
+    invalid_chars: Set[str] = {c.upper() for c in residues} - alphabet
+    if invalid_chars:
+        raise ValueError(
+            f"{_MOLECULAR_TYPE_LABELS[molecular_type]}序列包含无效字符: {invalid_chars}"
+        )
+
+
+def check_sequence_id(sequence_id: str) -> str:
+    """
+    检查并规范化序列ID
+    
+    Args:
+        sequence_id: 序列ID
+        
+    Returns:
+        str: 去除前后空白的序列ID
+        
+    Raises:
+        ValueError: ID为空或超过100个字符
+    """
+    # 移除前后空白字符
+    sequence_id = sequence_id.strip()
+    
+    # 检查是否为空
+    if not sequence_id:
+        raise ValueError("序列ID不能为空")
+    
+    # 检查长度
+    if len(sequence_id) > 100:
+        raise ValueError("序列ID长度不能超过100个字符")
+    
+    return sequence_id
+
+
 class SequenceComposition(BaseModel):
     """序列组成分析结果"""
     
@@ -188,37 +297,34 @@ class SequenceData(BaseModel):
     @model_validator(mode='after')
     def validate_molecular_type(self):
         """根据序列内容验证分子类型"""
-        cleaned_sequence = self.cleaned_sequence
-        molecular_type = self.molecular_type
+        if self.cleaned_sequence:
+            check_molecular_type_residues(self.molecular_type, set(self.cleaned_sequence))
         
-        if cleaned_sequence and molecular_type != 'unknown':
-            # 检查序列字符是否符合分子类型
-            protein_chars = set('ACDEFGHIKLMNPQRSTVWY')
-            dna_chars = set('ATCGNRYSWKMBDHV')  # 包括IUPAC核酸代码
-            rna_chars = set('AUCGNRYSWKMBDHV')  # 包括IUPAC核酸代码
+        return self
+    
+    @classmethod
+    def construct_trusted(cls, **data: Any) -> "SequenceData":
+        """
+        跳过字段验证创建序列数据，供解析器内部批量使用
+        
+        调用方需保证 cleaned_sequence、length、checksum 和 composition 由同一条
+        清理后的序列计算得到。这里只检查分子类型与残基是否一致，且只遍历组成
+        字典的键，不再扫描整条序列。
+        
+        Args:
+            **data: 字段值
             
-            seq_chars = set(cleaned_sequence.upper())
+        Returns:
+            SequenceData: 未经字段验证的序列数据
             
-            if molecular_type == 'protein':
-                invalid_chars = seq_chars - protein_chars
-                if invalid_chars:
-                    raise ValueError(
-                        f"蛋白质序列包含无效字符: {invalid_chars}"
-                    )
-            elif molecular_type == 'dna':
-                invalid_chars = seq_chars - dna_chars
-                if invalid_chars:
-                    raise ValueError(
-                        f"DNA序列包含无效字符: {invalid_chars}"
-                    )
-            elif molecular_type == 'rna':
-                invalid_chars = seq_chars - rna_chars
-                if invalid_chars:
-                    raise ValueError(
-                        f"RNA序列包含无效字符: {invalid_chars}"
-                    )
-        
-        return self
+        Raises:
+            ValueError: 残基字符与分子类型不符
+        """
+        check_molecular_type_residues(
+            data['molecular_type'], data['composition'].composition.keys()
+        )
+        data['raw_sequence'] = data['raw_sequence'].strip()
+        return construct_model(cls, **data)
 
 
 class SequenceRecord(BaseModel):
@@ -256,18 +362,40 @@ class SequenceRecord(BaseModel):
     @field_validator('sequence_id')
     def validate_sequence_id(cls, v):
         """验证序列ID格式"""
-        # 移除前后空白字符
-        v = v.strip()
+        return check_sequence_id(v)
+    
+    @classmethod
+    def construct_trusted(cls, **data: Any) -> "SequenceRecord":
+        """
+        跳过字段验证创建序列记录，供解析器内部批量使用
         
-        # 检查是否为空
-        if not v:
-            raise ValueError("序列ID不能为空")
+        嵌套模型由调用方创建；这里只规范化并检查序列ID。
+        
+        Args:
+            **data: 字段值
+            
+        Returns:
+            SequenceRecord: 未经字段验证的序列记录
+            
+        Raises:
+            ValueError: 序列ID为空或过长
+        """
+        data['sequence_id'] = check_sequence_id(data['sequence_id'])
+        return construct_model(cls, **data)
+    
+    def revalidate(self) -> "SequenceRecord":
+        """
+        对记录（含嵌套模型）执行完整验证
         
-        # 检查长度
-        if len(v) > 100:
-            raise ValueError("序列ID长度不能超过100个字符")
+        用于检查通过 construct_trusted 创建的记录。
         
-        return v
+        Returns:
+            SequenceRecord: 验证后的新记录
+            
+        Raises:
+            pydantic.ValidationError: 记录不满足模型约束
+        """
+        return type(self).model_validate(self.model_dump())
     
     class Config:
         """Pydantic配置"""
@@ -3,6 +3,7 @@
 
 提供文件和目录操作的辅助功能。
 """
+import hashlib
 import logging
 from pathlib import Path
 from typing import Union
@@ -158,3 +159,21 @@ def safe_filename(filename: str) -> str:
     
     logger.debug(f"文件名安全化: {filename} -> {safe_name}")
     return safe_name
+
+
+def calculate_file_md5(file_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件的MD5校验和。
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+        
+    Returns:
+        十六进制MD5校验和
+    """
+    hash_md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
@@ -83,6 +83,58 @@ def normalize_text(text: str) -> str:
     return normalized
 
 
+# 匹配 "SEQ ID NO: 1"、"SEQ_ID_NO_1"、"seq id no.1" 等写法
+SEQ_ID_PATTERN = re.compile(r'SEQ[\s_\-]*ID[\s_\-]*(?:NO)?[\s_\-.:：]*(\d+)', re.IGNORECASE)
+
+
+def normalize_seq_id(value: Optional[str]) -> Optional[str]:
+    """
+    将各种写法的序列编号标准化为 SEQ_ID_NO_<n> 形式。
+    
+    Args:
+        value: 序列编号文本，如 "SEQ ID NO: 1"、"SEQ_ID_NO_1" 或 "1"
+        
+    Returns:
+        标准化后的序列编号，无法识别时返回 None
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return f"SEQ_ID_NO_{int(value)}"
+    
+    match = SEQ_ID_PATTERN.search(value)
+    if match:
+        return f"SEQ_ID_NO_{int(match.group(1))}"
+    return None
+
+
+# 中日韩统一表意文字及全角标点，按每字符约1个令牌估算
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的LLM令牌数。
+    
+    中文字符按每字符1个令牌、其他字符按每4个字符1个令牌估算，
+    用于限流预留和分块预算，不要求精确。
+    
+    Args:
+        text: 文本内容
+        
+    Returns:
+        估算的令牌数
+    """
+    if not text:
+        return 0
+    
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
 def extract_claim_numbers(text: str) -> List[int]:
     """
     从文本中提取权利要求编号。